@@ -1,8 +1,10 @@
 __all__ = ["TemplatekitExtension", "__version__", "version_info"]
 
 from importlib.metadata import PackageNotFoundError, version
+from typing import TYPE_CHECKING, Any
 
-from .jinjaext import TemplatekitExtension
+if TYPE_CHECKING:
+    from .jinjaext import TemplatekitExtension
 
 __version__: str
 """The version string of Templatekit (PEP 440 / SemVer compatible)."""
@@ -18,3 +20,16 @@ version_info = __version__.split(".")
 
 Use this for version comparison.
 """
+
+
+def __getattr__(name: str) -> Any:
+    # TemplatekitExtension is imported on first access, rather than with the
+    # package, because importing Jinja is slow. Templates load the extension
+    # by name (templatekit.TemplatekitExtension), which uses this function.
+    if name == "TemplatekitExtension":
+        from .jinjaext import TemplatekitExtension
+
+        return TemplatekitExtension
+    raise AttributeError(
+        "module {0!r} has no attribute {1!r}".format(__name__, name)
+    )
@@ -0,0 +1,328 @@
+"""Asynchronous APIs for rendering file templates in asyncio applications.
+
+Template loading (reading ``cookiecutter.json`` files and compiling
+templates) and file writes run on a bounded thread pool, so they don't block
+the event loop, and templates are rendered with Jinja's async rendering
+mode. See also `templatekit.repo.Repo.aiter_templates` for loading the
+templates of a repository asynchronously.
+"""
+
+from __future__ import annotations
+
+__all__ = (
+    "AsyncFileTemplateRenderer",
+    "get_default_renderer",
+    "render_file_template",
+    "render_and_write_file_template",
+)
+
+import asyncio
+import functools
+import logging
+import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+from cookiecutter.prompt import prompt_for_config
+from jinja2 import BytecodeCache, Template
+
+from .filerender import FileTemplateRenderer, _write_rendered_file
+from .instrumentation import span
+
+_R = TypeVar("_R")
+
+
+class AsyncFileTemplateRenderer(object):
+    """Asynchronous renderer for file templates that reuses Jinja
+    environments and compiled templates across renders.
+
+    Parameters
+    ----------
+    max_workers : `int`, optional
+        Maximum number of threads that load templates and write files. The
+        default is the `concurrent.futures.ThreadPoolExecutor` default.
+    max_concurrent_loads : `int`, optional
+        Maximum number of templates that are loaded (read and compiled) at
+        the same time, per event loop. Renders of templates that are already
+        loaded aren't limited.
+    cache_size : `int`, optional
+        Maximum number of compiled templates to keep.
+    bytecode_cache : `jinja2.BytecodeCache`, optional
+        A Jinja bytecode cache, so that compiled template code is reused
+        across processes.
+
+    Notes
+    -----
+    Templates are compiled by a `templatekit.filerender.FileTemplateRenderer`
+    with Jinja's ``enable_async`` option, and rendered on the event loop with
+    ``Template.render_async``. Unlike the synchronous renderer, this renderer
+    never prompts for context variables: the defaults in
+    ``cookiecutter.json`` are always used.
+
+    A renderer can be used from several event loops (one per thread). Call
+    `close`, or use the renderer as an async context manager, to shut down
+    its thread pool.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_concurrent_loads: int = 8,
+        cache_size: int = 128,
+        bytecode_cache: Optional[BytecodeCache] = None,
+    ):
+        super().__init__()
+        self._log = logging.getLogger(__name__)
+        self.max_concurrent_loads = max_concurrent_loads
+        self.renderer = FileTemplateRenderer(
+            cache_size=cache_size,
+            bytecode_cache=bytecode_cache,
+            enable_async=True,
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="templatekit-aio"
+        )
+        # Semaphores are bound to the event loop they're used in
+        self._semaphores: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, asyncio.Semaphore
+        ] = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    async def __aenter__(self) -> AsyncFileTemplateRenderer:
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Shut down the renderer's thread pool.
+
+        Pending loads and writes are finished first.
+        """
+        self._executor.shutdown(wait=True)
+
+    def invalidate(self, template_dir: str) -> None:
+        """Drop the cached environment and compiled templates of a template
+        directory.
+
+        Parameters
+        ----------
+        template_dir : `str`
+            Path of the template's directory.
+
+        See also
+        --------
+        templatekit.filerender.FileTemplateRenderer.invalidate
+        """
+        self.renderer.invalidate(template_dir)
+
+    async def get_template(
+        self, template_path: str
+    ) -> Tuple[Template, Dict[str, Any]]:
+        """Get the compiled template and the ``cookiecutter.json`` context
+        for a file template.
+
+        Parameters
+        ----------
+        template_path : `str`
+            Path to the file template.
+
+        Returns
+        -------
+        template : `jinja2.Template`
+            The compiled template, for async rendering.
+        context : `dict`
+            The context generated from the ``cookiecutter.json`` file in the
+            template's directory. Don't modify this context.
+
+        See also
+        --------
+        templatekit.filerender.FileTemplateRenderer.get_template
+        """
+        async with self._get_semaphore():
+            return await self._run(self.renderer.get_template, template_path)
+
+    async def render(
+        self,
+        template_path: str,
+        extra_context: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """Render a single-file template.
+
+        Parameters
+        ----------
+        template_path : `str`
+            Path to the file template. There should be a
+            ``cookiecutter.json`` in the same directory as the template file.
+        extra_context : `dict`, optional
+            Optional dictionary of key-value pairs that override defaults in
+            the ``cookiecutter.json`` file.
+
+        Returns
+        -------
+        rendered_text : `str`
+            Content rendered from the template and ``cookiecutter.json``
+            defaults.
+        """
+        self._log.debug("Rendering file template %s", template_path)
+        tmpl, context = await self.get_template(template_path)
+
+        template_name = os.path.basename(
+            os.path.dirname(os.path.abspath(template_path))
+        )
+        with span("render.defaults", template=template_name):
+            context = {"cookiecutter": prompt_for_config(context, True)}
+        if extra_context is not None:
+            context["cookiecutter"].update(extra_context)
+
+        with span("jinja.render", template=template_name):
+            return await tmpl.render_async(**context)
+
+    async def render_and_write(
+        self,
+        template_path: str,
+        output_path: str,
+        extra_context: Optional[Dict[str, Any]] = None,
+        skip_unchanged: bool = False,
+    ) -> bool:
+        """Render a single-file template and write it to the filesystem.
+
+        Parameters
+        ----------
+        template_path : `str`
+            Path to the file template.
+        output_path : `str`
+            Path to write the rendered file.
+        extra_context : `dict`, optional
+            Optional dictionary of key-value pairs that override defaults in
+            the ``cookiecutter.json`` file.
+        skip_unchanged : `bool`, optional
+            If `True`, and the output file already exists with the rendered
+            content, the file isn't written.
+
+        Returns
+        -------
+        changed : `bool`
+            `True` if the output file was written (or its permissions
+            changed), or `False` if it was already up to date.
+
+        See also
+        --------
+        templatekit.filerender.render_and_write_file_template
+        """
+        rendered_text = await self.render(
+            template_path, extra_context=extra_context
+        )
+        return await self._run(
+            _write_rendered_file,
+            template_path,
+            output_path,
+            rendered_text,
+            skip_unchanged,
+        )
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphore = self._semaphores.get(loop)
+            if semaphore is None:
+                semaphore = asyncio.Semaphore(self.max_concurrent_loads)
+                self._semaphores[loop] = semaphore
+            return semaphore
+
+    async def _run(self, func: Callable[..., _R], *args: Any) -> _R:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(func, *args)
+        )
+
+
+_default_renderer: Optional[AsyncFileTemplateRenderer] = None
+_default_renderer_lock = threading.Lock()
+
+
+def get_default_renderer() -> AsyncFileTemplateRenderer:
+    """Get the renderer that is shared by `render_file_template` and
+    `render_and_write_file_template`.
+
+    Returns
+    -------
+    renderer : `AsyncFileTemplateRenderer`
+        The shared renderer, which is created on first use.
+    """
+    global _default_renderer
+    with _default_renderer_lock:
+        if _default_renderer is None:
+            _default_renderer = AsyncFileTemplateRenderer()
+        return _default_renderer
+
+
+async def render_file_template(
+    template_path: str,
+    extra_context: Optional[Dict[str, Any]] = None,
+) -> str:
+    """Render a single-file template asynchronously, with the defaults in
+    its ``cookiecutter.json`` file.
+
+    Parameters
+    ----------
+    template_path : `str`
+        Path to the file template.
+    extra_context : `dict`, optional
+        Optional dictionary of key-value pairs that override defaults in the
+        ``cookiecutter.json`` file.
+
+    Returns
+    -------
+    rendered_text : `str`
+        Content rendered from the template.
+
+    See also
+    --------
+    templatekit.filerender.render_file_template
+    """
+    return await get_default_renderer().render(
+        template_path, extra_context=extra_context
+    )
+
+
+async def render_and_write_file_template(
+    template_path: str,
+    output_path: str,
+    extra_context: Optional[Dict[str, Any]] = None,
+    skip_unchanged: bool = False,
+) -> bool:
+    """Render a single-file template and write it to the filesystem,
+    asynchronously.
+
+    Parameters
+    ----------
+    template_path : `str`
+        Path to the file template.
+    output_path : `str`
+        Path to write the rendered file.
+    extra_context : `dict`, optional
+        Optional dictionary of key-value pairs that override defaults in the
+        ``cookiecutter.json`` file.
+    skip_unchanged : `bool`, optional
+        If `True`, and the output file already exists with the rendered
+        content, the file isn't written.
+
+    Returns
+    -------
+    changed : `bool`
+        `True` if the output file was written (or its permissions changed),
+        or `False` if it was already up to date.
+
+    See also
+    --------
+    templatekit.filerender.render_and_write_file_template
+    """
+    return await get_default_renderer().render_and_write(
+        template_path,
+        output_path,
+        extra_context=extra_context,
+        skip_unchanged=skip_unchanged,
+    )
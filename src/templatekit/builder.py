@@ -1,19 +1,24 @@
 """Scons builders for regenerating examples given template defaults.
 
-This module provides two builders:
+This module provides three builders:
 
-- ``build_file_template`` for single-file templates in the
-  ``file_templates`` directory.
+- ``file_template_builder`` for single-file templates in the
+  ``file_templates`` directory. Templates are rendered with
+  `templatekit.filerender`, and unchanged examples aren't rewritten.
 
-- ``build_project_template`` for cookiecutter (project) templates in the
-  ``project_templates`` directory.
+- ``cookiecutter_project_builder`` for cookiecutter (project) templates in
+  the ``project_templates`` directory. Projects are generated in-process
+  with `templatekit.projectrender`, which compiles each project template
+  once per Scons process. Projects are built incrementally, sharing the
+  example manifest of the native builder's incremental mode, so only
+  output files whose content changed are rewritten.
 
 - ``line_format_builder`` for reformatting each line of a content file with
   a Python format expression.
 
-Again, Scons is only used by the templates repository to regenerate examples
-given the template defaults. Users will use cookiecutter directly to generate
-new projects from a template.
+Scons is only used by the templates repository to regenerate examples given
+the template defaults. Users generate new projects from a template with
+``templatekit make``, or with cookiecutter directly.
 """
 
 __all__ = (
@@ -23,14 +28,15 @@ __all__ = (
 )
 
 import os
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 from cookiecutter.find import find_template
-from cookiecutter.main import cookiecutter
 from SCons.Node import Node
 from SCons.Script import Builder, Environment
 
+from .examples import Example, ExampleManifest, build_example, build_examples
 from .filerender import render_and_write_file_template
+from .repo import Repo
 from .textutils import reformat_content_lines
 
 
@@ -57,8 +63,13 @@ def build_file_template(
     else:
         context_overrides = None
 
+    # Skipping unchanged files preserves their modification times, which
+    # avoids spurious Git index refreshes.
     render_and_write_file_template(
-        source_path, target_path, extra_context=context_overrides
+        source_path,
+        target_path,
+        extra_context=context_overrides,
+        skip_unchanged=True,
     )
 
 
@@ -100,14 +111,40 @@ def build_project_template(
     else:
         context_overrides = None
 
-    cookiecutter(
-        template_dir,
-        output_dir=template_dir,
-        overwrite_if_exists=True,
-        no_input=True,
-        extra_context=context_overrides,
+    template_dir = os.path.abspath(template_dir)
+    example = Example(
+        template_name=os.path.basename(template_dir),
+        template_type="project",
+        template_path=template_dir,
+        source_path=None,
+        output_path=template_dir,
+        context=context_overrides,
     )
 
+    # Scons reruns this action whenever any template file changes. Building
+    # incrementally, with the same manifest as ``templatekit check --builder
+    # native --incremental``, skips examples that another build already
+    # brought up to date, and only rewrites output files whose content
+    # changed. The project template is compiled once per scons process, and
+    # reused for each of its examples.
+    try:
+        manifest: Optional[ExampleManifest] = ExampleManifest.for_repo_root(
+            Repo.discover_repo(template_dir).root
+        )
+    except OSError:
+        manifest = None
+    if manifest is None:
+        result = build_example(example, incremental=True)
+    else:
+        (result,) = build_examples([example], workers=1, manifest=manifest)
+        manifest.save()
+    if not result.ok:
+        raise RuntimeError(
+            "Can't build the example of {0}: {1}".format(
+                example.template_name, result.error
+            )
+        )
+
 
 def emit_cookiecutter_sources(
     target: List[Node], source: List[Node], env: Environment
@@ -0,0 +1,314 @@
+"""Persistent, on-disk cache of parsed template metadata.
+"""
+
+from __future__ import annotations
+
+__all__ = (
+    "MetadataCache",
+    "get_file_signature",
+    "make_cache_dir",
+    "write_cache_file",
+)
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from .fileutils import open_atomic
+
+DEFAULT_CACHE_DIRNAME = ".templatekit-cache"
+"""Default name of the cache directory, relative to the root of a template
+repository.
+"""
+
+
+def get_file_signature(path: str) -> Dict[str, Any]:
+    """Get the signature of a file, used to detect whether the file changed.
+
+    Parameters
+    ----------
+    path : `str`
+        Path of the file.
+
+    Returns
+    -------
+    signature : `dict`
+        A dictionary with ``size``, ``mtime_ns``, and ``sha256`` (hex digest
+        of the file's content) keys.
+    """
+    with open(path, "rb") as f:
+        content = f.read()
+        stat = os.fstat(f.fileno())
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": hashlib.sha256(content).hexdigest(),
+    }
+
+
+def make_cache_dir(dirname: str) -> None:
+    """Create a cache directory, if necessary, along with a ``.gitignore``
+    file that ignores the directory's contents.
+
+    Parameters
+    ----------
+    dirname : `str`
+        Path of the cache directory.
+    """
+    os.makedirs(dirname, exist_ok=True)
+    gitignore_path = os.path.join(dirname, ".gitignore")
+    if not os.path.exists(gitignore_path):
+        # Keep the cache out of `templatekit check`'s Git state checks
+        with open(gitignore_path, "w") as f:
+            f.write("*\n")
+
+
+def write_cache_file(path: str, data: Any) -> None:
+    """Write JSON data to a file in a cache directory.
+
+    The cache directory is created if necessary (see `make_cache_dir`). The
+    file is replaced atomically.
+
+    Parameters
+    ----------
+    path : `str`
+        Path of the cache file.
+    data
+        JSON-serializable data.
+    """
+    make_cache_dir(os.path.dirname(path))
+    with open_atomic(path) as f:
+        json.dump(data, f)
+
+
+class MetadataCache(object):
+    """On-disk cache of the normalized ``templatekit.yaml`` configuration and
+    ``cookiecutter.json`` data of templates.
+
+    Parameters
+    ----------
+    dirname : `str`
+        Path of the cache directory. The directory is created when the cache
+        is saved.
+
+    Notes
+    -----
+    Cache entries are keyed by the template's directory path. Each entry
+    records the size, modification time, and content hash of the
+    ``templatekit.yaml`` and ``cookiecutter.json`` files it was derived
+    from. An entry is used only if the sizes and modification times of the
+    files match, or if their sizes match and a re-hash of their content
+    matches (for example, after a fresh Git checkout).
+
+    Changes are held in memory until `save` is called. A cache can be
+    shared by threads that load templates concurrently.
+    """
+
+    filename = "metadata.json"
+    """Name of the cache file inside the cache directory."""
+
+    format_version = 1
+    """Version of the cache file format. Cache files with a different version
+    are ignored.
+    """
+
+    def __init__(self, dirname: str):
+        super().__init__()
+        self._log = logging.getLogger(__name__)
+        self.dirname = os.path.abspath(dirname)
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        self._dirty = False
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def for_repo_root(cls, root: str) -> MetadataCache:
+        """Create a cache located in the default directory
+        (``.templatekit-cache``) of a template repository.
+
+        Parameters
+        ----------
+        root : `str`
+            Path of the template repository's root directory.
+
+        Returns
+        -------
+        cache : `MetadataCache`
+            The metadata cache.
+        """
+        return cls(os.path.join(root, DEFAULT_CACHE_DIRNAME))
+
+    def __repr__(self) -> str:
+        return "MetadataCache({0!r})".format(self.dirname)
+
+    @property
+    def path(self) -> str:
+        """Path of the cache file (`str`)."""
+        return os.path.join(self.dirname, self.filename)
+
+    @property
+    def entries(self) -> Dict[str, Dict[str, Any]]:
+        """The cache entries, keyed by template directory path (`dict`).
+
+        The cache file is read on first access.
+        """
+        with self._lock:
+            if self._entries is None:
+                self._entries = self._load()
+            return self._entries
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as err:
+            self._log.warning(
+                "Ignoring unreadable metadata cache %s: %s", self.path, err
+            )
+            return {}
+        if data.get("version") != self.format_version:
+            return {}
+        return data["templates"]
+
+    def get(
+        self, template_dir: str, source_paths: List[str]
+    ) -> Optional[Dict[str, Any]]:
+        """Get the cached metadata for a template, if it is still valid.
+
+        Parameters
+        ----------
+        template_dir : `str`
+            Path of the template's directory.
+        source_paths : `list` of `str`
+            Paths of the files that the metadata is derived from.
+
+        Returns
+        -------
+        metadata : `dict` or `None`
+            The cached metadata, or `None` if there isn't a valid cache entry
+            for the template.
+        """
+        with self._lock:
+            entry = self.entries.get(template_dir)
+            if entry is None or set(entry["files"]) != set(source_paths):
+                self.misses += 1
+                return None
+
+            for path, signature in entry["files"].items():
+                if not self._is_signature_current(signature, path):
+                    self.misses += 1
+                    return None
+
+            self.hits += 1
+            return entry["metadata"]
+
+    def _is_signature_current(
+        self, signature: Dict[str, Any], path: str
+    ) -> bool:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        if stat.st_size != signature["size"]:
+            return False
+        if stat.st_mtime_ns == signature["mtime_ns"]:
+            return True
+
+        # Same size but a different mtime; compare content hashes
+        current = get_file_signature(path)
+        if current["sha256"] != signature["sha256"]:
+            return False
+        signature["mtime_ns"] = current["mtime_ns"]
+        self._dirty = True
+        return True
+
+    def set(
+        self,
+        template_dir: str,
+        source_paths: List[str],
+        metadata: Dict[str, Any],
+    ) -> None:
+        """Add or replace the cached metadata for a template.
+
+        Parameters
+        ----------
+        template_dir : `str`
+            Path of the template's directory.
+        source_paths : `list` of `str`
+            Paths of the files that the metadata is derived from.
+        metadata : `dict`
+            JSON-serializable metadata.
+        """
+        signatures = {path: get_file_signature(path) for path in source_paths}
+        with self._lock:
+            self.entries[template_dir] = {
+                "files": signatures,
+                "metadata": metadata,
+            }
+            self._dirty = True
+
+    def save(self) -> None:
+        """Write the cache to disk, if it changed since it was loaded."""
+        with self._lock:
+            if not self._dirty or self._entries is None:
+                return
+            data = {"version": self.format_version, "templates": self._entries}
+            write_cache_file(self.path, data)
+            self._dirty = False
+            self._log.debug("Saved metadata cache %s", self.path)
+
+    def clear(self) -> None:
+        """Delete all cache entries, including the cache file."""
+        with self._lock:
+            self._entries = {}
+            self._dirty = False
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Get statistics about the cache.
+
+        Returns
+        -------
+        stats : `dict`
+            A dictionary with these keys:
+
+            ``path``
+                Path of the cache file.
+            ``entries``
+                Number of cached templates.
+            ``stale_entries``
+                Number of cached templates that would not be used because
+                their source files changed or were removed.
+            ``size``
+                Size of the cache file, in bytes.
+            ``hits``, ``misses``
+                Number of cache hits and misses by this instance.
+        """
+        with self._lock:
+            stale_entries = 0
+            for entry in self.entries.values():
+                for path, signature in entry["files"].items():
+                    if not self._is_signature_current(signature, path):
+                        stale_entries += 1
+                        break
+            try:
+                size = os.path.getsize(self.path)
+            except OSError:
+                size = 0
+            return {
+                "path": self.path,
+                "entries": len(self.entries),
+                "stale_entries": stale_entries,
+                "size": size,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,372 @@
+"""A compiled validator for ``templatekit.yaml`` configurations.
+
+Cerberus interprets its schema each time it validates a document, and
+validating and then normalizing a document walks the schema twice. The
+`CompiledValidator` instead compiles a schema once into nested checker
+functions that validate and normalize a document in a single pass, with the
+same results as a Cerberus validator created with ``purge_unknown=True``.
+
+The compiled validator only decides whether a document is valid. It doesn't
+describe errors: for invalid documents, use Cerberus to get its error
+messages (`templatekit.repo.TemplateConfig` does this).
+
+A validator can also produce frozen documents, in which mappings are
+read-only `types.MappingProxyType` objects and lists are tuples (see
+`freeze`). Frozen values that are already normalized are reused rather
+than copied, so revalidating a frozen document that was changed in one
+place only allocates the changed parts.
+"""
+
+from __future__ import annotations
+
+__all__ = ("CompiledValidator", "SUPPORTED_RULES", "freeze", "thaw")
+
+from collections.abc import Mapping, Sequence
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+SUPPORTED_RULES = frozenset(
+    (
+        "type",
+        "required",
+        "default",
+        "minlength",
+        "maxlength",
+        "allowed",
+        "schema",
+        "keysrules",
+        "valuesrules",
+    )
+)
+"""The Cerberus rules that `CompiledValidator` supports."""
+
+_TYPE_CHECKS: Dict[str, Callable[[Any], bool]] = {
+    "string": lambda value: isinstance(value, str),
+    "boolean": lambda value: isinstance(value, bool),
+    "dict": lambda value: isinstance(value, Mapping),
+    "list": lambda value: (
+        isinstance(value, Sequence) and not isinstance(value, str)
+    ),
+}
+"""Checks of the supported Cerberus types, with Cerberus's semantics."""
+
+_Checker = Callable[[Any], Any]
+"""A compiled checker: a function that returns the normalized value, or
+raises `_Invalid`.
+"""
+
+
+class _Invalid(Exception):
+    """Raised by compiled checkers if a value is invalid."""
+
+
+class CompiledValidator(object):
+    """A validator compiled from a Cerberus schema.
+
+    Parameters
+    ----------
+    schema : `dict`
+        A Cerberus schema for mappings. Unknown fields are purged, as for a
+        Cerberus validator with ``purge_unknown=True``.
+    freeze : `bool`, optional
+        If `True`, normalized documents are frozen (see `freeze`), and
+        frozen values in documents are reused if they don't change.
+
+    Raises
+    ------
+    ValueError
+        Raised if the schema uses a rule or type that isn't supported (see
+        `SUPPORTED_RULES`).
+
+    Notes
+    -----
+    Values are normalized as Cerberus normalizes them: unknown fields are
+    removed, missing fields and `None` values are set to their defaults
+    (missing fields are added in schema order), and the normalized mappings
+    and lists are new objects of the same types as the originals (unless
+    ``freeze`` is `True`).
+    """
+
+    def __init__(self, schema: Mapping[str, Any], freeze: bool = False):
+        super().__init__()
+        self.freeze = freeze
+        self._check = _compile_mapping_schema(schema, freeze)
+
+    def normalized(self, document: Any) -> Optional[Mapping[str, Any]]:
+        """Validate and normalize a document.
+
+        Parameters
+        ----------
+        document : `dict`
+            The document, such as a parsed ``templatekit.yaml`` file. It isn't
+            modified.
+
+        Returns
+        -------
+        normalized : `dict`, `types.MappingProxyType`, or `None`
+            The normalized document, the same as Cerberus's
+            ``Validator.normalized`` method returns (but frozen, if the
+            validator freezes documents), or `None` if the document is
+            invalid.
+        """
+        try:
+            return self._check(document)
+        except _Invalid:
+            return None
+
+    def validate(self, document: Any) -> bool:
+        """Test if a document is valid.
+
+        Parameters
+        ----------
+        document : `dict`
+            The document.
+
+        Returns
+        -------
+        valid : `bool`
+            `True` if the document is valid.
+        """
+        return self.normalized(document) is not None
+
+
+def _compile_rules(rules: Mapping[str, Any], frozen: bool) -> _Checker:
+    """Compile the rules of a field into a checker."""
+    unsupported = set(rules) - SUPPORTED_RULES
+    if unsupported:
+        raise ValueError(
+            "Unsupported schema rules: {0}".format(
+                ", ".join(sorted(unsupported))
+            )
+        )
+    type_name = rules.get("type")
+    if type_name not in _TYPE_CHECKS:
+        raise ValueError("Unsupported schema type: {0!r}".format(type_name))
+    type_check = _TYPE_CHECKS[type_name]
+    has_default = "default" in rules
+    default = rules.get("default")
+    minlength: Optional[int] = rules.get("minlength")
+    maxlength: Optional[int] = rules.get("maxlength")
+    if (minlength is not None or maxlength is not None) and type_name not in (
+        "string",
+        "list",
+        "dict",
+    ):
+        raise ValueError("Length rules need a string, list, or dict type")
+    allowed: Optional[Tuple[Any, ...]] = None
+    if "allowed" in rules:
+        if type_name != "string":
+            raise ValueError("The allowed rule needs the string type")
+        allowed = tuple(rules["allowed"])
+
+    normalize_container: Optional[_Checker] = None
+    if "schema" in rules:
+        if type_name == "dict":
+            normalize_container = _compile_mapping_schema(
+                rules["schema"], frozen
+            )
+        elif type_name == "list":
+            normalize_container = _compile_sequence_schema(
+                rules["schema"], frozen
+            )
+        else:
+            raise ValueError("The schema rule needs the dict or list type")
+    elif "keysrules" in rules or "valuesrules" in rules:
+        if type_name != "dict":
+            raise ValueError("keysrules and valuesrules need the dict type")
+        normalize_container = _compile_mapping_rules(
+            rules.get("keysrules"), rules.get("valuesrules"), frozen
+        )
+    elif frozen and type_name in ("dict", "list"):
+        # Containers without a schema are frozen as they are
+        normalize_container = freeze
+
+    def check(value: Any) -> Any:
+        if value is None:
+            # Fields aren't nullable, but None is replaced by a default
+            if not has_default:
+                raise _Invalid()
+            value = default
+        if not type_check(value):
+            raise _Invalid()
+        if normalize_container is not None:
+            value = normalize_container(value)
+        if minlength is not None and len(value) < minlength:
+            raise _Invalid()
+        if maxlength is not None and len(value) > maxlength:
+            raise _Invalid()
+        if allowed is not None and value not in allowed:
+            raise _Invalid()
+        return value
+
+    return check
+
+
+def _compile_mapping_schema(
+    schema: Mapping[str, Any], frozen: bool
+) -> _Checker:
+    """Compile the schema of a mapping into a checker that validates the
+    mapping and returns a normalized copy.
+    """
+    if not isinstance(schema, Mapping):
+        raise ValueError("Unsupported schema: {0!r}".format(schema))
+    fields: Dict[str, _Checker] = {}
+    defaults: List[Tuple[str, Any]] = []
+    required: List[str] = []
+    for name, rules in schema.items():
+        if not isinstance(rules, Mapping):
+            raise ValueError("Unsupported rules for {0!r}".format(name))
+        fields[name] = _compile_rules(rules, frozen)
+        if "default" in rules:
+            defaults.append((name, rules["default"]))
+        if rules.get("required", False):
+            required.append(name)
+
+    def check(value: Any) -> Any:
+        if not isinstance(value, Mapping):
+            raise _Invalid()
+        result = {}
+        # A frozen mapping is reused if none of its values change
+        changed = not (frozen and type(value) is MappingProxyType)
+        for key, item in value.items():
+            field_check = fields.get(key)
+            if field_check is None:
+                # Unknown fields are purged
+                changed = True
+                continue
+            normalized_item = field_check(item)
+            if normalized_item is not item:
+                changed = True
+            result[key] = normalized_item
+        for name, default in defaults:
+            if name not in result:
+                result[name] = fields[name](default)
+                changed = True
+        for name in required:
+            if name not in result:
+                raise _Invalid()
+        if not changed:
+            return value
+        if frozen:
+            return MappingProxyType(result)
+        value_type: Any = type(value)
+        if value_type is dict:
+            return result
+        return value_type(result)
+
+    return check
+
+
+def _compile_sequence_schema(
+    item_rules: Mapping[str, Any], frozen: bool
+) -> _Checker:
+    """Compile the schema of list items into a checker that validates the
+    list and returns a normalized copy.
+    """
+    item_check = _compile_rules(item_rules, frozen)
+
+    def check(value: Any) -> Any:
+        items = [item_check(item) for item in value]
+        if not frozen:
+            return type(value)(items)
+        if type(value) is tuple and _all_same(items, value):
+            return value
+        return tuple(items)
+
+    return check
+
+
+def _compile_mapping_rules(
+    keysrules: Optional[Mapping[str, Any]],
+    valuesrules: Optional[Mapping[str, Any]],
+    frozen: bool,
+) -> _Checker:
+    """Compile the ``keysrules`` and ``valuesrules`` of a mapping into a
+    checker.
+
+    As with Cerberus, a mapping with ``valuesrules`` is copied with
+    normalized values, and a mapping with only ``keysrules`` is returned
+    as is (or frozen, if ``frozen`` is `True`).
+    """
+    key_check = (
+        _compile_rules(keysrules, frozen) if keysrules is not None else None
+    )
+    value_check = (
+        _compile_rules(valuesrules, frozen)
+        if valuesrules is not None
+        else None
+    )
+
+    def check(value: Any) -> Any:
+        if key_check is not None:
+            for key in value:
+                key_check(key)
+        if value_check is None:
+            return freeze(value) if frozen else value
+        items = {key: value_check(item) for key, item in value.items()}
+        if not frozen:
+            return type(value)(items)
+        if type(value) is MappingProxyType and _all_same(
+            items.values(), value.values()
+        ):
+            return value
+        return MappingProxyType(items)
+
+    return check
+
+
+def _all_same(items: Iterable[Any], original_items: Iterable[Any]) -> bool:
+    """Test if the items of two iterables are the same objects."""
+    return all(a is b for a, b in zip(items, original_items))
+
+
+def freeze(value: Any) -> Any:
+    """Make a read-only version of a value, such as a configuration.
+
+    Parameters
+    ----------
+    value
+        The value. Mappings and lists can be nested.
+
+    Returns
+    -------
+    frozen
+        The frozen value: mappings are converted to `types.MappingProxyType`
+        objects over new dictionaries, and lists to tuples. Frozen mappings
+        and tuples whose items are already frozen are returned as they are,
+        so subtrees are shared rather than copied.
+    """
+    if isinstance(value, Mapping):
+        items = {key: freeze(item) for key, item in value.items()}
+        if type(value) is MappingProxyType and _all_same(
+            items.values(), value.values()
+        ):
+            return value
+        return MappingProxyType(items)
+    if isinstance(value, (list, tuple)):
+        frozen_items = tuple(freeze(item) for item in value)
+        if type(value) is tuple and _all_same(frozen_items, value):
+            return value
+        return frozen_items
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Make a mutable, JSON-serializable copy of a frozen value.
+
+    Parameters
+    ----------
+    value
+        The value, such as one made by `freeze`.
+
+    Returns
+    -------
+    thawed
+        A copy of the value, with mappings converted to dictionaries and
+        tuples to lists.
+    """
+    if isinstance(value, Mapping):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(item) for item in value]
+    return value
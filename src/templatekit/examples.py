@@ -0,0 +1,592 @@
+"""Native, parallel builder for template examples.
+
+Each template in a template repository has one or more examples that are
+generated from the template and committed to the repository, so that
+template changes can be reviewed. This module generates those examples
+in-process, as an alternative to running the repository's ``scons`` build.
+
+The examples of a template are set by the ``examples`` field of its
+``templatekit.yaml`` file. If that field isn't set, a file template has one
+example that is rendered from its template source file next to the source
+(``template.txt.jinja`` is rendered to ``example.txt``, and otherwise the
+``.jinja`` extension is removed), and a project template has one example
+that is generated in the template's directory. Examples are rendered with
+the defaults from the template's ``cookiecutter.json`` file, overridden by
+the example's ``context``.
+
+In incremental mode, an `ExampleManifest` records a hash of each example's
+inputs and outputs, so that examples whose inputs and outputs are unchanged
+aren't rebuilt.
+"""
+
+from __future__ import annotations
+
+__all__ = (
+    "Example",
+    "ExampleBuildResult",
+    "get_examples",
+    "get_examples_or_error",
+    "build_example",
+    "build_examples",
+    "build_repo_examples",
+    "ExampleManifest",
+    "hash_example_inputs",
+)
+
+import filecmp
+import functools
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from . import __version__
+from .cache import DEFAULT_CACHE_DIRNAME, write_cache_file
+from .configvalidator import thaw
+from .filerender import render_and_write_file_template
+from .instrumentation import span
+from .projectrender import copy_file, render_project_template
+from .repo import BaseTemplate, FileTemplate, ProjectTemplate, Repo
+
+
+class Example(NamedTuple):
+    """An example generated from a template."""
+
+    template_name: str
+    """Name of the template."""
+
+    template_type: str
+    """Type of template: ``"file"`` or ``"project"``."""
+
+    template_path: str
+    """Path of the template's directory."""
+
+    source_path: Optional[str]
+    """Path of the template source file, for file templates."""
+
+    output_path: str
+    """Path of the rendered file, for file templates, or the directory that
+    the project is generated in, for project templates.
+    """
+
+    context: Optional[Dict[str, Any]]
+    """The ``cookiecutter.json`` values to override, if any."""
+
+
+class ExampleBuildResult(NamedTuple):
+    """The result of building an example."""
+
+    example: Example
+    """The example that was built."""
+
+    duration: float
+    """Time taken to build the example, in seconds."""
+
+    error: Optional[str]
+    """Description of the error that prevented the example from building, or
+    `None` if the example was built.
+    """
+
+    skipped: bool = False
+    """`True` if the example wasn't rebuilt because its inputs and outputs
+    were unchanged (in incremental mode).
+    """
+
+    output_hashes: Optional[Dict[str, str]] = None
+    """SHA-256 hashes of the example's output files, keyed by path, if they
+    were computed (in incremental mode).
+    """
+
+    changed: Optional[bool] = None
+    """`True` if any of the example's output files were written, `False` if
+    the outputs were already up to date, or `None` if it isn't known (project
+    templates outside of incremental mode).
+    """
+
+    @property
+    def ok(self) -> bool:
+        """`True` if the example was built successfully (`bool`)."""
+        return self.error is None
+
+
+def get_examples(template: BaseTemplate) -> List[Example]:
+    """Get the examples of a template.
+
+    Parameters
+    ----------
+    template : `templatekit.repo.BaseTemplate`
+        The file or project template.
+
+    Returns
+    -------
+    examples : `list` of `Example`
+        The template's examples.
+
+    Raises
+    ------
+    TypeError
+        Raised if the template isn't a file or project template.
+    """
+    if isinstance(template, FileTemplate):
+        template_type = "file"
+        source_path: Optional[str] = template.source_path
+    elif isinstance(template, ProjectTemplate):
+        template_type = "project"
+        source_path = None
+    else:
+        raise TypeError(
+            "Can't get examples for {0!r}, which is neither a file nor a "
+            "project template".format(template)
+        )
+
+    if "examples" in template.config:
+        example_configs = template.config["examples"]
+    elif source_path is not None:
+        output = _get_default_example_name(os.path.basename(source_path))
+        example_configs = [{"output": output}]
+    else:
+        example_configs = [{"output": "."}]
+
+    return [
+        Example(
+            template_name=template.name,
+            template_type=template_type,
+            template_path=template.path,
+            source_path=source_path,
+            output_path=os.path.normpath(
+                os.path.join(template.path, example_config["output"])
+            ),
+            context=thaw(example_config.get("context")),
+        )
+        for example_config in example_configs
+    ]
+
+
+def get_examples_or_error(
+    template: BaseTemplate,
+) -> Tuple[List[Example], Optional[str]]:
+    """Get the examples of a template, or an error message if they can't be
+    determined.
+
+    Parameters
+    ----------
+    template : `templatekit.repo.BaseTemplate`
+        The file or project template.
+
+    Returns
+    -------
+    examples : `list` of `Example`
+        The template's examples. If the examples can't be determined (for
+        example, because of a configuration error), this is a single
+        placeholder example with the template's directory as the
+        ``output_path``, so that the error can be reported for it.
+    error : `str` or `None`
+        The error message, or `None` if the examples were determined.
+
+    See also
+    --------
+    get_examples
+    """
+    try:
+        return get_examples(template), None
+    except (RuntimeError, TypeError, ValueError) as err:
+        example = Example(
+            template_name=template.name,
+            template_type=(
+                "file" if isinstance(template, FileTemplate) else "project"
+            ),
+            template_path=template.path,
+            source_path=None,
+            output_path=template.path,
+            context=None,
+        )
+        return [example], "{0}: {1!s}".format(err.__class__.__name__, err)
+
+
+def _get_default_example_name(source_filename: str) -> str:
+    """Get the default example file name for a file template's source."""
+    name = os.path.splitext(source_filename)[0]
+    if name.startswith("template."):
+        name = "example." + name[len("template.") :]
+    return name
+
+
+def build_example(
+    example: Example, incremental: bool = False
+) -> ExampleBuildResult:
+    """Build an example, in the current process.
+
+    Parameters
+    ----------
+    example : `Example`
+        The example to build.
+    incremental : `bool`, optional
+        If `True`, a project template's example is generated in a temporary
+        directory, and only output files whose content differs are written.
+        The hashes of the output files are included in the result.
+
+    Returns
+    -------
+    result : `ExampleBuildResult`
+        The result of the build. Errors are reported in the result, rather
+        than raised.
+    """
+    logger = logging.getLogger(__name__)
+    logger.debug("Building example %s", example.output_path)
+    start = time.perf_counter()
+    error = None
+    output_hashes = None
+    changed = None
+    try:
+        if example.template_type == "file":
+            changed = _build_file_example(example)
+            if incremental:
+                output_hashes = {
+                    example.output_path: _hash_file(example.output_path)
+                }
+        elif incremental:
+            changed, output_hashes = _build_project_example_incremental(
+                example
+            )
+        else:
+            _build_project_example(example)
+    except Exception as err:
+        # Any error from Cookiecutter or Jinja means the example failed; it's
+        # reported in the result so that other examples can still be built.
+        error = "{0}: {1!s}".format(err.__class__.__name__, err)
+    return ExampleBuildResult(
+        example=example,
+        duration=time.perf_counter() - start,
+        error=error,
+        output_hashes=output_hashes,
+        changed=changed,
+    )
+
+
+def _build_file_example(example: Example) -> bool:
+    assert example.source_path is not None
+    return render_and_write_file_template(
+        example.source_path,
+        example.output_path,
+        extra_context=example.context,
+        skip_unchanged=True,
+    )
+
+
+def _build_project_example(example: Example) -> None:
+    with span("cookiecutter.generate", template=example.template_name):
+        render_project_template(
+            example.template_path,
+            output_dir=example.output_path,
+            use_defaults=True,
+            extra_context=example.context,
+            overwrite_if_exists=True,
+        )
+
+
+def _build_project_example_incremental(
+    example: Example,
+) -> Tuple[bool, Dict[str, str]]:
+    """Generate a project example in a staging directory, and then copy only
+    new or changed files into the example's output directory.
+
+    Returns whether any output file changed, and the SHA-256 hashes of the
+    output files, keyed by path.
+    """
+    changed = False
+    output_hashes: Dict[str, str] = {}
+    with tempfile.TemporaryDirectory() as staging_dir:
+        with span("cookiecutter.generate", template=example.template_name):
+            render_project_template(
+                example.template_path,
+                output_dir=staging_dir,
+                use_defaults=True,
+                extra_context=example.context,
+                overwrite_if_exists=True,
+            )
+        for dirpath, dirnames, filenames in os.walk(staging_dir):
+            relpath = os.path.relpath(dirpath, staging_dir)
+            output_dir = os.path.normpath(
+                os.path.join(example.output_path, relpath)
+            )
+            os.makedirs(output_dir, exist_ok=True)
+            for filename in filenames:
+                staged_path = os.path.join(dirpath, filename)
+                output_path = os.path.join(output_dir, filename)
+                if not os.path.isfile(output_path) or not filecmp.cmp(
+                    staged_path, output_path, shallow=False
+                ):
+                    copy_file(staged_path, output_path)
+                    changed = True
+                shutil.copymode(staged_path, output_path)
+                output_hashes[output_path] = _hash_file(output_path)
+    return changed, output_hashes
+
+
+def build_examples(
+    examples: Iterable[Example],
+    workers: Optional[int] = None,
+    manifest: Optional[ExampleManifest] = None,
+) -> List[ExampleBuildResult]:
+    """Build examples in parallel, on a pool of processes.
+
+    Parameters
+    ----------
+    examples : iterable of `Example`
+        The examples to build.
+    workers : `int`, optional
+        Number of worker processes. The default is the number of CPUs. If
+        ``1``, the examples are built in the current process.
+    manifest : `ExampleManifest`, optional
+        If set, examples are built incrementally: examples whose inputs and
+        outputs match the manifest are skipped, and the manifest is updated
+        (but not saved) with the examples that are built.
+
+    Returns
+    -------
+    results : `list` of `ExampleBuildResult`
+        The results, in the same order as ``examples``.
+    """
+    examples = list(examples)
+    results: List[Optional[ExampleBuildResult]] = [None] * len(examples)
+    input_hashes: Dict[int, str] = {}
+    pending: List[int] = []
+    for i, example in enumerate(examples):
+        if manifest is not None:
+            input_hashes[i] = hash_example_inputs(example)
+            if manifest.is_current(example, input_hashes[i]):
+                results[i] = ExampleBuildResult(
+                    example=example, duration=0.0, error=None, skipped=True
+                )
+                continue
+        pending.append(i)
+
+    build = functools.partial(build_example, incremental=manifest is not None)
+    pending_examples = [examples[i] for i in pending]
+    if workers == 1 or len(pending_examples) <= 1:
+        built = [build(example) for example in pending_examples]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            built = list(executor.map(build, pending_examples))
+
+    for i, result in zip(pending, built):
+        results[i] = result
+        if manifest is not None:
+            if result.ok and result.output_hashes is not None:
+                manifest.set(
+                    result.example, input_hashes[i], result.output_hashes
+                )
+            else:
+                manifest.discard(result.example)
+
+    return [result for result in results if result is not None]
+
+
+def build_repo_examples(
+    repo: Repo,
+    templates: Optional[Iterable[BaseTemplate]] = None,
+    workers: Optional[int] = None,
+    incremental: bool = False,
+) -> List[ExampleBuildResult]:
+    """Build the examples of the templates in a template repository, in
+    parallel.
+
+    Parameters
+    ----------
+    repo : `templatekit.repo.Repo`
+        The template repository.
+    templates : iterable of `templatekit.repo.BaseTemplate`, optional
+        The templates to build examples for. The default is all templates in
+        the repository.
+    workers : `int`, optional
+        Number of worker processes. The default is the number of CPUs. If
+        ``1``, the examples are built in the current process.
+    incremental : `bool`, optional
+        If `True`, skip examples whose inputs and outputs are unchanged since
+        they were last built, according to the repository's example
+        manifest (see `ExampleManifest`). The manifest is saved after the
+        build.
+
+    Returns
+    -------
+    results : `list` of `ExampleBuildResult`
+        The results, in the order of templates in the repository. If a
+        template's examples couldn't be determined (for example, because of a
+        configuration error), the template has a single failed result with
+        the template's directory as the ``output_path``.
+    """
+    if templates is None:
+        templates = repo.iter_templates()
+
+    # Results is filled with either the examples to build (as placeholders)
+    # or failures to determine a template's examples.
+    results: List[Optional[ExampleBuildResult]] = []
+    examples: List[Example] = []
+    for template in templates:
+        template_examples, error = get_examples_or_error(template)
+        if error is not None:
+            results.append(
+                ExampleBuildResult(template_examples[0], 0.0, error)
+            )
+            continue
+        examples.extend(template_examples)
+        results.extend(None for _ in template_examples)
+
+    manifest = None
+    if incremental:
+        manifest = ExampleManifest.for_repo_root(repo.root)
+    built = iter(build_examples(examples, workers=workers, manifest=manifest))
+    if manifest is not None:
+        manifest.save()
+    return [
+        result if result is not None else next(built) for result in results
+    ]
+
+
+def _hash_file(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def hash_example_inputs(example: Example) -> str:
+    """Compute a hash of the inputs of an example.
+
+    Parameters
+    ----------
+    example : `Example`
+        The example.
+
+    Returns
+    -------
+    hash : `str`
+        SHA-256 hex digest of the example's inputs: the example's context,
+        the template's ``cookiecutter.json`` file, and either the template
+        source file (file templates) or every file in the template's
+        ``{{ cookiecutter.* }}`` and ``hooks`` directories (project
+        templates).
+    """
+    digest = hashlib.sha256()
+    digest.update(__version__.encode())
+    digest.update(json.dumps(example.context, sort_keys=True).encode())
+
+    input_paths = [os.path.join(example.template_path, "cookiecutter.json")]
+    if example.source_path is not None:
+        input_paths.append(example.source_path)
+    else:
+        for name in sorted(os.listdir(example.template_path)):
+            is_project_dir = (
+                "cookiecutter" in name and "{{" in name and "}}" in name
+            )
+            if not is_project_dir and name != "hooks":
+                continue
+            for dirpath, dirnames, filenames in os.walk(
+                os.path.join(example.template_path, name)
+            ):
+                dirnames.sort()
+                input_paths.extend(
+                    os.path.join(dirpath, filename)
+                    for filename in sorted(filenames)
+                )
+
+    for path in input_paths:
+        digest.update(
+            os.path.relpath(path, example.template_path).encode() + b"\0"
+        )
+        with open(path, "rb") as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+
+class ExampleManifest(object):
+    """Manifest of the input and output hashes of built examples, used for
+    incremental example builds.
+
+    Parameters
+    ----------
+    path : `str`
+        Path of the manifest file.
+
+    Notes
+    -----
+    An example is current if the hash of its inputs (see
+    `hash_example_inputs`) matches the manifest, and each of its output files
+    still exists with the hash recorded in the manifest.
+    """
+
+    format_version = 1
+    """Version of the manifest file format. Manifest files with a different
+    version are ignored.
+    """
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == self.format_version:
+            self._entries = data["examples"]
+
+    @classmethod
+    def for_repo_root(cls, root: str) -> ExampleManifest:
+        """Get the example manifest of a template repository, which is
+        located in its ``.templatekit-cache`` directory.
+        """
+        return cls(os.path.join(root, DEFAULT_CACHE_DIRNAME, "examples.json"))
+
+    def is_current(self, example: Example, input_hash: str) -> bool:
+        """Test if an example is current with respect to the manifest.
+
+        Parameters
+        ----------
+        example : `Example`
+            The example.
+        input_hash : `str`
+            The current hash of the example's inputs.
+
+        Returns
+        -------
+        current : `bool`
+            `True` if the example doesn't need to be rebuilt.
+        """
+        entry = self._entries.get(example.output_path)
+        if entry is None or entry["inputs"] != input_hash:
+            return False
+        for path, output_hash in entry["outputs"].items():
+            try:
+                if _hash_file(path) != output_hash:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def set(
+        self,
+        example: Example,
+        input_hash: str,
+        output_hashes: Dict[str, str],
+    ) -> None:
+        """Record the input and output hashes of a built example."""
+        self._entries[example.output_path] = {
+            "inputs": input_hash,
+            "outputs": output_hashes,
+        }
+
+    def discard(self, example: Example) -> None:
+        """Remove an example from the manifest, so it is rebuilt."""
+        self._entries.pop(example.output_path, None)
+
+    def save(self) -> None:
+        """Write the manifest file."""
+        write_cache_file(
+            self.path,
+            {"version": self.format_version, "examples": self._entries},
+        )
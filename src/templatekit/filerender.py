@@ -1,20 +1,48 @@
 """Rendering file templates with Cookiecutter.
 """
 
-__all__ = ("render_file_template", "render_and_write_file_template")
+__all__ = (
+    "render_file_template",
+    "render_and_write_file_template",
+    "stream_file_template",
+    "stream_and_write_file_template",
+    "render_file_template_batch",
+    "iter_render_file_template_batch",
+    "render_and_write_file_template_batch",
+    "FileTemplateRenderer",
+)
 
+import filecmp
 import io
 import logging
 import os
 import shutil
-from typing import Any, Dict, Optional
+import stat
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import (
+    IO,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
 from cookiecutter.environment import StrictEnvironment
 from cookiecutter.generate import generate_context
 from cookiecutter.prompt import prompt_for_config
-from jinja2 import FileSystemLoader
+from jinja2 import BytecodeCache, FileSystemLoader, Template
 from jinja2.exceptions import TemplateSyntaxError
 
+from .fileutils import get_file_mode
+from .instrumentation import span
+
 
 def render_file_template(
     template_path: str,
@@ -50,9 +78,12 @@ def render_file_template(
 
     # Get variables for rendering the template
     template_dir = os.path.dirname(template_path)
+    template_name = os.path.basename(template_dir)
     context_file = os.path.join(template_dir, "cookiecutter.json")
-    context = generate_context(context_file=context_file)
-    context["cookiecutter"] = prompt_for_config(context, use_defaults)
+    with span("render.context", template=template_name):
+        context = generate_context(context_file=context_file)
+    with span("render.defaults", template=template_name):
+        context["cookiecutter"] = prompt_for_config(context, use_defaults)
 
     if extra_context is not None:
         context["cookiecutter"].update(extra_context)
@@ -65,13 +96,15 @@ def render_file_template(
     env.loader = FileSystemLoader(template_dir)
 
     try:
-        tmpl = env.get_template(os.path.basename(template_path))
+        with span("jinja.compile", template=template_name):
+            tmpl = env.get_template(os.path.basename(template_path))
     except TemplateSyntaxError as exception:
         # Disable translated so that printed exception contains verbose
         # information about syntax error location
         exception.translated = False
         raise
-    rendered_text = tmpl.render(**context)
+    with span("jinja.render", template=template_name):
+        rendered_text = tmpl.render(**context)
 
     return rendered_text
 
@@ -80,7 +113,8 @@ def render_and_write_file_template(
     template_path: str,
     output_path: str,
     extra_context: Optional[Dict[str, Any]] = None,
-) -> None:
+    skip_unchanged: bool = False,
+) -> bool:
     """Render a single-file template and write it to the filesystem.
 
     Parameters
@@ -92,16 +126,64 @@ def render_and_write_file_template(
     extra_context : `dict`, optional
         Optional dictionary of key-value pairs that override defaults in the
         ``cookiecutter.json`` file.
+    skip_unchanged : `bool`, optional
+        If `True`, and the output file already exists with the rendered
+        content, the file isn't written so that its modification time is
+        preserved. The file's permissions are still updated if they differ
+        from the template's.
+
+    Returns
+    -------
+    changed : `bool`
+        `True` if the output file was written (or its permissions changed),
+        or `False` if it was already up to date.
 
     See also
     --------
     render_file_template
     """
-    logger = logging.getLogger(__name__)
-
     rendered_text = render_file_template(
         template_path, use_defaults=True, extra_context=extra_context
     )
+    return _write_rendered_file(
+        template_path, output_path, rendered_text, skip_unchanged
+    )
+
+
+def _write_rendered_file(
+    template_path: str,
+    output_path: str,
+    rendered_text: str,
+    skip_unchanged: bool,
+) -> bool:
+    """Write a rendered file with the template's permissions, returning
+    `True` if the file changed.
+    """
+    template_dir = os.path.dirname(os.path.abspath(template_path))
+    with span(
+        "file.write", template=os.path.basename(template_dir)
+    ) as attributes:
+        changed = _write_rendered_file_content(
+            template_path, output_path, rendered_text, skip_unchanged
+        )
+        attributes["changed"] = changed
+    return changed
+
+
+def _write_rendered_file_content(
+    template_path: str,
+    output_path: str,
+    rendered_text: str,
+    skip_unchanged: bool,
+) -> bool:
+    logger = logging.getLogger(__name__)
+
+    if skip_unchanged and _has_content(output_path, rendered_text):
+        if _copymode_if_changed(template_path, output_path):
+            logger.debug("Updated permissions of {}".format(output_path))
+            return True
+        logger.debug("Rendered file {} is unchanged".format(output_path))
+        return False
 
     logger.debug("Writing rendered file to {}".format(output_path))
     with io.open(output_path, "w", encoding="utf-8") as fh:
@@ -109,3 +191,580 @@ def render_and_write_file_template(
 
     # Apply file permissions to output file
     shutil.copymode(template_path, output_path)
+    return True
+
+
+def _has_content(path: str, text: str) -> bool:
+    """Test if a file exists with the content it would have if ``text`` was
+    written to it in text mode.
+
+    File sizes are compared before reading the existing file.
+    """
+    data = text.encode("utf-8")
+    if os.linesep != "\n":
+        data = data.replace(b"\n", os.linesep.encode())
+    try:
+        if os.stat(path).st_size != len(data):
+            return False
+        with open(path, "rb") as fh:
+            return fh.read() == data
+    except FileNotFoundError:
+        return False
+
+
+def _copymode_if_changed(source_path: str, path: str) -> bool:
+    """Copy the permission bits of a file, if they differ, returning `True`
+    if they were changed.
+    """
+    mode = stat.S_IMODE(os.stat(source_path).st_mode)
+    if stat.S_IMODE(os.stat(path).st_mode) == mode:
+        return False
+    os.chmod(path, mode)
+    return True
+
+
+def _get_template_name(template_path: str) -> str:
+    """Get the name of a file template from the path of its source file."""
+    return os.path.basename(os.path.dirname(os.path.abspath(template_path)))
+
+
+class _DirectoryState(NamedTuple):
+    """A Jinja environment and the ``cookiecutter.json`` context for a
+    template directory.
+    """
+
+    environment: StrictEnvironment
+    """The Jinja environment, with extensions from ``cookiecutter.json``."""
+
+    context: Dict[str, Any]
+    """The context generated from ``cookiecutter.json``."""
+
+    context_mtime: int
+    """Modification time (ns) of ``cookiecutter.json`` when it was read."""
+
+
+class FileTemplateRenderer(object):
+    """Renderer for file templates that reuses Jinja environments and
+    compiled templates across renders.
+
+    Parameters
+    ----------
+    cache_size : `int`, optional
+        Maximum number of compiled templates to keep. The least recently
+        used templates are dropped first.
+    bytecode_cache : `jinja2.BytecodeCache`, optional
+        A Jinja bytecode cache, such as `jinja2.FileSystemBytecodeCache`, so
+        that compiled template code is reused across processes.
+    enable_async : `bool`, optional
+        If `True`, templates are compiled for Jinja's async rendering mode
+        (``Template.render_async``). `render` can't be used in that mode; use
+        `templatekit.aio.AsyncFileTemplateRenderer` instead.
+
+    Notes
+    -----
+    The renderer keeps one Jinja environment per template directory, created
+    from the directory's ``cookiecutter.json`` file, and a cache of compiled
+    templates. An environment is recreated if its ``cookiecutter.json`` file
+    is modified, and a compiled template is recompiled if its source file is
+    modified.
+
+    A renderer can be shared by threads.
+
+    Use `render_file_template` for one-off renders.
+    """
+
+    def __init__(
+        self,
+        cache_size: int = 128,
+        bytecode_cache: Optional[BytecodeCache] = None,
+        enable_async: bool = False,
+    ):
+        super().__init__()
+        self._log = logging.getLogger(__name__)
+        self.cache_size = cache_size
+        self.bytecode_cache = bytecode_cache
+        self.enable_async = enable_async
+        self._directories: Dict[str, _DirectoryState] = {}
+        self._templates: OrderedDict[
+            str, Tuple[Template, int, int]
+        ] = OrderedDict()
+        self._lock = threading.RLock()
+
+    def render(
+        self,
+        template_path: str,
+        use_defaults: bool = False,
+        extra_context: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """Render a single-file template.
+
+        Parameters
+        ----------
+        template_path : `str`
+            Path to the file template. There should be a
+            ``cookecutter.json`` in the same directory as the template file.
+        use_defaults : `bool`, optional
+            Disables interactive prompting for context variables, if `True`.
+        extra_context : `dict`, optional
+            Optional dictionary of key-value pairs that override defaults in
+            the ``cookiecutter.json`` file.
+
+        Returns
+        -------
+        rendered_text : `str`
+            Content rendered from the template and ``cookiecutter.json``
+            defaults.
+
+        See also
+        --------
+        render_file_template
+        """
+        self._log.debug("Rendering file template %s", template_path)
+        tmpl, context = self._get_render_context(
+            template_path, use_defaults, extra_context
+        )
+        with span("jinja.render", template=_get_template_name(template_path)):
+            return tmpl.render(**context)
+
+    def generate(
+        self,
+        template_path: str,
+        use_defaults: bool = False,
+        extra_context: Optional[Dict[str, Any]] = None,
+    ) -> Iterator[str]:
+        """Render a single-file template in chunks, without holding the
+        whole rendered content in memory.
+
+        Parameters
+        ----------
+        template_path : `str`
+            Path to the file template.
+        use_defaults : `bool`, optional
+            Disables interactive prompting for context variables, if `True`.
+        extra_context : `dict`, optional
+            Optional dictionary of key-value pairs that override defaults in
+            the ``cookiecutter.json`` file.
+
+        Returns
+        -------
+        chunks : iterator of `str`
+            Chunks of the rendered content, rendered as they are iterated
+            over (see `jinja2.Template.generate`). Any prompting happens
+            before this method returns.
+
+        See also
+        --------
+        stream_file_template
+        """
+        self._log.debug("Streaming file template %s", template_path)
+        tmpl, context = self._get_render_context(
+            template_path, use_defaults, extra_context
+        )
+        return tmpl.generate(**context)
+
+    def _get_render_context(
+        self,
+        template_path: str,
+        use_defaults: bool,
+        extra_context: Optional[Dict[str, Any]],
+    ) -> Tuple[Template, Dict[str, Any]]:
+        """Get the compiled template and the context to render it with."""
+        tmpl, context = self.get_template(template_path)
+        with span(
+            "render.defaults", template=_get_template_name(template_path)
+        ):
+            context = {
+                "cookiecutter": prompt_for_config(context, use_defaults)
+            }
+        if extra_context is not None:
+            context["cookiecutter"].update(extra_context)
+        return tmpl, context
+
+    def get_template(
+        self, template_path: str
+    ) -> Tuple[Template, Dict[str, Any]]:
+        """Get the compiled template and the ``cookiecutter.json`` context
+        for a file template.
+
+        Parameters
+        ----------
+        template_path : `str`
+            Path to the file template.
+
+        Returns
+        -------
+        template : `jinja2.Template`
+            The compiled template.
+        context : `dict`
+            The context generated from the ``cookiecutter.json`` file in the
+            template's directory, before prompting or applying defaults.
+            Don't modify this context.
+        """
+        template_path = os.path.abspath(template_path)
+        template_dir = os.path.dirname(template_path)
+        source_mtime = os.stat(template_path).st_mtime_ns
+
+        with self._lock:
+            directory = self._get_directory_state(template_dir)
+            cached = self._templates.get(template_path)
+            if (
+                cached is not None
+                and cached[1] == source_mtime
+                and cached[2] == directory.context_mtime
+            ):
+                self._templates.move_to_end(template_path)
+                return cached[0], directory.context
+
+            self._log.debug("Compiling file template %s", template_path)
+            try:
+                with span(
+                    "jinja.compile", template=os.path.basename(template_dir)
+                ):
+                    tmpl = directory.environment.get_template(
+                        os.path.basename(template_path)
+                    )
+            except TemplateSyntaxError as exception:
+                # Disable translated so that printed exception contains
+                # verbose information about syntax error location
+                exception.translated = False
+                raise
+
+            self._templates[template_path] = (
+                tmpl,
+                source_mtime,
+                directory.context_mtime,
+            )
+            self._templates.move_to_end(template_path)
+            while len(self._templates) > self.cache_size:
+                self._templates.popitem(last=False)
+            return tmpl, directory.context
+
+    def _get_directory_state(self, template_dir: str) -> _DirectoryState:
+        context_file = os.path.join(template_dir, "cookiecutter.json")
+        context_mtime = os.stat(context_file).st_mtime_ns
+        directory = self._directories.get(template_dir)
+        if directory is not None and directory.context_mtime == context_mtime:
+            return directory
+
+        with span("render.context", template=os.path.basename(template_dir)):
+            context = generate_context(context_file=context_file)
+        # Jinja2 template rendering environment. Compiled templates are
+        # cached by the renderer, rather than the environment.
+        env = StrictEnvironment(
+            context=context,
+            keep_trailing_newline=True,
+            cache_size=0,
+            bytecode_cache=self.bytecode_cache,
+            enable_async=self.enable_async,
+        )
+        env.loader = FileSystemLoader(template_dir)
+        directory = _DirectoryState(
+            environment=env, context=context, context_mtime=context_mtime
+        )
+        self._directories[template_dir] = directory
+        return directory
+
+    def clear(self) -> None:
+        """Drop all cached environments and compiled templates."""
+        with self._lock:
+            self._directories.clear()
+            self._templates.clear()
+
+    def invalidate(self, template_dir: str) -> None:
+        """Drop the cached environment and compiled templates of a template
+        directory.
+
+        Parameters
+        ----------
+        template_dir : `str`
+            Path of the template's directory.
+
+        See also
+        --------
+        templatekit.watch.RepoWatcher
+        """
+        template_dir = os.path.abspath(template_dir)
+        with self._lock:
+            self._directories.pop(template_dir, None)
+            for template_path in list(self._templates):
+                if os.path.dirname(template_path) == template_dir:
+                    del self._templates[template_path]
+
+
+def stream_file_template(
+    template_path: str,
+    fh: IO[str],
+    use_defaults: bool = False,
+    extra_context: Optional[Dict[str, Any]] = None,
+    renderer: Optional[FileTemplateRenderer] = None,
+) -> None:
+    """Render a single-file template, writing the content to a file object
+    as it is rendered.
+
+    Unlike `render_file_template`, the rendered content is never held in
+    memory as a whole, so use this function for templates that render large
+    files.
+
+    Parameters
+    ----------
+    template_path : `str`
+        Path to the file template.
+    fh : file object
+        Text file object to write the rendered content to, such as
+        `sys.stdout`.
+    use_defaults : `bool`, optional
+        Disables interactive prompting for context variables, if `True`.
+    extra_context : `dict`, optional
+        Optional dictionary of key-value pairs that override defaults in the
+        ``cookiecutter.json`` file.
+    renderer : `FileTemplateRenderer`, optional
+        A renderer to get the compiled template from. By default, a new
+        renderer is used.
+    """
+    if renderer is None:
+        renderer = FileTemplateRenderer(cache_size=1)
+    chunks = renderer.generate(
+        template_path, use_defaults=use_defaults, extra_context=extra_context
+    )
+    with span("jinja.render", template=_get_template_name(template_path)):
+        fh.writelines(chunks)
+
+
+def stream_and_write_file_template(
+    template_path: str,
+    output_path: str,
+    extra_context: Optional[Dict[str, Any]] = None,
+    skip_unchanged: bool = False,
+    renderer: Optional[FileTemplateRenderer] = None,
+    use_defaults: bool = True,
+    copy_mode: bool = True,
+) -> bool:
+    """Render a single-file template and write it to the filesystem as it
+    is rendered.
+
+    This is the streaming counterpart of `render_and_write_file_template`.
+    The content is rendered into a temporary file next to the output file,
+    which then replaces the output file, so the output file is never left
+    partially written.
+
+    Parameters
+    ----------
+    template_path : `str`
+        Path to the file template.
+    output_path : `str`
+        Path to write the rendered file.
+    extra_context : `dict`, optional
+        Optional dictionary of key-value pairs that override defaults in the
+        ``cookiecutter.json`` file.
+    skip_unchanged : `bool`, optional
+        If `True`, and the output file already has the rendered content, the
+        output file isn't replaced, so that its modification time is
+        preserved. The file's permissions are still updated if they differ
+        from the template's (if ``copy_mode`` is `True`).
+    renderer : `FileTemplateRenderer`, optional
+        A renderer to get the compiled template from. By default, a new
+        renderer is used.
+    use_defaults : `bool`, optional
+        Disables interactive prompting for context variables, if `True`
+        (the default). Any prompting happens before the output file is
+        touched.
+    copy_mode : `bool`, optional
+        If `True` (the default), the output file gets the template's
+        permissions, as with `render_and_write_file_template`. Otherwise, an
+        existing output file keeps its permissions, and a new file gets the
+        default permissions for the process's umask.
+
+    Returns
+    -------
+    changed : `bool`
+        `True` if the output file was written (or its permissions changed),
+        or `False` if it was already up to date.
+    """
+    logger = logging.getLogger(__name__)
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    fd, temp_path = tempfile.mkstemp(
+        dir=output_dir, prefix=".", suffix=".templatekit-tmp"
+    )
+    try:
+        with io.open(fd, "w", encoding="utf-8") as fh:
+            stream_file_template(
+                template_path,
+                fh,
+                use_defaults=use_defaults,
+                extra_context=extra_context,
+                renderer=renderer,
+            )
+        with span(
+            "file.write", template=_get_template_name(template_path)
+        ) as attributes:
+            if (
+                skip_unchanged
+                and os.path.isfile(output_path)
+                and filecmp.cmp(temp_path, output_path, shallow=False)
+            ):
+                os.remove(temp_path)
+                changed = copy_mode and _copymode_if_changed(
+                    template_path, output_path
+                )
+                if changed:
+                    logger.debug("Updated permissions of %s", output_path)
+                else:
+                    logger.debug("Rendered file %s is unchanged", output_path)
+            else:
+                logger.debug("Writing rendered file to %s", output_path)
+                if copy_mode:
+                    shutil.copymode(template_path, temp_path)
+                else:
+                    # mkstemp creates the file readable only by its owner
+                    os.chmod(temp_path, get_file_mode(output_path))
+                os.replace(temp_path, output_path)
+                changed = True
+            attributes["changed"] = changed
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return changed
+
+
+def iter_render_file_template_batch(
+    template_path: str,
+    contexts: Iterable[Optional[Dict[str, Any]]],
+    renderer: Optional[FileTemplateRenderer] = None,
+) -> Iterator[str]:
+    """Render a single-file template once for each of many contexts,
+    yielding each rendered text as it is rendered.
+
+    The ``cookiecutter.json`` file is read, and the template is compiled,
+    only once for the whole batch.
+
+    Parameters
+    ----------
+    template_path : `str`
+        Path to the file template.
+    contexts : iterable of `dict`
+        Extra contexts to render the template with. Each context is a
+        dictionary of key-value pairs that override defaults in the
+        ``cookiecutter.json`` file, or `None` to render with the defaults.
+        The iterable is consumed lazily.
+    renderer : `FileTemplateRenderer`, optional
+        A renderer to get the compiled template from. By default, a new
+        renderer is used for the batch.
+
+    Yields
+    ------
+    rendered_text : `str`
+        Content rendered from the template, for each context in order.
+
+    See also
+    --------
+    render_file_template_batch
+    """
+    if renderer is None:
+        renderer = FileTemplateRenderer(cache_size=1)
+    tmpl, context = renderer.get_template(template_path)
+
+    template_name = os.path.basename(
+        os.path.dirname(os.path.abspath(template_path))
+    )
+    # Defaults don't depend on the extra context (it's applied after
+    # prompting), so they are computed once for the batch.
+    with span("render.defaults", template=template_name):
+        defaults = prompt_for_config(context, True)
+
+    for extra_context in contexts:
+        cookiecutter_context = dict(defaults)
+        if extra_context is not None:
+            cookiecutter_context.update(extra_context)
+        with span("jinja.render", template=template_name):
+            rendered_text = tmpl.render(cookiecutter=cookiecutter_context)
+        yield rendered_text
+
+
+def render_file_template_batch(
+    template_path: str,
+    contexts: Iterable[Optional[Dict[str, Any]]],
+    renderer: Optional[FileTemplateRenderer] = None,
+) -> List[str]:
+    """Render a single-file template once for each of many contexts.
+
+    Parameters
+    ----------
+    template_path : `str`
+        Path to the file template.
+    contexts : iterable of `dict`
+        Extra contexts to render the template with. Each context is a
+        dictionary of key-value pairs that override defaults in the
+        ``cookiecutter.json`` file, or `None` to render with the defaults.
+    renderer : `FileTemplateRenderer`, optional
+        A renderer to get the compiled template from. By default, a new
+        renderer is used for the batch.
+
+    Returns
+    -------
+    rendered_texts : `list` of `str`
+        Content rendered from the template, for each context in order.
+
+    See also
+    --------
+    iter_render_file_template_batch
+    """
+    return list(
+        iter_render_file_template_batch(
+            template_path, contexts, renderer=renderer
+        )
+    )
+
+
+def render_and_write_file_template_batch(
+    template_path: str,
+    output_paths: Sequence[str],
+    contexts: Sequence[Optional[Dict[str, Any]]],
+    renderer: Optional[FileTemplateRenderer] = None,
+    skip_unchanged: bool = False,
+) -> List[bool]:
+    """Render a single-file template once for each of many contexts, and
+    write each rendered file to the filesystem.
+
+    Parameters
+    ----------
+    template_path : `str`
+        Path to the file template.
+    output_paths : sequence of `str`
+        Paths to write the rendered files to, one for each context.
+    contexts : sequence of `dict`
+        Extra contexts to render the template with (see
+        `iter_render_file_template_batch`).
+    renderer : `FileTemplateRenderer`, optional
+        A renderer to get the compiled template from. By default, a new
+        renderer is used for the batch.
+    skip_unchanged : `bool`, optional
+        If `True`, output files that already have the rendered content
+        aren't written (see `render_and_write_file_template`).
+
+    Returns
+    -------
+    changed : `list` of `bool`
+        For each output path, `True` if the file was written or its
+        permissions changed.
+
+    Raises
+    ------
+    ValueError
+        Raised if ``output_paths`` and ``contexts`` have different lengths.
+    """
+    if len(output_paths) != len(contexts):
+        raise ValueError(
+            "Got {0:d} output paths for {1:d} contexts".format(
+                len(output_paths), len(contexts)
+            )
+        )
+    rendered_texts = iter_render_file_template_batch(
+        template_path, contexts, renderer=renderer
+    )
+    return [
+        _write_rendered_file(
+            template_path, output_path, rendered_text, skip_unchanged
+        )
+        for output_path, rendered_text in zip(output_paths, rendered_texts)
+    ]
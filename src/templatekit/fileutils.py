@@ -0,0 +1,81 @@
+"""Generic utilities for writing files.
+"""
+
+__all__ = ("get_file_mode", "open_atomic")
+
+import contextlib
+import os
+import stat
+import tempfile
+from typing import IO, Iterator, Optional
+
+
+def get_file_mode(path: str) -> int:
+    """Get the permissions to write a file with.
+
+    Parameters
+    ----------
+    path : `str`
+        Path of the file, which may not exist.
+
+    Returns
+    -------
+    mode : `int`
+        The permission bits of the existing file, or the default permissions
+        of a new file for the process's umask.
+    """
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        pass
+    # The umask can only be read by setting it
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+@contextlib.contextmanager
+def open_atomic(
+    path: str, mode: Optional[int] = None, encoding: str = "utf-8"
+) -> Iterator[IO[str]]:
+    """Open a text file for writing, so that it is replaced atomically.
+
+    The content is written to a uniquely named temporary file in the same
+    directory, which replaces the file when the ``with`` block exits
+    without an error. Otherwise, the temporary file is removed and the file
+    is left untouched, so it's never partially written, even if several
+    processes write it at once.
+
+    Parameters
+    ----------
+    path : `str`
+        Path of the file.
+    mode : `int`, optional
+        Permission bits of the file. The default is the permissions of the
+        existing file, or the default permissions for the process's umask
+        (see `get_file_mode`).
+    encoding : `str`, optional
+        Text encoding.
+
+    Yields
+    ------
+    file
+        The temporary file, opened for writing text.
+    """
+    if mode is None:
+        mode = get_file_mode(path)
+    dirname = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=".{0}.".format(os.path.basename(path)),
+        suffix=".tmp",
+        dir=dirname,
+    )
+    try:
+        with open(fd, "w", encoding=encoding) as f:
+            yield f
+        # mkstemp creates the file readable only by its owner
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
@@ -0,0 +1,347 @@
+"""Fast Git working tree status, from a single ``git status`` call."""
+
+from __future__ import annotations
+
+__all__ = (
+    "GitStatus",
+    "GitTree",
+    "get_git_status",
+    "get_changed_paths",
+    "parse_porcelain_v2",
+)
+
+import fnmatch
+import subprocess
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+CHANGE_TYPES = ("A", "C", "D", "R", "M", "T")
+"""Change types reported by `GitStatus.changes`, in the order they are
+sorted (the same as ``git.diff.DiffIndex.change_type``).
+"""
+
+
+class GitStatus(NamedTuple):
+    """The state of a Git working tree compared to the ``HEAD`` commit."""
+
+    untracked: List[str]
+    """Paths of untracked (and not ignored) files."""
+
+    changes: List[Tuple[str, str]]
+    """Uncommitted changes, staged or not, as ``(change_type, path)`` tuples.
+
+    The change type is one of ``A`` (added), ``C`` (copied), ``D``
+    (deleted), ``R`` (renamed), ``M`` (modified), or ``T`` (type changed).
+    Changes are sorted by change type, in that order. For renames and
+    copies, the path is the new path.
+    """
+
+    @property
+    def modified(self) -> List[str]:
+        """Paths of files that are added, copied, renamed, modified, or
+        changed type (`list` of `str`).
+        """
+        return [path for change, path in self.changes if change != "D"]
+
+    @property
+    def deleted(self) -> List[str]:
+        """Paths of deleted files (`list` of `str`)."""
+        return [path for change, path in self.changes if change == "D"]
+
+    @property
+    def is_dirty(self) -> bool:
+        """`True` if there are untracked files or uncommitted changes
+        (`bool`).
+        """
+        return len(self.untracked) > 0 or len(self.changes) > 0
+
+
+def get_git_status(
+    root: str, ignore: Sequence[str] = (), paths: Sequence[str] = ()
+) -> GitStatus:
+    """Get the status of a Git working tree with a single ``git status``
+    command.
+
+    Parameters
+    ----------
+    root : `str`
+        Path of the Git working tree's root directory.
+    ignore : sequence of `str`, optional
+        Glob patterns (see `fnmatch.fnmatch`) of paths, relative to
+        ``root``, to leave out of the status.
+    paths : sequence of `str`, optional
+        If set, only get the status of these files or directories, relative
+        to ``root``.
+
+    Returns
+    -------
+    status : `GitStatus`
+        The status of the working tree.
+
+    Raises
+    ------
+    subprocess.CalledProcessError
+        Raised if the ``git status`` command fails.
+    """
+    result = subprocess.run(
+        [
+            "git",
+            "status",
+            "--porcelain=v2",
+            "-z",
+            "--untracked-files=all",
+            "--ignore-submodules=none",
+            "--",
+            *paths,
+        ],
+        cwd=root,
+        stdout=subprocess.PIPE,
+        check=True,
+    )
+    return parse_porcelain_v2(
+        result.stdout.decode("utf-8", errors="surrogateescape").split("\0"),
+        ignore=ignore,
+    )
+
+
+def get_changed_paths(root: str, since: str) -> List[str]:
+    """Get the paths of files that changed in a Git working tree since a
+    Git ref.
+
+    Parameters
+    ----------
+    root : `str`
+        Path of the Git working tree's root directory.
+    since : `str`
+        A Git ref, such as a branch, tag, or commit. Files are compared
+        between this ref and the working tree, so uncommitted changes are
+        included.
+
+    Returns
+    -------
+    paths : `list` of `str`
+        Paths of added, modified, and deleted files, relative to ``root``.
+
+    Raises
+    ------
+    subprocess.CalledProcessError
+        Raised if the ``git diff`` command fails, for example because the
+        ref doesn't exist.
+    """
+    result = subprocess.run(
+        ["git", "diff", "--name-only", "-z", since, "--"],
+        cwd=root,
+        stdout=subprocess.PIPE,
+        check=True,
+    )
+    output = result.stdout.decode("utf-8", errors="surrogateescape")
+    return [path for path in output.split("\0") if path]
+
+
+class GitTree(object):
+    """Read-only access to the files of a committed Git tree, read directly
+    from the Git object database.
+
+    Parameters
+    ----------
+    root : `str`
+        Path of the Git working tree's root directory. The working tree
+        itself isn't read.
+    ref : `str`, optional
+        The commit, branch, or tag whose tree is read. Default is ``HEAD``.
+
+    Notes
+    -----
+    The listing of the tree is read with a single ``git ls-tree`` command,
+    and file contents are read in batches with ``git cat-file --batch``.
+    """
+
+    def __init__(self, root: str, ref: str = "HEAD"):
+        super().__init__()
+        self.root = root
+        self.ref = ref
+        self._entries: Optional[Dict[str, Tuple[str, str]]] = None
+
+    def __repr__(self) -> str:
+        return "GitTree({0!r}, ref={1!r})".format(self.root, self.ref)
+
+    @property
+    def entries(self) -> Dict[str, Tuple[str, str]]:
+        """The files of the tree, as ``(mode, object name)`` tuples keyed by
+        path relative to the repository root (`dict`).
+
+        Modes are Git file modes, such as ``100644`` for regular files and
+        ``100755`` for executable files.
+        """
+        if self._entries is None:
+            result = subprocess.run(
+                ["git", "ls-tree", "-r", "-z", "--full-tree", self.ref],
+                cwd=self.root,
+                stdout=subprocess.PIPE,
+                check=True,
+            )
+            output = result.stdout.decode("utf-8", errors="surrogateescape")
+            entries: Dict[str, Tuple[str, str]] = {}
+            for record in output.split("\0"):
+                if not record:
+                    continue
+                # <mode> SP <type> SP <object> TAB <path>
+                info, path = record.split("\t", 1)
+                mode, object_type, object_name = info.split(" ")
+                if object_type == "blob":
+                    entries[path] = (mode, object_name)
+            self._entries = entries
+        return self._entries
+
+    def list_files(self, prefix: str) -> List[str]:
+        """List the files in a directory of the tree, recursively.
+
+        Parameters
+        ----------
+        prefix : `str`
+            Path of the directory, relative to the repository root.
+
+        Returns
+        -------
+        paths : `list` of `str`
+            Sorted paths of the files, relative to the repository root.
+        """
+        prefix = prefix.rstrip("/") + "/"
+        return sorted(path for path in self.entries if path.startswith(prefix))
+
+    def read_files(self, paths: Iterable[str]) -> Dict[str, bytes]:
+        """Read the content of files in the tree.
+
+        Parameters
+        ----------
+        paths : iterable of `str`
+            Paths of the files, relative to the repository root. Paths that
+            aren't in the tree are skipped.
+
+        Returns
+        -------
+        contents : `dict`
+            The content of each file, keyed by path.
+        """
+        object_names = {
+            path: self.entries[path][1]
+            for path in paths
+            if path in self.entries
+        }
+        if not object_names:
+            return {}
+        unique_names = sorted(set(object_names.values()))
+        result = subprocess.run(
+            ["git", "cat-file", "--batch"],
+            cwd=self.root,
+            input="".join(name + "\n" for name in unique_names).encode(),
+            stdout=subprocess.PIPE,
+            check=True,
+        )
+        blobs = _parse_cat_file_batch(result.stdout)
+        return {path: blobs[name] for path, name in object_names.items()}
+
+
+def _parse_cat_file_batch(output: bytes) -> Dict[str, bytes]:
+    """Parse the output of ``git cat-file --batch`` into object contents
+    keyed by object name.
+    """
+    blobs: Dict[str, bytes] = {}
+    position = 0
+    while position < len(output):
+        header_end = output.index(b"\n", position)
+        # <object> SP <type> SP <size> LF <contents> LF
+        object_name, _, size = output[position:header_end].decode().split(" ")
+        start = header_end + 1
+        end = start + int(size)
+        blobs[object_name] = output[start:end]
+        position = end + 1
+    return blobs
+
+
+def parse_porcelain_v2(
+    records: Iterable[str], ignore: Sequence[str] = ()
+) -> GitStatus:
+    """Parse the output of ``git status --porcelain=v2 -z``.
+
+    Parameters
+    ----------
+    records : iterable of `str`
+        The NUL-separated fields of the command's output.
+    ignore : sequence of `str`, optional
+        Glob patterns of paths to leave out of the status.
+
+    Returns
+    -------
+    status : `GitStatus`
+        The status of the working tree.
+    """
+    untracked: List[str] = []
+    changes: List[Tuple[str, str]] = []
+    for record_type, xy, path in _iter_porcelain_v2(iter(records)):
+        if any(fnmatch.fnmatch(path, pattern) for pattern in ignore):
+            continue
+        if record_type == "?":
+            untracked.append(path)
+            continue
+        change_type = _get_change_type(xy)
+        if change_type is not None:
+            changes.append((change_type, path))
+    changes.sort(key=lambda change: CHANGE_TYPES.index(change[0]))
+    return GitStatus(untracked=untracked, changes=changes)
+
+
+def _iter_porcelain_v2(
+    records: Iterator[str],
+) -> Iterator[Tuple[str, str, str]]:
+    """Iterate over the entries of ``git status --porcelain=v2 -z`` output,
+    yielding ``(record_type, xy, path)`` tuples.
+    """
+    for record in records:
+        if not record:
+            continue
+        record_type = record[0]
+        if record_type == "1":
+            # 1 XY sub mH mI mW hH hI path
+            fields = record.split(" ", 8)
+            yield record_type, fields[1], fields[8]
+        elif record_type == "2":
+            # 2 XY sub mH mI mW hH hI Xscore path, followed by the original
+            # path in the next record
+            fields = record.split(" ", 9)
+            next(records, None)
+            yield record_type, fields[1], fields[9]
+        elif record_type == "u":
+            # u XY sub m1 m2 m3 mW h1 h2 h3 path
+            fields = record.split(" ", 10)
+            yield record_type, fields[1], fields[10]
+        elif record_type == "?":
+            yield record_type, "", record[2:]
+        # Ignored ("!") and header ("#") records aren't needed
+
+
+def _get_change_type(xy: str) -> Optional[str]:
+    """Get the change type, relative to ``HEAD``, from the ``XY`` (index and
+    working tree) status of an entry.
+    """
+    index_status, worktree_status = xy[0], xy[1]
+    if index_status == "A" and worktree_status == "D":
+        # Added to the index and then deleted: no change relative to HEAD
+        return None
+    if "D" in xy:
+        return "D"
+    if index_status in ("R", "C"):
+        return index_status
+    if index_status == "A":
+        return "A"
+    if "T" in xy:
+        return "T"
+    return "M"
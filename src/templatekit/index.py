@@ -0,0 +1,334 @@
+"""Precomputed index of the metadata of all templates in a repository.
+"""
+
+from __future__ import annotations
+
+__all__ = ("TemplateIndex", "IndexEntry", "get_template_hash")
+
+import hashlib
+import json
+import logging
+import os
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Type,
+)
+
+from .cache import DEFAULT_CACHE_DIRNAME
+from .fileutils import open_atomic
+from .instrumentation import span
+
+if TYPE_CHECKING:
+    from .repo import BaseTemplate, Repo
+
+DEFAULT_INDEX_PATH = os.path.join(
+    DEFAULT_CACHE_DIRNAME, "templatekit-index.json"
+)
+"""Default path of the index file, relative to the root of a template
+repository. The index is kept in the cache directory, which Git ignores.
+"""
+
+
+class IndexEntry(NamedTuple):
+    """The indexed metadata of a template."""
+
+    name: str
+    """Name of the template."""
+
+    kind: str
+    """Kind of template: ``"project"`` or ``"file"``."""
+
+    path: str
+    """Path of the template's directory, relative to the repository root
+    (such as ``file_templates/license``).
+    """
+
+    hash: str
+    """Content hash of the template's metadata sources (see
+    `get_template_hash`).
+    """
+
+    jinja_filenames: List[str]
+    """Names of the ``.jinja`` files in the template's directory."""
+
+    config: Dict[str, Any]
+    """The normalized ``templatekit.yaml`` configuration."""
+
+    cookiecutter: Dict[str, Any]
+    """The data from the ``cookiecutter.json`` file."""
+
+
+def get_template_hash(path: str) -> str:
+    """Get the content hash of a template directory's metadata sources.
+
+    Parameters
+    ----------
+    path : `str`
+        Path of the template's directory.
+
+    Returns
+    -------
+    hash : `str`
+        The SHA-256 hex digest of the ``templatekit.yaml`` and
+        ``cookiecutter.json`` files, and of the names of the ``.jinja`` files
+        in the directory.
+
+    Raises
+    ------
+    OSError
+        Raised if ``templatekit.yaml`` or ``cookiecutter.json`` can't be read.
+    """
+    from .repo import scan_template_dir
+
+    digest = hashlib.sha256()
+    for filename in ("templatekit.yaml", "cookiecutter.json"):
+        with open(os.path.join(path, filename), "rb") as f:
+            content = f.read()
+        digest.update("{0}\0{1:d}\0".format(filename, len(content)).encode())
+        digest.update(content)
+    for filename in sorted(scan_template_dir(path).jinja_filenames):
+        digest.update("{0}\0".format(filename).encode())
+    return digest.hexdigest()
+
+
+class TemplateIndex(object):
+    """An index of the normalized configurations and ``cookiecutter.json``
+    data of all templates in a repository.
+
+    An index is built once (``templatekit index build``) and then loaded by
+    `templatekit.repo.Repo.from_index`, so that applications can get the
+    metadata of all templates without reading template directories.
+
+    Parameters
+    ----------
+    root : `str`
+        Path of the template repository's root directory.
+    entries : `list` of `IndexEntry`
+        The indexed templates, in `templatekit.repo.Repo.iter_templates`
+        order.
+
+    Notes
+    -----
+    Each entry records a content hash of the template's metadata sources
+    (see `get_template_hash`). An index isn't checked against the
+    repository when it's loaded; use `get_stale_templates` to check it on
+    demand.
+    """
+
+    format_version = 1
+    """Version of the index file format. Index files with a different
+    version can't be read.
+    """
+
+    def __init__(self, root: str, entries: List[IndexEntry]):
+        super().__init__()
+        self._log = logging.getLogger(__name__)
+        self.root = os.path.abspath(root)
+        self.entries = entries
+
+    def __repr__(self) -> str:
+        return "TemplateIndex({0!r})".format(self.root)
+
+    def __iter__(self) -> Iterator[IndexEntry]:
+        return iter(self.entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @classmethod
+    def build(cls, repo: Repo) -> TemplateIndex:
+        """Build the index of a template repository.
+
+        Parameters
+        ----------
+        repo : `templatekit.repo.Repo`
+            The template repository. Templates are loaded with the
+            repository's ``workers`` or ``executor`` and metadata cache, if
+            set.
+
+        Returns
+        -------
+        index : `TemplateIndex`
+            The index.
+
+        Raises
+        ------
+        RuntimeError
+            Raised if a template has an invalid ``templatekit.yaml`` file.
+        """
+        from .repo import FileTemplate
+
+        entries: List[IndexEntry] = []
+        for template in repo.iter_templates():
+            with span("index.add", template=template.name):
+                # Hash before loading, so that a change while the template
+                # is loaded makes its entry stale rather than wrong.
+                template_hash = get_template_hash(template.path)
+                entries.append(
+                    IndexEntry(
+                        name=template.name,
+                        kind=(
+                            "file"
+                            if isinstance(template, FileTemplate)
+                            else "project"
+                        ),
+                        path=os.path.relpath(template.path, repo.root),
+                        hash=template_hash,
+                        jinja_filenames=list(template.jinja_filenames),
+                        config=template.config.to_dict(),
+                        cookiecutter=template.cookiecutter,
+                    )
+                )
+        return cls(repo.root, entries)
+
+    @classmethod
+    def read(cls, path: str, root: Optional[str] = None) -> TemplateIndex:
+        """Read an index file.
+
+        Parameters
+        ----------
+        path : `str`
+            Path of the index file.
+        root : `str`, optional
+            Path of the template repository's root directory. The default is
+            the directory that contains the index file, or its parent if
+            that's a ``.templatekit-cache`` directory (as for the default
+            index path).
+
+        Returns
+        -------
+        index : `TemplateIndex`
+            The index.
+
+        Raises
+        ------
+        ValueError
+            Raised if the file isn't an index file, or has a different
+            format version.
+        """
+        with span("index.read"):
+            with open(path) as f:
+                data = json.load(f)
+        if not isinstance(data, dict) or "templates" not in data:
+            raise ValueError("{0} isn't a template index".format(path))
+        if data.get("version") != cls.format_version:
+            raise ValueError(
+                "{0} has index format version {1!r}, not {2:d}. "
+                "Rebuild it with `templatekit index build`.".format(
+                    path, data.get("version"), cls.format_version
+                )
+            )
+        if root is None:
+            root = os.path.dirname(os.path.abspath(path))
+            if os.path.basename(root) == DEFAULT_CACHE_DIRNAME:
+                root = os.path.dirname(root)
+        entries = [IndexEntry(**entry) for entry in data["templates"]]
+        return cls(root, entries)
+
+    def write(self, path: str) -> None:
+        """Write the index to a file.
+
+        The file is compact JSON, and is replaced atomically. An existing
+        file keeps its permissions, and a new file gets the default
+        permissions for the process's umask, so that other users can read
+        the index.
+
+        Parameters
+        ----------
+        path : `str`
+            Path of the index file.
+        """
+        data = {
+            "version": self.format_version,
+            "templates": [entry._asdict() for entry in self.entries],
+        }
+        with open_atomic(path) as f:
+            json.dump(data, f, separators=(",", ":"))
+        self._log.debug("Wrote template index %s", path)
+
+    def get_stale_templates(self) -> List[str]:
+        """Check the index against the template repository.
+
+        Returns
+        -------
+        names : `list` of `str`
+            Sorted names of the templates that were added, removed, or
+            changed (in their ``templatekit.yaml`` or ``cookiecutter.json``
+            files, or the names of their ``.jinja`` files) since the index
+            was built. The list is empty if the index is current.
+        """
+        from .repo import Repo, scan_template_dir
+
+        indexed = {entry.path: entry for entry in self.entries}
+        repo = Repo(self.root)
+        stale = set()
+        with span("index.check"):
+            for dirname in (
+                repo.project_templates_dirname,
+                repo.file_templates_dirname,
+            ):
+                for path in repo.list_template_dirs(dirname):
+                    entry = indexed.pop(os.path.relpath(path, self.root), None)
+                    contents = scan_template_dir(path)
+                    if not (
+                        contents.has_cookiecutter_json
+                        and contents.has_templatekit_yaml
+                    ):
+                        # Not a template (any more)
+                        if entry is not None:
+                            stale.add(entry.name)
+                        continue
+                    try:
+                        current_hash = get_template_hash(path)
+                    except OSError:
+                        current_hash = None
+                    if entry is None or entry.hash != current_hash:
+                        stale.add(os.path.basename(path))
+        # Indexed templates whose directories were removed
+        stale.update(entry.name for entry in indexed.values())
+        return sorted(stale)
+
+    def is_current(self) -> bool:
+        """Test if the index is current (see `get_stale_templates`).
+
+        Returns
+        -------
+        current : `bool`
+            `True` if no templates were added, removed, or changed since the
+            index was built.
+        """
+        return not self.get_stale_templates()
+
+    def create_template(self, entry: IndexEntry) -> BaseTemplate:
+        """Create a template from its index entry, without reading its
+        directory.
+
+        Parameters
+        ----------
+        entry : `IndexEntry`
+            The template's index entry.
+
+        Returns
+        -------
+        template : `templatekit.repo.FileTemplate` or \
+                `templatekit.repo.ProjectTemplate`
+            The template, with its indexed configuration and
+            ``cookiecutter.json`` data.
+        """
+        from .repo import FileTemplate, ProjectTemplate
+
+        template_class: Type[BaseTemplate] = (
+            FileTemplate if entry.kind == "file" else ProjectTemplate
+        )
+        return template_class.from_metadata(
+            os.path.join(self.root, entry.path),
+            config=entry.config,
+            cookiecutter=entry.cookiecutter,
+            jinja_filenames=entry.jinja_filenames,
+        )
@@ -0,0 +1,426 @@
+"""Timing instrumentation for loading, rendering, and building templates.
+
+Instrumented code wraps each phase of work, such as parsing a
+``templatekit.yaml`` file or compiling a Jinja template, in a `span`. When
+a span ends, it is sent to each registered sink. A sink is any callable
+that accepts a `Span`; this module provides sinks that log spans
+(`LoggingSink`), write them as JSON lines (`JsonLinesSink`), forward them to
+an OpenTelemetry tracer (`OpenTelemetrySink`), and aggregate them into a
+per-phase, per-template profile (`Profiler`).
+
+Spans are only timed if a sink is registered, so instrumentation has
+negligible overhead by default.
+
+Spans from other processes, such as scons builds and the worker processes
+of the native example builder, are collected by setting the
+``TEMPLATEKIT_TRACE_FILE`` environment variable to the path of a JSON lines
+file: each process that imports this module appends its spans to that file.
+"""
+
+from __future__ import annotations
+
+__all__ = (
+    "TRACE_FILE_ENV",
+    "Span",
+    "Sink",
+    "span",
+    "add_sink",
+    "remove_sink",
+    "get_sinks",
+    "LoggingSink",
+    "JsonLinesSink",
+    "OpenTelemetrySink",
+    "Profiler",
+)
+
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+TRACE_FILE_ENV = "TEMPLATEKIT_TRACE_FILE"
+"""Name of the environment variable with the path of a JSON lines file that
+spans are appended to, in every process.
+"""
+
+
+class Span(NamedTuple):
+    """A timed phase of work."""
+
+    name: str
+    """Name of the phase, such as ``config.parse_yaml``."""
+
+    start: float
+    """Start time, in seconds since the epoch."""
+
+    duration: float
+    """Duration, in seconds."""
+
+    attributes: Dict[str, Any]
+    """Attributes of the phase, such as the ``template`` name."""
+
+    pid: int
+    """ID of the process that the phase ran in."""
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the span to a JSON-serializable dictionary."""
+        return self._asdict()
+
+
+Sink = Callable[[Span], None]
+"""Type of span sinks: callables that are called with each ended span."""
+
+_sinks: List[Sink] = []
+_sinks_pid: Optional[int] = None
+_sinks_lock = threading.Lock()
+
+
+def get_sinks() -> List[Sink]:
+    """Get the sinks that spans are sent to in this process.
+
+    Returns
+    -------
+    sinks : `list`
+        The registered sinks. If the ``TEMPLATEKIT_TRACE_FILE`` environment
+        variable is set, this includes a `JsonLinesSink` for that file.
+
+    Notes
+    -----
+    Sinks are registered per process. A process forked from a process with
+    sinks starts again with only the sink configured by the environment.
+    """
+    global _sinks, _sinks_pid
+    pid = os.getpid()
+    if _sinks_pid != pid:
+        with _sinks_lock:
+            if _sinks_pid != pid:
+                _sinks = []
+                trace_path = os.environ.get(TRACE_FILE_ENV)
+                if trace_path:
+                    _sinks.append(JsonLinesSink(trace_path))
+                _sinks_pid = pid
+    return _sinks
+
+
+def add_sink(sink: Sink) -> None:
+    """Register a sink that receives every span that ends in this process.
+
+    Parameters
+    ----------
+    sink : callable
+        A callable that accepts a `Span`.
+    """
+    sinks = get_sinks()
+    with _sinks_lock:
+        sinks.append(sink)
+
+
+def remove_sink(sink: Sink) -> None:
+    """Unregister a sink.
+
+    Parameters
+    ----------
+    sink : callable
+        A sink registered with `add_sink`.
+    """
+    sinks = get_sinks()
+    with _sinks_lock:
+        if sink in sinks:
+            sinks.remove(sink)
+
+
+@contextlib.contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Dict[str, Any]]:
+    """Time a phase of work, as a context manager.
+
+    Parameters
+    ----------
+    name : `str`
+        Name of the phase, such as ``jinja.render``.
+    **attributes
+        Attributes of the phase, such as ``template``, the name of the
+        template that is worked on.
+
+    Yields
+    ------
+    attributes : `dict`
+        The span's attributes, which can be added to inside the context.
+
+    Examples
+    --------
+    >>> with span("config.parse_yaml", template="license"):
+    ...     pass
+    """
+    sinks = get_sinks()
+    if not sinks:
+        yield attributes
+        return
+
+    start = time.time()
+    counter_start = time.perf_counter()
+    try:
+        yield attributes
+    except BaseException as err:
+        attributes["error"] = err.__class__.__name__
+        raise
+    finally:
+        ended_span = Span(
+            name=name,
+            start=start,
+            duration=time.perf_counter() - counter_start,
+            attributes=attributes,
+            pid=os.getpid(),
+        )
+        for sink in list(sinks):
+            sink(ended_span)
+
+
+class LoggingSink(object):
+    """Sink that logs each span.
+
+    Parameters
+    ----------
+    logger : `logging.Logger`, optional
+        The logger. Default is this module's logger.
+    level : `int`, optional
+        The logging level. Default is `logging.DEBUG`.
+    """
+
+    def __init__(
+        self,
+        logger: Optional[logging.Logger] = None,
+        level: int = logging.DEBUG,
+    ):
+        super().__init__()
+        self.logger = logger or logging.getLogger(__name__)
+        self.level = level
+
+    def __call__(self, ended_span: Span) -> None:
+        self.logger.log(
+            self.level,
+            "%s took %.3f ms %s",
+            ended_span.name,
+            ended_span.duration * 1000,
+            ended_span.attributes,
+        )
+
+
+class JsonLinesSink(object):
+    """Sink that appends each span to a JSON lines file.
+
+    Parameters
+    ----------
+    path : `str`
+        Path of the file. Spans are appended, so several processes can share
+        the file.
+    """
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self._file: Optional[IO[str]] = None
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return "JsonLinesSink({0!r})".format(self.path)
+
+    def __call__(self, ended_span: Span) -> None:
+        line = json.dumps(ended_span.to_dict(), default=str) + "\n"
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8")
+            # Each span is written with a single write, which keeps lines
+            # from different processes intact.
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self) -> None:
+        """Close the file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class OpenTelemetrySink(object):
+    """Sink that records each span with an OpenTelemetry tracer.
+
+    Parameters
+    ----------
+    tracer : `opentelemetry.trace.Tracer`
+        The tracer, such as from ``opentelemetry.trace.get_tracer(...)``.
+        OpenTelemetry isn't a dependency of templatekit; any object with a
+        compatible ``start_span`` method works.
+    """
+
+    def __init__(self, tracer: Any):
+        super().__init__()
+        self.tracer = tracer
+
+    def __call__(self, ended_span: Span) -> None:
+        start_ns = int(ended_span.start * 1e9)
+        otel_span = self.tracer.start_span(
+            ended_span.name,
+            start_time=start_ns,
+            attributes={
+                "templatekit.{0}".format(key): str(value)
+                for key, value in ended_span.attributes.items()
+            },
+        )
+        otel_span.end(end_time=start_ns + int(ended_span.duration * 1e9))
+
+
+class Profiler(object):
+    """Sink that aggregates spans into a per-phase, per-template profile.
+
+    Notes
+    -----
+    Spans are grouped by their name (the phase) and their ``template``
+    attribute. Use `load_json_lines` to add spans that other processes
+    wrote to a ``TEMPLATEKIT_TRACE_FILE``.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._totals: Dict[Tuple[str, str], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, ended_span: Span) -> None:
+        key = (ended_span.name, str(ended_span.attributes.get("template", "")))
+        with self._lock:
+            totals = self._totals.setdefault(key, [0, 0.0])
+            totals[0] += 1
+            totals[1] += ended_span.duration
+
+    def load_json_lines(
+        self, path: str, skip_pid: Optional[int] = None
+    ) -> None:
+        """Add the spans in a JSON lines file.
+
+        Parameters
+        ----------
+        path : `str`
+            Path of the file, as written by `JsonLinesSink`.
+        skip_pid : `int`, optional
+            Skip spans from this process ID, such as spans from the current
+            process that the profiler already received.
+        """
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                if data["pid"] == skip_pid:
+                    continue
+                self(Span(**data))
+
+    def get_phases(self) -> Dict[str, Tuple[int, float]]:
+        """Get the number of spans and total duration of each phase.
+
+        Returns
+        -------
+        phases : `dict`
+            ``(count, total duration in seconds)`` tuples, keyed by phase
+            name, sorted by decreasing duration.
+        """
+        phases: Dict[str, List[float]] = {}
+        with self._lock:
+            for (name, _), (count, duration) in self._totals.items():
+                totals = phases.setdefault(name, [0, 0.0])
+                totals[0] += count
+                totals[1] += duration
+        return {
+            name: (int(count), duration)
+            for name, (count, duration) in sorted(
+                phases.items(), key=lambda item: -item[1][1]
+            )
+        }
+
+    def get_templates(self) -> Dict[str, Dict[str, Tuple[int, float]]]:
+        """Get the number of spans and total duration of each phase, per
+        template.
+
+        Returns
+        -------
+        templates : `dict`
+            For each template name (sorted by decreasing total duration), a
+            dictionary of ``(count, total duration in seconds)`` tuples keyed
+            by phase name. Spans without a template aren't included.
+        """
+        templates: Dict[str, Dict[str, Tuple[int, float]]] = {}
+        with self._lock:
+            for (name, template), (count, duration) in sorted(
+                self._totals.items()
+            ):
+                if template:
+                    templates.setdefault(template, {})[name] = (
+                        int(count),
+                        duration,
+                    )
+        return dict(
+            sorted(
+                templates.items(),
+                key=lambda item: -sum(d for _, d in item[1].values()),
+            )
+        )
+
+    def format_report(self, max_templates: int = 20) -> str:
+        """Format the profile as a human-readable report.
+
+        Parameters
+        ----------
+        max_templates : `int`, optional
+            Maximum number of templates in the per-template breakdown. The
+            templates with the largest total durations are included.
+
+        Returns
+        -------
+        report : `str`
+            The report.
+        """
+        lines = ["Profile by phase:"]
+        phases = self.get_phases()
+        if not phases:
+            lines.append("  (no instrumented work)")
+        for name, (count, duration) in phases.items():
+            lines.append(
+                "  {0:<26} {1:>6d} calls {2:>10.2f} ms".format(
+                    name, count, duration * 1000
+                )
+            )
+        templates = self.get_templates()
+        if templates:
+            lines.append("Profile by template:")
+        for template, template_phases in list(templates.items())[
+            :max_templates
+        ]:
+            total = sum(duration for _, duration in template_phases.values())
+            lines.append("  {0}: {1:.2f} ms".format(template, total * 1000))
+            for name, (count, duration) in sorted(
+                template_phases.items(), key=lambda item: -item[1][1]
+            ):
+                lines.append(
+                    "    {0:<24} {1:>6d} calls {2:>10.2f} ms".format(
+                        name, count, duration * 1000
+                    )
+                )
+        if len(templates) > max_templates:
+            lines.append(
+                "  ... and {0:d} more templates".format(
+                    len(templates) - max_templates
+                )
+            )
+        return "\n".join(lines)
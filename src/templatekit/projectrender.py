@@ -0,0 +1,864 @@
+"""Rendering project templates in-process, without Cookiecutter's per-call
+overhead.
+
+Cookiecutter's ``cookiecutter()`` function reads the user configuration,
+builds a Jinja environment, and walks, compiles, and renders every file of a
+project template one at a time, for each project it generates. A
+`ProjectTemplateRenderer` instead compiles the path and content templates of
+a project template's ``{{ cookiecutter.* }}`` directory once, and generates
+any number of projects from the compiled form: files that aren't rendered
+(binary files and ``_copy_without_render`` matches) are copied by the
+kernel, and files are rendered in parallel.
+
+Projects are generated as ``cookiecutter()`` generates them from a local
+template directory, including the ``pre_gen_project`` and
+``post_gen_project`` hooks. Replay files aren't written, and nested
+templates (a ``templates`` field in ``cookiecutter.json``) aren't supported.
+For these reasons, ``templatekit make``, which generates a single project
+interactively, still uses ``cookiecutter()``.
+"""
+
+from __future__ import annotations
+
+__all__ = (
+    "ProjectTemplateRenderer",
+    "get_default_renderer",
+    "render_project_template",
+    "copy_file",
+)
+
+import contextlib
+import errno
+import fnmatch
+import json
+import logging
+import os
+import shutil
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from binaryornot.check import is_binary
+from cookiecutter.config import get_user_config
+from cookiecutter.environment import StrictEnvironment
+from cookiecutter.exceptions import (
+    NonTemplatedInputDirException,
+    OutputDirExistsException,
+    UndefinedVariableInTemplate,
+)
+from cookiecutter.generate import generate_context
+from cookiecutter.hooks import run_hook_from_repo_dir, valid_hook
+from cookiecutter.prompt import prompt_for_config
+from jinja2 import FileSystemLoader, Template
+from jinja2.exceptions import TemplateSyntaxError, UndefinedError
+
+from .instrumentation import span
+
+_HOOK_NAMES = ("pre_gen_project", "post_gen_project")
+"""Names of the hooks that run when a project is generated."""
+
+_SETTINGS_KEYS = ("_extensions", "_jinja2_env_vars", "_copy_without_render")
+"""Fields of ``cookiecutter.json`` that a compiled project depends on."""
+
+_CHUNK_SIZE = 1024 * 1024 * 1024
+"""Maximum number of bytes copied by each ``os.copy_file_range`` call."""
+
+_hook_lock = threading.Lock()
+"""Lock for running hooks, which change the process's working directory."""
+
+_sys_path_lock = threading.Lock()
+"""Lock for changes to `sys.path`."""
+
+
+class _DirEntry(NamedTuple):
+    """A directory in a compiled project template."""
+
+    source_path: str
+    """Path of the directory in the template."""
+
+    path_template: Template
+    """Template of the directory's path, relative to the project."""
+
+    relative_path: str
+    """Unrendered path of the directory, relative to the template."""
+
+    copy_only: bool
+    """`True` if the directory is copied without rendering."""
+
+
+class _FileEntry(NamedTuple):
+    """A file in a compiled project template."""
+
+    source_path: str
+    """Path of the file in the template."""
+
+    path_template: Template
+    """Template of the file's path, relative to the project."""
+
+    relative_path: str
+    """Unrendered path of the file, relative to the template."""
+
+    content_template: Optional[Template]
+    """Template of the file's content, or `None` if the file is copied
+    without rendering.
+    """
+
+    newline: Optional[str]
+    """The newline of the source file, used for the rendered file unless the
+    ``_new_lines`` field is set.
+    """
+
+
+class _CompiledProject(NamedTuple):
+    """A compiled project template."""
+
+    project_dir_template: Template
+    """Template of the project directory's name."""
+
+    project_dirname: str
+    """Unrendered name of the project directory."""
+
+    dirs: List[_DirEntry]
+    """The directories in the template, in the order they are created."""
+
+    files: List[_FileEntry]
+    """The files in the template."""
+
+    hooks: Tuple[str, ...]
+    """Names of the hooks that the template has."""
+
+    settings: str
+    """The ``cookiecutter.json`` fields that the template was compiled
+    with (see ``_SETTINGS_KEYS``), as JSON.
+    """
+
+    signature: Tuple[Tuple[str, int, int], ...]
+    """Paths, modification times, and sizes of the template's files when it
+    was compiled.
+    """
+
+
+class ProjectTemplateRenderer(object):
+    """Renderer for project templates that compiles each template once and
+    generates projects from the compiled form.
+
+    Parameters
+    ----------
+    max_workers : `int`, optional
+        Maximum number of threads that render and copy files. If ``1``,
+        files are rendered in the calling thread. The default is the
+        `concurrent.futures.ThreadPoolExecutor` default.
+    cache_size : `int`, optional
+        Maximum number of compiled project templates to keep. The least
+        recently used templates are dropped first.
+    default_context : `dict`, optional
+        Values that override the defaults in ``cookiecutter.json`` files, as
+        the ``default_context`` of Cookiecutter's user configuration does. By
+        default, the ``default_context`` of the user configuration is used.
+
+    Notes
+    -----
+    A compiled template is recompiled if any file of the template's
+    ``{{ cookiecutter.* }}`` directory, ``hooks`` directory, or its
+    ``cookiecutter.json`` file is modified.
+
+    A renderer can be shared by threads. Call `close`, or use the renderer
+    as a context manager, to shut down its thread pool.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        cache_size: int = 32,
+        default_context: Optional[Dict[str, Any]] = None,
+    ):
+        super().__init__()
+        self._log = logging.getLogger(__name__)
+        self.max_workers = max_workers
+        self.cache_size = cache_size
+        self._default_context = default_context
+        self._projects: OrderedDict[str, _CompiledProject] = OrderedDict()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.RLock()
+
+    def __enter__(self) -> ProjectTemplateRenderer:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Shut down the renderer's thread pool."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    @property
+    def default_context(self) -> Dict[str, Any]:
+        """Values that override the defaults in ``cookiecutter.json`` files
+        (`dict`).
+        """
+        if self._default_context is None:
+            self._default_context = get_user_config()["default_context"]
+        return self._default_context
+
+    def render(
+        self,
+        template_dir: str,
+        output_dir: str = ".",
+        use_defaults: bool = False,
+        extra_context: Optional[Dict[str, Any]] = None,
+        overwrite_if_exists: bool = False,
+        accept_hooks: bool = True,
+    ) -> str:
+        """Generate a project from a project template.
+
+        Parameters
+        ----------
+        template_dir : `str`
+            Path of the project template's directory, which contains a
+            ``cookiecutter.json`` file and a ``{{ cookiecutter.* }}``
+            directory.
+        output_dir : `str`, optional
+            Directory to generate the project in.
+        use_defaults : `bool`, optional
+            Disables interactive prompting for context variables, if `True`.
+        extra_context : `dict`, optional
+            Optional dictionary of key-value pairs that override defaults in
+            the ``cookiecutter.json`` file.
+        overwrite_if_exists : `bool`, optional
+            If `True`, files of an existing project directory are
+            overwritten. Otherwise, an existing project directory is an
+            error.
+        accept_hooks : `bool`, optional
+            If `True`, the template's ``pre_gen_project`` and
+            ``post_gen_project`` hooks are run.
+
+        Returns
+        -------
+        project_dir : `str`
+            Path of the generated project.
+
+        Raises
+        ------
+        cookiecutter.exceptions.OutputDirExistsException
+            Raised if the project directory exists and
+            ``overwrite_if_exists`` is `False`.
+        cookiecutter.exceptions.UndefinedVariableInTemplate
+            Raised if a template uses an undefined variable.
+        cookiecutter.exceptions.FailedHookException
+            Raised if a hook fails.
+
+        See also
+        --------
+        render_project_template
+        """
+        template_name = os.path.basename(os.path.abspath(template_dir))
+        self._log.debug("Rendering project template %s", template_dir)
+        with span("render.context", template=template_name):
+            context = self._get_context(
+                template_dir, output_dir, use_defaults, extra_context
+            )
+        project = self._get_project(template_dir, context)
+        with span("project.render", template=template_name):
+            return self._render_project(
+                project,
+                template_dir,
+                output_dir,
+                context,
+                overwrite_if_exists,
+                accept_hooks,
+            )
+
+    def _get_context(
+        self,
+        template_dir: str,
+        output_dir: str,
+        use_defaults: bool,
+        extra_context: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """Get the context to render a project with, as ``cookiecutter()``
+        does.
+        """
+        context = generate_context(
+            context_file=os.path.join(template_dir, "cookiecutter.json"),
+            default_context=self.default_context,
+            extra_context=extra_context,
+        )
+        fields = context["cookiecutter"]
+        if "template" in fields or "templates" in fields:
+            raise ValueError(
+                "Nested templates aren't supported: {0}".format(template_dir)
+            )
+        context["_cookiecutter"] = {
+            key: value
+            for key, value in fields.items()
+            if not key.startswith("_")
+        }
+        if fields:
+            fields.update(prompt_for_config(context, use_defaults))
+        fields["_template"] = template_dir
+        fields["_output_dir"] = os.path.abspath(output_dir)
+        fields["_repo_dir"] = template_dir
+        fields["_checkout"] = None
+        return context
+
+    def _get_project(
+        self, template_dir: str, context: Dict[str, Any]
+    ) -> _CompiledProject:
+        """Get the compiled form of a project template, compiling it if
+        necessary.
+
+        Parameters
+        ----------
+        template_dir : `str`
+            Path of the project template's directory.
+        context : `dict`
+            The context that the project is rendered with. Templates are
+            compiled with the ``_extensions``, ``_jinja2_env_vars``, and
+            ``_copy_without_render`` fields of the context; templates that
+            were compiled with different fields aren't reused.
+
+        Returns
+        -------
+        project
+            The compiled project template.
+        """
+        template_dir = os.path.abspath(template_dir)
+        settings = _get_settings(context)
+        with self._lock:
+            project = self._projects.get(template_dir)
+            if project is not None and project.settings == settings:
+                if project.signature == _get_signature(
+                    template_dir, project.project_dirname
+                ):
+                    self._projects.move_to_end(template_dir)
+                    return project
+            elif project is not None:
+                # A one-off variant, such as for a _copy_without_render
+                # override
+                return _compile_project(template_dir, context)
+
+            project = _compile_project(template_dir, context)
+            self._projects[template_dir] = project
+            self._projects.move_to_end(template_dir)
+            while len(self._projects) > self.cache_size:
+                self._projects.popitem(last=False)
+            return project
+
+    def invalidate(self, template_dir: str) -> None:
+        """Drop the compiled form of a project template.
+
+        Parameters
+        ----------
+        template_dir : `str`
+            Path of the project template's directory.
+        """
+        with self._lock:
+            self._projects.pop(os.path.abspath(template_dir), None)
+
+    def clear(self) -> None:
+        """Drop all compiled project templates."""
+        with self._lock:
+            self._projects.clear()
+
+    def _render_project(
+        self,
+        project: _CompiledProject,
+        template_dir: str,
+        output_dir: str,
+        context: Dict[str, Any],
+        overwrite_if_exists: bool,
+        accept_hooks: bool,
+    ) -> str:
+        try:
+            project_dir = os.path.join(
+                output_dir, project.project_dir_template.render(**context)
+            )
+        except UndefinedError as err:
+            message = "Unable to create project directory '{0}'".format(
+                project.project_dirname
+            )
+            raise UndefinedVariableInTemplate(message, err, context) from err
+        created = _create_dir(project_dir, overwrite_if_exists)
+        project_dir = os.path.abspath(project_dir)
+        self._log.debug("Project directory is %s", project_dir)
+
+        if accept_hooks and "pre_gen_project" in project.hooks:
+            _run_hook(
+                template_dir, "pre_gen_project", project_dir, context, created
+            )
+
+        try:
+            self._render_dirs(
+                project, project_dir, context, overwrite_if_exists
+            )
+            self._render_files(project, project_dir, context)
+        except UndefinedVariableInTemplate:
+            if created:
+                shutil.rmtree(project_dir, ignore_errors=True)
+            raise
+
+        if accept_hooks and "post_gen_project" in project.hooks:
+            _run_hook(
+                template_dir, "post_gen_project", project_dir, context, created
+            )
+        return project_dir
+
+    def _render_dirs(
+        self,
+        project: _CompiledProject,
+        project_dir: str,
+        context: Dict[str, Any],
+        overwrite_if_exists: bool,
+    ) -> None:
+        """Create the project's directories, and copy the directories that
+        aren't rendered.
+        """
+        for entry in project.dirs:
+            try:
+                output_path = os.path.join(
+                    project_dir, entry.path_template.render(**context)
+                )
+            except UndefinedError as err:
+                message = "Unable to create directory '{0}'".format(
+                    os.path.join(
+                        os.path.basename(project_dir), entry.relative_path
+                    )
+                )
+                raise UndefinedVariableInTemplate(
+                    message, err, context
+                ) from err
+            if entry.copy_only:
+                if os.path.isdir(output_path):
+                    shutil.rmtree(output_path)
+                shutil.copytree(
+                    entry.source_path, output_path, copy_function=_copy2
+                )
+            else:
+                _create_dir(output_path, overwrite_if_exists)
+
+    def _render_files(
+        self,
+        project: _CompiledProject,
+        project_dir: str,
+        context: Dict[str, Any],
+    ) -> None:
+        """Render or copy the project's files, in parallel."""
+        newline = context["cookiecutter"].get("_new_lines") or None
+        tasks: List[Callable[[], None]] = [
+            _make_file_task(entry, project_dir, context, newline)
+            for entry in project.files
+        ]
+        if self.max_workers == 1 or len(tasks) < 2:
+            for task in tasks:
+                task()
+            return
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="templatekit-project",
+                )
+            executor = self._executor
+        futures: List[Future] = [executor.submit(task) for task in tasks]
+        try:
+            for future in futures:
+                future.result()
+        finally:
+            # Don't start more files after an error, and let files that are
+            # being written finish before the project is cleaned up
+            for future in futures:
+                future.cancel()
+            wait(futures)
+
+
+def _make_file_task(
+    entry: _FileEntry,
+    project_dir: str,
+    context: Dict[str, Any],
+    newline: Optional[str],
+) -> Callable[[], None]:
+    """Make a function that renders or copies a file of a project."""
+
+    def task() -> None:
+        try:
+            output_path = os.path.join(
+                project_dir, entry.path_template.render(**context)
+            )
+            if os.path.isdir(output_path):
+                # The file's name rendered as empty
+                return
+            if entry.content_template is None:
+                copy_file(entry.source_path, output_path)
+                return
+            rendered_text = entry.content_template.render(**context)
+        except UndefinedError as err:
+            message = "Unable to create file '{0}'".format(entry.relative_path)
+            raise UndefinedVariableInTemplate(message, err, context) from err
+        with open(
+            output_path,
+            "w",
+            encoding="utf-8",
+            newline=newline or entry.newline,
+        ) as f:
+            f.write(rendered_text)
+        shutil.copymode(entry.source_path, output_path)
+
+    return task
+
+
+def _create_dir(path: str, overwrite_if_exists: bool) -> bool:
+    """Create a directory of a project, returning `True` if it was created
+    or `False` if it exists and ``overwrite_if_exists`` is `True`.
+    """
+    if os.path.exists(path):
+        if not overwrite_if_exists:
+            raise OutputDirExistsException(
+                'Error: "{0}" directory already exists'.format(path)
+            )
+        return False
+    os.makedirs(path, exist_ok=True)
+    return True
+
+
+def _run_hook(
+    template_dir: str,
+    hook_name: str,
+    project_dir: str,
+    context: Dict[str, Any],
+    delete_project_on_failure: bool,
+) -> None:
+    template_name = os.path.basename(os.path.abspath(template_dir))
+    with span("project.hook", template=template_name):
+        with _hook_lock:
+            run_hook_from_repo_dir(
+                template_dir,
+                hook_name,
+                project_dir,
+                context,
+                delete_project_on_failure,
+            )
+
+
+def _get_settings(context: Dict[str, Any]) -> str:
+    fields = context["cookiecutter"]
+    return json.dumps(
+        [fields.get(key) for key in _SETTINGS_KEYS],
+        sort_keys=True,
+        default=str,
+    )
+
+
+def _compile_project(
+    template_dir: str, context: Dict[str, Any]
+) -> _CompiledProject:
+    """Compile the path and content templates of a project template."""
+    template_name = os.path.basename(template_dir)
+    with span("project.compile", template=template_name):
+        fields = context["cookiecutter"]
+        with _repo_on_sys_path(template_dir):
+            env = StrictEnvironment(
+                context=context,
+                keep_trailing_newline=True,
+                **fields.get("_jinja2_env_vars", {}),
+            )
+        project_dirname = _find_project_dirname(template_dir, env)
+        project_path = os.path.join(template_dir, project_dirname)
+        signature = _get_signature(template_dir, project_dirname)
+        env.loader = FileSystemLoader(
+            [project_path, os.path.join(project_path, "..", "templates")]
+        )
+
+        dirs: List[_DirEntry] = []
+        files: List[_FileEntry] = []
+        for root, dirnames, filenames in os.walk(project_path):
+            relative_root = os.path.relpath(root, project_path)
+            render_dirnames = []
+            copy_dirnames = []
+            for dirname in sorted(dirnames):
+                relative_path = os.path.normpath(
+                    os.path.join(relative_root, dirname)
+                )
+                if _is_copy_only_path(relative_path, fields):
+                    copy_dirnames.append(dirname)
+                else:
+                    render_dirnames.append(dirname)
+            for dirname in copy_dirnames + render_dirnames:
+                relative_path = os.path.normpath(
+                    os.path.join(relative_root, dirname)
+                )
+                dirs.append(
+                    _DirEntry(
+                        source_path=os.path.join(root, dirname),
+                        path_template=env.from_string(relative_path),
+                        relative_path=relative_path,
+                        copy_only=dirname in copy_dirnames,
+                    )
+                )
+            # Copied directories aren't walked
+            dirnames[:] = render_dirnames
+
+            for filename in sorted(filenames):
+                relative_path = os.path.normpath(
+                    os.path.join(relative_root, filename)
+                )
+                files.append(
+                    _compile_file(env, root, relative_path, fields, filename)
+                )
+
+        return _CompiledProject(
+            project_dir_template=env.from_string(project_dirname),
+            project_dirname=project_dirname,
+            dirs=dirs,
+            files=files,
+            hooks=_find_hooks(template_dir),
+            settings=_get_settings(context),
+            signature=signature,
+        )
+
+
+def _compile_file(
+    env: StrictEnvironment,
+    root: str,
+    relative_path: str,
+    fields: Dict[str, Any],
+    filename: str,
+) -> _FileEntry:
+    source_path = os.path.join(root, filename)
+    path_template = env.from_string(relative_path)
+    if _is_copy_only_path(relative_path, fields) or is_binary(source_path):
+        return _FileEntry(
+            source_path=source_path,
+            path_template=path_template,
+            relative_path=relative_path,
+            content_template=None,
+            newline=None,
+        )
+    try:
+        content_template = env.get_template(
+            relative_path.replace(os.path.sep, "/")
+        )
+    except TemplateSyntaxError as exception:
+        # Disable translated so that printed exception contains verbose
+        # information about syntax error location
+        exception.translated = False
+        raise
+    # Use the source file's newline (the first one, if there are several)
+    with open(source_path, encoding="utf-8") as f:
+        f.readline()
+        newlines = f.newlines
+    newline = newlines[0] if isinstance(newlines, tuple) else newlines
+    return _FileEntry(
+        source_path=source_path,
+        path_template=path_template,
+        relative_path=relative_path,
+        content_template=content_template,
+        newline=newline,
+    )
+
+
+def _find_project_dirname(template_dir: str, env: StrictEnvironment) -> str:
+    """Find the ``{{ cookiecutter.* }}`` directory of a project template."""
+    for name in sorted(os.listdir(template_dir)):
+        if (
+            "cookiecutter" in name
+            and env.variable_start_string in name
+            and env.variable_end_string in name
+        ):
+            return name
+    raise NonTemplatedInputDirException
+
+
+def _find_hooks(template_dir: str) -> Tuple[str, ...]:
+    hooks_dir = os.path.join(template_dir, "hooks")
+    if not os.path.isdir(hooks_dir):
+        return ()
+    filenames = os.listdir(hooks_dir)
+    return tuple(
+        hook_name
+        for hook_name in _HOOK_NAMES
+        if any(valid_hook(filename, hook_name) for filename in filenames)
+    )
+
+
+def _is_copy_only_path(path: str, fields: Dict[str, Any]) -> bool:
+    return any(
+        fnmatch.fnmatch(path, pattern)
+        for pattern in fields.get("_copy_without_render", ())
+    )
+
+
+def _get_signature(
+    template_dir: str, project_dirname: str
+) -> Tuple[Tuple[str, int, int], ...]:
+    """Get the paths, modification times, and sizes of the files that a
+    compiled project template depends on.
+    """
+    signature: List[Tuple[str, int, int]] = []
+    paths = [os.path.join(template_dir, "cookiecutter.json")]
+    for dirname in (project_dirname, "hooks"):
+        for root, dirnames, filenames in os.walk(
+            os.path.join(template_dir, dirname)
+        ):
+            paths.append(root)
+            paths.extend(os.path.join(root, name) for name in filenames)
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        signature.append((path, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+@contextlib.contextmanager
+def _repo_on_sys_path(template_dir: str) -> Iterator[None]:
+    """Add a template directory to `sys.path`, so that Jinja extensions in
+    the directory can be imported.
+    """
+    with _sys_path_lock:
+        original_path = list(sys.path)
+        sys.path.append(template_dir)
+        try:
+            yield
+        finally:
+            sys.path[:] = original_path
+
+
+def copy_file(source_path: str, output_path: str) -> None:
+    """Copy a file's content and permission bits, in the kernel.
+
+    Parameters
+    ----------
+    source_path : `str`
+        Path of the file to copy.
+    output_path : `str`
+        Path of the copy. An existing file is replaced.
+
+    Notes
+    -----
+    The content is copied with ``os.copy_file_range`` where it's supported,
+    which lets file systems share or copy data without passing it through
+    user space, and otherwise with `shutil.copyfile` (which uses
+    ``os.sendfile`` on Linux).
+    """
+    if not _copy_file_range(source_path, output_path):
+        shutil.copyfile(source_path, output_path)
+    shutil.copymode(source_path, output_path)
+
+
+def _copy_file_range(source_path: str, output_path: str) -> bool:
+    """Copy a file's content with ``os.copy_file_range``, returning `False`
+    if it isn't supported for the files.
+    """
+    copy_file_range = getattr(os, "copy_file_range", None)
+    if copy_file_range is None:
+        return False
+    if os.path.exists(output_path) and os.path.samefile(
+        source_path, output_path
+    ):
+        raise shutil.SameFileError(
+            "{0!r} and {1!r} are the same file".format(
+                source_path, output_path
+            )
+        )
+    try:
+        with open(source_path, "rb") as source, open(
+            output_path, "wb"
+        ) as output:
+            while copy_file_range(
+                source.fileno(), output.fileno(), _CHUNK_SIZE
+            ):
+                pass
+    except OSError as err:
+        if err.errno in (
+            errno.EXDEV,
+            errno.ENOSYS,
+            errno.EINVAL,
+            errno.EOPNOTSUPP,
+            errno.EBADF,
+            errno.EPERM,
+        ):
+            return False
+        raise
+    return True
+
+
+def _copy2(source_path: str, output_path: str) -> None:
+    """Copy a file and its metadata, like `shutil.copy2`."""
+    copy_file(source_path, output_path)
+    shutil.copystat(source_path, output_path)
+
+
+_default_renderer: Optional[ProjectTemplateRenderer] = None
+_default_renderer_lock = threading.Lock()
+
+
+def get_default_renderer() -> ProjectTemplateRenderer:
+    """Get the renderer that is shared by `render_project_template`.
+
+    Returns
+    -------
+    renderer : `ProjectTemplateRenderer`
+        The shared renderer, which is created on first use.
+    """
+    global _default_renderer
+    with _default_renderer_lock:
+        if _default_renderer is None:
+            _default_renderer = ProjectTemplateRenderer()
+        return _default_renderer
+
+
+def render_project_template(
+    template_dir: str,
+    output_dir: str = ".",
+    use_defaults: bool = False,
+    extra_context: Optional[Dict[str, Any]] = None,
+    overwrite_if_exists: bool = False,
+) -> str:
+    """Generate a project from a project template, with a shared renderer
+    that keeps compiled templates.
+
+    Parameters
+    ----------
+    template_dir : `str`
+        Path of the project template's directory.
+    output_dir : `str`, optional
+        Directory to generate the project in.
+    use_defaults : `bool`, optional
+        Disables interactive prompting for context variables, if `True`.
+    extra_context : `dict`, optional
+        Optional dictionary of key-value pairs that override defaults in the
+        ``cookiecutter.json`` file.
+    overwrite_if_exists : `bool`, optional
+        If `True`, files of an existing project directory are overwritten.
+
+    Returns
+    -------
+    project_dir : `str`
+        Path of the generated project.
+
+    See also
+    --------
+    ProjectTemplateRenderer.render
+    """
+    return get_default_renderer().render(
+        template_dir,
+        output_dir=output_dir,
+        use_defaults=use_defaults,
+        extra_context=extra_context,
+        overwrite_if_exists=overwrite_if_exists,
+    )
@@ -8,22 +8,57 @@ __all__ = (
     "ProjectTemplate",
     "BaseTemplate",
     "TemplateConfig",
+    "TemplateDirContents",
+    "scan_template_dir",
+    "get_template_shard",
+    "select_shard",
 )
 
 import collections.abc
 import functools
+import hashlib
 import itertools
 import json
 import logging
 import os
 import subprocess
-from copy import deepcopy
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, Iterator, List, Optional
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
+
+from .cache import MetadataCache
+from .configvalidator import CompiledValidator, freeze, thaw
+from .gitstatus import GitStatus, get_changed_paths, get_git_status
+from .instrumentation import span
+
+if TYPE_CHECKING:
+    import cerberus
+    import git
+
+    from .index import TemplateIndex
 
-import cerberus
-import git
-import yaml
+# asyncio, Cerberus, GitPython, and PyYAML are imported when they're first
+# needed, rather than here, so that importing this module (and starting the
+# templatekit command) is fast.
+
+_T = TypeVar("_T", bound="BaseTemplate")
 
 
 class Repo(object):
@@ -34,12 +69,61 @@ class Repo(object):
     root : `str`
         Path to the root directory of the template repository. Use ``'.'``
         as the current working directory.
+    cache : `templatekit.cache.MetadataCache`, optional
+        A persistent cache of template metadata. When set, templates are
+        loaded from the cache if their ``templatekit.yaml`` and
+        ``cookiecutter.json`` files are unchanged. The cache can also be set
+        later through the `cache` attribute.
+    workers : `int`, optional
+        If set, templates are loaded (including parsing and validating their
+        configuration) on a pool of this many threads while iterating over
+        the repository.
+    executor : `concurrent.futures.Executor`, optional
+        An existing executor to load templates with, instead of creating a
+        thread pool from ``workers``. The executor is not shut down by the
+        repository.
+    index : `templatekit.index.TemplateIndex`, optional
+        A precomputed index of the repository's templates. When set,
+        templates are created from the index, without reading template
+        directories (see `from_index`).
+
+    Notes
+    -----
+    Without ``workers`` or ``executor``, templates are loaded lazily, one at
+    a time, and their configurations are parsed on first access. With
+    either option, the templates in each of the ``file_templates`` and
+    ``project_templates`` directories are loaded in parallel, but the
+    iteration order and any warnings about unrecognizable directories are
+    the same as for sequential loading.
+
+    Name lookups (``repo[name]``, ``name in repo``, and iterating over
+    names) and `reload_template` can be used from several threads, such as
+    request handlers and a `templatekit.watch.RepoWatcher`.
     """
 
-    def __init__(self, root: str):
+    def __init__(
+        self,
+        root: str,
+        cache: Optional[MetadataCache] = None,
+        workers: Optional[int] = None,
+        executor: Optional[Executor] = None,
+        index: Optional[TemplateIndex] = None,
+    ):
         super().__init__()
         self._log = logging.getLogger(__name__)
+        self.cache = cache
+        self.workers = workers
+        self._executor = executor
+        self.index = index
+        self._indexed_templates: Optional[List[BaseTemplate]] = None
         self._gitrepo: Optional[git.Repo] = None
+        self._template_index: Optional[
+            Dict[str, Tuple[BaseTemplate, int]]
+        ] = None
+        self._template_index_mtimes: Optional[Tuple[int, int]] = None
+        # Guards _template_index and _template_index_mtimes, which request
+        # threads read while a watcher thread reloads templates
+        self._lock = threading.RLock()
         self.root = root
 
     @classmethod
@@ -81,6 +165,44 @@ class Repo(object):
         )
         raise OSError(message.format(original_dirname))
 
+    @classmethod
+    def from_index(cls, path: str, root: Optional[str] = None) -> Repo:
+        """Create a Repo instance from a precomputed index file, as written
+        by ``templatekit index build``.
+
+        Parameters
+        ----------
+        path : `str`
+            Path of the index file.
+        root : `str`, optional
+            Path of the template repository's root directory. The default is
+            the directory that contains the index file, or its parent if
+            that's a ``.templatekit-cache`` directory (as for the default
+            index path).
+
+        Returns
+        -------
+        repo : `Repo`
+            The Repo instance. Iterating over it and looking up templates by
+            name use the index, without reading template directories.
+
+        Raises
+        ------
+        ValueError
+            Raised if the file isn't a template index, or has an unsupported
+            format version.
+
+        Notes
+        -----
+        The index isn't checked against the template directories when it's
+        loaded. Use ``repo.index.get_stale_templates()`` to check whether it
+        is current.
+        """
+        from .index import TemplateIndex
+
+        index = TemplateIndex.read(path, root=root)
+        return cls(index.root, index=index)
+
     @staticmethod
     def _is_repo_dir(dirname: str) -> bool:
         if not os.path.isdir(os.path.join(dirname, "file_templates")):
@@ -104,19 +226,75 @@ class Repo(object):
     def __iter__(self) -> Iterator[str]:
         """Iterate over the names of all templates in the repository.
 
-        ``__contains__`` delegates to this method.
+        The names are those in the index when iteration starts, even if
+        templates are reloaded during iteration.
         """
-        for template in self.iter_templates():
-            yield template.name
+        with self._lock:
+            names = list(self._get_template_index())
+        return iter(names)
+
+    def __contains__(self, key: object) -> bool:
+        """Test if a file or project template exists, by name."""
+        with self._lock:
+            return key in self._get_template_index()
 
     def __getitem__(self, key: str) -> BaseTemplate:
-        """Get either a file or project template by name."""
-        for template in self.iter_templates():
-            if template.name == key:
+        """Get either a file or project template by name.
+
+        Templates are looked up in an index of the repository that is built
+        on first access. See `refresh` for details on how the index is kept
+        current.
+        """
+        with self._lock:
+            index = self._get_template_index()
+            try:
+                template, dir_mtime = index[key]
+            except KeyError:
+                message = "Template {0!r} not found".format(key)
+                raise KeyError(message) from None
+            if self.index is not None:
+                # Templates from a precomputed index aren't reloaded
                 return template
 
-        message = "Template {0!r} not found".format(key)
-        raise KeyError(message)
+            # Reload the template if its own directory changed (for example,
+            # if templatekit.yaml was replaced) since it was indexed.
+            try:
+                current_mtime = os.stat(template.path).st_mtime_ns
+                if current_mtime != dir_mtime:
+                    template = template.__class__(
+                        template.path, cache=self.cache
+                    )
+                    index[key] = (template, current_mtime)
+            except (OSError, ValueError):
+                # The template was removed or is no longer recognizable
+                self.refresh()
+                return self[key]
+            return template
+
+    def items(self) -> List[Tuple[str, BaseTemplate]]:
+        """Get the names and templates of all templates in the repository.
+
+        Returns
+        -------
+        items : `list` of `tuple`
+            Pairs of template names and `FileTemplate` or `ProjectTemplate`
+            objects, in the same order as iterating over the repository.
+
+        Notes
+        -----
+        Unlike iterating over the names and looking each template up, the
+        templates are taken from a single state of the index, even if
+        another thread reloads templates at the same time.
+        """
+        with self._lock:
+            items: List[Tuple[str, BaseTemplate]] = []
+            for name in list(self._get_template_index()):
+                try:
+                    items.append((name, self[name]))
+                except KeyError:
+                    # The template was removed since the index was built
+                    continue
+            return items
 
     @property
     def file_templates_dirname(self) -> str:
@@ -156,17 +334,21 @@ class Repo(object):
         template : `FileTemplate`
             Template object.
         """
-        dir_items = self._list_directory_items(self.file_templates_dirname)
-        for template_dir in dir_items:
-            try:
-                template = FileTemplate(template_dir)
-            except (OSError, ValueError) as err:
+        if self.index is not None:
+            for indexed_template in self._get_indexed_templates():
+                if isinstance(indexed_template, FileTemplate):
+                    yield indexed_template
+            return
+        dir_items = self.list_template_dirs(self.file_templates_dirname)
+        results = self._load_templates(FileTemplate, dir_items)
+        for template_dir, template in zip(dir_items, results):
+            if isinstance(template, Exception):
                 # Not a template directory
                 message = (
                     "Found file_template directory {0!r} but it is not "
                     "a recognizable template. {1!s}"
                 )
-                logging.warning(message.format(template_dir, err))
+                logging.warning(message.format(template_dir, template))
                 continue
             yield template
 
@@ -181,44 +363,406 @@ class Repo(object):
         template : `ProjectTemplate`
             Template object.
         """
-        dir_items = self._list_directory_items(self.project_templates_dirname)
-        for template_dir in dir_items:
-            try:
-                template = ProjectTemplate(template_dir)
-            except (OSError, ValueError) as err:
+        if self.index is not None:
+            for indexed_template in self._get_indexed_templates():
+                if isinstance(indexed_template, ProjectTemplate):
+                    yield indexed_template
+            return
+        dir_items = self.list_template_dirs(self.project_templates_dirname)
+        results = self._load_templates(ProjectTemplate, dir_items)
+        for template_dir, template in zip(dir_items, results):
+            if isinstance(template, Exception):
                 # Not a template directory
                 message = (
                     "Found project_template directory {0!r} but it is "
                     "not a recognizable template. {1!s}"
                 )
-                logging.warning(message.format(template_dir, err))
+                logging.warning(message.format(template_dir, template))
                 continue
             yield template
 
-    def _list_directory_items(self, dirname: str) -> List[str]:
-        fs_items = os.listdir(dirname)
+    async def aiter_templates(
+        self, max_concurrent_loads: int = 8
+    ) -> AsyncIterator[BaseTemplate]:
+        """Asynchronously iterate over all templates in the repository (both
+        file and project).
+
+        Parameters
+        ----------
+        max_concurrent_loads : `int`, optional
+            Maximum number of templates that are loaded at the same time.
+
+        Yields
+        ------
+        template : `FileTemplate` or `ProjectTemplate`
+            Template object, with its configuration loaded.
+
+        Notes
+        -----
+        Template directories are listed, and templates are loaded (including
+        their configurations), on the repository's ``executor``, or the
+        event loop's default executor. Templates are yielded in the same
+        order as `iter_templates`. Templates of a repository with a
+        precomputed `index` are yielded without loading.
+        """
+        if self.index is not None:
+            for indexed_template in self.iter_templates():
+                yield indexed_template
+            return
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(max_concurrent_loads)
+
+        async def load(
+            template_class: Type[BaseTemplate], path: str
+        ) -> Union[BaseTemplate, OSError, ValueError]:
+            async with semaphore:
+                return await loop.run_in_executor(
+                    self._executor,
+                    functools.partial(
+                        _load_template,
+                        template_class,
+                        path,
+                        cache=self.cache,
+                        preload=True,
+                    ),
+                )
+
+        template_dirs: List[Tuple[Type[BaseTemplate], str, str]] = [
+            (ProjectTemplate, self.project_templates_dirname, "project"),
+            (FileTemplate, self.file_templates_dirname, "file"),
+        ]
+        for template_class, templates_dirname, kind in template_dirs:
+            dir_items = await loop.run_in_executor(
+                self._executor, self.list_template_dirs, templates_dirname
+            )
+            tasks = [
+                asyncio.ensure_future(load(template_class, template_dir))
+                for template_dir in dir_items
+            ]
+            try:
+                for template_dir, task in zip(dir_items, tasks):
+                    template = await task
+                    if isinstance(template, Exception):
+                        # Not a template directory
+                        message = (
+                            "Found {0}_template directory {1!r} but it is "
+                            "not a recognizable template. {2!s}"
+                        )
+                        logging.warning(
+                            message.format(kind, template_dir, template)
+                        )
+                        continue
+                    yield template
+            finally:
+                # Stop loading if iteration stopped early
+                for task in tasks:
+                    task.cancel()
+
+    def _load_templates(
+        self, template_class: Type[_T], dir_items: List[str]
+    ) -> Iterator[Union[_T, OSError, ValueError]]:
+        """Load templates from directories, yielding either the template
+        or the exception raised if the directory isn't a recognizable
+        template, in the same order as ``dir_items``.
+        """
+        load = functools.partial(
+            _load_template,
+            template_class,
+            cache=self.cache,
+            preload=self._executor is not None or self.workers is not None,
+        )
+        if self._executor is not None:
+            yield from self._executor.map(load, dir_items)
+        elif self.workers is not None:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                yield from executor.map(load, dir_items)
+        else:
+            yield from map(load, dir_items)
+
+    def _get_indexed_templates(self) -> List[BaseTemplate]:
+        """Get the templates in the precomputed index, creating them on
+        first access.
+        """
+        assert self.index is not None
+        if self._indexed_templates is None:
+            self._indexed_templates = [
+                self.index.create_template(entry) for entry in self.index
+            ]
+        return self._indexed_templates
+
+    def refresh(self) -> None:
+        """Rebuild the index of templates used for name lookups.
+
+        Notes
+        -----
+        The index is built the first time a template is looked up by name
+        (``repo[name]``, ``name in repo``, or iterating over the repository).
+        It is rebuilt automatically when the modification time of either the
+        ``file_templates`` or ``project_templates`` directory changes (that
+        is, when a template is added, removed, or renamed), and individual
+        templates are reloaded when their own directory's modification time
+        changes. Call this method to force a rebuild after changes that don't
+        affect directory modification times, such as editing a
+        ``templatekit.yaml`` file in place.
+
+        For a repository with a precomputed `index`, the templates are
+        recreated from the index, and the template directories aren't read.
+        """
+        with self._lock:
+            self._indexed_templates = None
+            self._template_index = None
+            self._template_index_mtimes = None
+            self._get_template_index()
+
+    def _get_template_index(self) -> Dict[str, Tuple[BaseTemplate, int]]:
+        """Get the name-to-template index, rebuilding it if the template
+        directories changed since it was built.
+
+        Callers must hold the repository's lock while they use the index.
+        """
+        if self.index is not None:
+            if self._template_index is None:
+                self._template_index = {}
+                for template in self.iter_templates():
+                    self._template_index.setdefault(
+                        template.name, (template, 0)
+                    )
+            return self._template_index
+        mtimes = self._get_template_dir_mtimes()
+        if (
+            self._template_index is None
+            or mtimes != self._template_index_mtimes
+        ):
+            self._log.debug("Indexing templates in %s", self.root)
+            index: Dict[str, Tuple[BaseTemplate, int]] = {}
+            for template in self.iter_templates():
+                # Project templates take precedence over file templates with
+                # the same name, matching the iter_templates order.
+                if template.name not in index:
+                    dir_mtime = os.stat(template.path).st_mtime_ns
+                    index[template.name] = (template, dir_mtime)
+            self._template_index = index
+            self._template_index_mtimes = mtimes
+        return self._template_index
+
+    def reload_template(self, name: str) -> Optional[BaseTemplate]:
+        """Reload a single template that changed, was added, or was removed,
+        without reloading the other templates.
+
+        Parameters
+        ----------
+        name : `str`
+            Name of the template (its directory name).
+
+        Returns
+        -------
+        template : `FileTemplate`, `ProjectTemplate`, or `None`
+            The reloaded template, with its configuration loaded, or `None`
+            if there is no longer a recognizable template with this name.
+
+        Raises
+        ------
+        ValueError
+            Raised if the repository was created from a precomputed index.
+
+        Notes
+        -----
+        Reloading a template also records the current modification times of
+        the ``file_templates`` and ``project_templates`` directories, so that
+        adding or removing one template doesn't rebuild the whole index.
+        Reload each template that changed, as `templatekit.watch.RepoWatcher`
+        does.
+
+        The template is loaded before the index is locked, and the index is
+        then replaced rather than changed in place, so other threads can
+        look up templates while templates are reloaded.
+        """
+        if self.index is not None:
+            raise ValueError(
+                "Templates of a repository that is loaded from an index "
+                "can't be reloaded. Rebuild the index instead."
+            )
+        with self._lock:
+            if self._template_index is None:
+                # Nothing is loaded yet
+                return self[name] if name in self else None
+
+        template: Optional[BaseTemplate] = None
+        dir_mtime = 0
+        template_dirs: List[Tuple[Type[BaseTemplate], str]] = [
+            (ProjectTemplate, self.project_templates_dirname),
+            (FileTemplate, self.file_templates_dirname),
+        ]
+        for template_class, templates_dirname in template_dirs:
+            result = _load_template(
+                template_class,
+                os.path.join(templates_dirname, name),
+                cache=self.cache,
+                preload=True,
+            )
+            if isinstance(result, Exception):
+                continue
+            try:
+                dir_mtime = os.stat(result.path).st_mtime_ns
+            except OSError:
+                continue
+            template = result
+            break
+
+        mtimes = self._get_template_dir_mtimes()
+        with self._lock:
+            # refresh() rebuilds the index before it releases the lock
+            assert self._template_index is not None
+            index = dict(self._template_index)
+            if template is None:
+                self._log.debug("Removing template %s from the index", name)
+                index.pop(name, None)
+            else:
+                self._log.debug("Reloading template %s", template.path)
+                is_new = name not in index
+                index[name] = (template, dir_mtime)
+                if is_new:
+                    # Keep the iter_templates order
+                    index = dict(
+                        sorted(
+                            index.items(),
+                            key=lambda item: (
+                                not isinstance(item[1][0], ProjectTemplate),
+                                item[1][0].path,
+                            ),
+                        )
+                    )
+            self._template_index = index
+            self._template_index_mtimes = mtimes
+        return template
+
+    def _get_template_dir_mtimes(self) -> Tuple[int, int]:
+        return (
+            os.stat(self.project_templates_dirname).st_mtime_ns,
+            os.stat(self.file_templates_dirname).st_mtime_ns,
+        )
+
+    def list_template_dirs(self, templates_dirname: str) -> List[str]:
+        """List the candidate template directories in a directory of
+        templates, without checking whether they are recognizable templates.
+
+        Parameters
+        ----------
+        templates_dirname : `str`
+            Path of the directory, such as `file_templates_dirname` or
+            `project_templates_dirname`.
+
+        Returns
+        -------
+        paths : `list` of `str`
+            Sorted paths of the subdirectories.
+        """
+        # DirEntry.is_dir uses the file type from the directory listing
+        # itself, so this doesn't stat each item on most platforms.
+        with os.scandir(templates_dirname) as entries:
+            fs_items = [entry.path for entry in entries if entry.is_dir()]
         fs_items.sort()
-        fs_items = [os.path.join(dirname, item) for item in fs_items]
-        return [fs_item for fs_item in fs_items if os.path.isdir(fs_item)]
+        return fs_items
 
-    def build(self) -> subprocess.CompletedProcess:
+    def build(
+        self,
+        targets: Optional[Sequence[str]] = None,
+        jobs: Optional[int] = None,
+    ) -> subprocess.CompletedProcess:
         """Run a scons build of the template repository.
 
         This method runs the ``scons`` command, and thus regenerates examples
         for each template.
 
+        Parameters
+        ----------
+        targets : sequence of `str`, optional
+            Scons targets to build, such as template directories relative to
+            the repository root. By default, scons builds its default
+            targets.
+        jobs : `int`, optional
+            Number of parallel scons jobs (the ``-j`` option of scons).
+
         Returns
         -------
         result : `subprocess.CompletedProcess`
             The result of the ``scons`` execution. See
             `subprocess.CompletedProcess` for details.
         """
-        return subprocess.run(["scons"], shell=True, cwd=self.root)
+        args = ["scons"]
+        if jobs is not None:
+            args.extend(["-j", str(jobs)])
+        if targets is not None:
+            args.extend(targets)
+        return subprocess.run(args, cwd=self.root)
+
+    def get_changed_templates(self, since: str) -> List[BaseTemplate]:
+        """Get the templates with files that changed since a Git ref.
+
+        Parameters
+        ----------
+        since : `str`
+            A Git ref, such as a branch, tag, or commit. Files are compared
+            between this ref and the working tree.
+
+        Returns
+        -------
+        templates : `list` of `BaseTemplate`
+            The templates with changed files, project templates first, sorted
+            by name. Changed files outside of a template directory, and
+            templates that were removed, are not included.
+        """
+        changed_paths = get_changed_paths(self.root, since)
+        return self.get_templates_for_paths(changed_paths)
+
+    def get_templates_for_paths(
+        self, paths: Sequence[str]
+    ) -> List[BaseTemplate]:
+        """Get the templates that contain files.
+
+        Parameters
+        ----------
+        paths : sequence of `str`
+            File paths, relative to the repository root.
+
+        Returns
+        -------
+        templates : `list` of `BaseTemplate`
+            The templates that contain any of the files, project templates
+            first, sorted by name.
+        """
+        template_classes: Dict[str, Type[BaseTemplate]] = {
+            "project_templates": ProjectTemplate,
+            "file_templates": FileTemplate,
+        }
+        template_dirs = set()
+        for path in paths:
+            parts = path.split("/")
+            if len(parts) >= 3 and parts[0] in template_classes:
+                template_dirs.add((parts[0], parts[1]))
+
+        templates: List[BaseTemplate] = []
+        for templates_dirname, name in sorted(
+            template_dirs, key=lambda d: (d[0] != "project_templates", d[1])
+        ):
+            template_class = template_classes[templates_dirname]
+            template_dir = os.path.join(self.root, templates_dirname, name)
+            try:
+                template = template_class(template_dir, cache=self.cache)
+            except (OSError, ValueError):
+                # Removed, or not a template directory
+                continue
+            templates.append(template)
+        return templates
 
     @property
     def gitrepo(self) -> git.Repo:
         """The template repository's Git repository (`git.Repo`)."""
         if self._gitrepo is None:
+            import git
+
             self._gitrepo = git.repo.base.Repo(path=self.root)
         return self._gitrepo
 
@@ -245,6 +789,28 @@ class Repo(object):
         """
         return self.gitrepo.untracked_files
 
+    def get_git_status(
+        self, ignore: Sequence[str] = (), paths: Sequence[str] = ()
+    ) -> GitStatus:
+        """Get the untracked files and uncommitted changes of the template
+        repository with a single ``git status`` command.
+
+        Parameters
+        ----------
+        ignore : sequence of `str`, optional
+            Glob patterns of repository-relative paths to leave out of the
+            status.
+        paths : sequence of `str`, optional
+            If set, only get the status of these repository-relative files or
+            directories.
+
+        Returns
+        -------
+        status : `templatekit.gitstatus.GitStatus`
+            The status of the repository's working tree.
+        """
+        return get_git_status(self.root, ignore=ignore, paths=paths)
+
     def get_uncommitted_files(self) -> git.diff.DiffIndex:
         """Get a DiffIndex with all changes of the template repository
         compared to the committed state.
@@ -264,6 +830,10 @@ class BaseTemplate(object):
     ----------
     path : `str`
         Path of the template's directory.
+    cache : `templatekit.cache.MetadataCache`, optional
+        A persistent cache of template metadata. If the cache has a current
+        entry for this template, the ``templatekit.yaml`` and
+        ``cookiecutter.json`` files aren't parsed.
 
     Raises
     ------
@@ -272,35 +842,94 @@ class BaseTemplate(object):
     ValueError
         Raised if ``path`` is a directory that does not contain a recognizable
         template.
+
+    Notes
+    -----
+    Templates are loaded lazily: constructing a template only checks that
+    its directory contains ``cookiecutter.json`` and ``templatekit.yaml``
+    files. The `config` and `cookiecutter` data are parsed on first access,
+    and configuration errors are raised at that time.
     """
 
-    def __init__(self, path: str):
+    def __init__(self, path: str, cache: Optional[MetadataCache] = None):
         super().__init__()
         self._cookiecutter_data: Optional[Dict[str, Any]] = None
+        self._config: Optional[TemplateConfig] = None
+        self._config_error: Optional[Exception] = None
+        self._cache = cache
         self._log = logging.getLogger(__name__)
         self.path = os.path.abspath(path)
 
+        with span("template.scan", template=self.name):
+            self._dir_contents = scan_template_dir(self.path)
         self._validate_template_dir()
 
-        with open(self.templatekit_yaml_path, "r") as f:
-            config_data = yaml.safe_load(f)
-        config = TemplateConfig(config_data)
-        # Add default from cookiecutter.json
-        self.config = config.normalize(self)
+    @classmethod
+    def from_metadata(
+        cls: Type[_T],
+        path: str,
+        config: Mapping[str, Any],
+        cookiecutter: Dict[str, Any],
+        jinja_filenames: Sequence[str] = (),
+    ) -> _T:
+        """Create a template from previously loaded metadata, without
+        reading its directory.
+
+        Parameters
+        ----------
+        path : `str`
+            Path of the template's directory.
+        config : `dict`
+            The normalized ``templatekit.yaml`` configuration, such as from
+            `TemplateConfig.to_dict`. It isn't validated again.
+        cookiecutter : `dict`
+            The data from the ``cookiecutter.json`` file.
+        jinja_filenames : sequence of `str`, optional
+            Names of the ``.jinja`` files in the template's directory (for
+            `FileTemplate.source_path`).
+
+        Returns
+        -------
+        template : `BaseTemplate`
+            The template.
+
+        See also
+        --------
+        templatekit.index.TemplateIndex
+        """
+        # Set the attributes that __init__ sets, without scanning the
+        # directory
+        template = cls.__new__(cls)
+        template._cookiecutter_data = cookiecutter
+        template._config = TemplateConfig.from_normalized(config)
+        template._config_error = None
+        template._cache = None
+        template._log = logging.getLogger(__name__)
+        template.path = os.path.abspath(path)
+        template._dir_contents = TemplateDirContents(
+            is_dir=True,
+            has_cookiecutter_json=True,
+            has_templatekit_yaml=True,
+            jinja_filenames=tuple(jinja_filenames),
+        )
+        return template
 
     def _validate_template_dir(self) -> None:
         """Run a quick set of checks that this is in fact a template
         repository, with a cookiecutter.json directory, etc.
+
+        These checks use the directory contents collected when the template
+        was created, rather than stat'ing individual files.
         """
-        if not os.path.isdir(self.path):
+        if not self._dir_contents.is_dir:
             message = "File template directory {} not found.".format(self.path)
             raise ValueError(message)
 
-        if not os.path.isfile(self.cookiecutter_json_path):
+        if not self._dir_contents.has_cookiecutter_json:
             message = "cookiecutter.json not found in {}".format(self.path)
             raise ValueError(message)
 
-        if not os.path.isfile(self.templatekit_yaml_path):
+        if not self._dir_contents.has_templatekit_yaml:
             message = "templatekit.yaml not found in {}".format(self.path)
             raise ValueError(message)
 
@@ -315,6 +944,15 @@ class BaseTemplate(object):
         """Name of the template (`str`)."""
         return os.path.split(self.path)[-1]
 
+    @property
+    def jinja_filenames(self) -> Tuple[str, ...]:
+        """Names of the files in the template's directory with a ``.jinja``
+        extension (`tuple` of `str`).
+
+        The names are found when the template is created.
+        """
+        return self._dir_contents.jinja_filenames
+
     @property
     def templatekit_yaml_path(self) -> str:
         """Path of the templatekit.yaml file (`str`)."""
@@ -329,10 +967,83 @@ class BaseTemplate(object):
     def cookiecutter(self) -> Dict[str, Any]:
         """The data from the ``cookiecutter.json`` file."""
         if self._cookiecutter_data is None:
-            with open(self.cookiecutter_json_path) as f:
-                self._cookiecutter_data = json.load(f)
+            with span("cookiecutter.parse_json", template=self.name):
+                with open(self.cookiecutter_json_path) as f:
+                    self._cookiecutter_data = json.load(f)
         return self._cookiecutter_data
 
+    @property
+    def config(self) -> TemplateConfig:
+        """The normalized configuration from the ``templatekit.yaml`` file
+        (`TemplateConfig`).
+
+        The configuration is loaded, validated, and normalized on first
+        access.
+
+        Raises
+        ------
+        RuntimeError
+            Raised if the ``templatekit.yaml`` file has a configuration syntax
+            error.
+        """
+        if self._config is None:
+            if self._config_error is not None:
+                raise self._config_error
+            self._config = self._load_config()
+        return self._config
+
+    def load(self) -> None:
+        """Load the template's configuration now, rather than on first
+        access.
+
+        Unlike accessing `config`, this method doesn't raise configuration
+        errors. Instead, they are raised when `config` is accessed.
+        """
+        if self._config is not None:
+            return
+        import yaml
+
+        try:
+            self._config = self._load_config()
+        except (RuntimeError, OSError, ValueError, yaml.YAMLError) as err:
+            self._log.debug("Deferring configuration error in %s", self.path)
+            self._config_error = err
+
+    def _load_config(self) -> TemplateConfig:
+        source_paths = [
+            self.templatekit_yaml_path,
+            self.cookiecutter_json_path,
+        ]
+        if self._cache is not None:
+            with span("config.cache_lookup", template=self.name):
+                metadata = self._cache.get(self.path, source_paths)
+            if metadata is not None:
+                self._cookiecutter_data = metadata["cookiecutter"]
+                return TemplateConfig.from_normalized(metadata["config"])
+
+        import yaml
+
+        with span("config.parse_yaml", template=self.name):
+            with open(self.templatekit_yaml_path, "r") as f:
+                config_data = yaml.safe_load(f)
+        with span("config.validate", template=self.name):
+            config = TemplateConfig(config_data)
+        # Add default from cookiecutter.json
+        cookiecutter_data = self.cookiecutter
+        with span("config.normalize", template=self.name):
+            config = config.normalize(self)
+
+        if self._cache is not None:
+            self._cache.set(
+                self.path,
+                source_paths,
+                {
+                    "config": config.to_dict(),
+                    "cookiecutter": cookiecutter_data,
+                },
+            )
+        return config
+
 
 class FileTemplate(BaseTemplate):
     """File template.
@@ -353,12 +1064,13 @@ class FileTemplate(BaseTemplate):
 
     @property
     def source_path(self) -> str:
-        """Path to the template source file (a .jinja extension) (`str`)."""
-        items = os.listdir(self.path)
-        for item in items:
-            if os.path.splitext(item)[-1] == ".jinja":
-                return os.path.join(self.path, item)
-        raise ValueError(f"No template source file found in {self.path}")
+        """Path to the template source file (a .jinja extension) (`str`).
+
+        The source file is found when the template is created.
+        """
+        if not self._dir_contents.jinja_filenames:
+            raise ValueError(f"No template source file found in {self.path}")
+        return os.path.join(self.path, self._dir_contents.jinja_filenames[0])
 
 
 class ProjectTemplate(BaseTemplate):
@@ -379,6 +1091,155 @@ class ProjectTemplate(BaseTemplate):
     """
 
 
+def get_template_shard(template: BaseTemplate, shard_count: int) -> int:
+    """Get the shard that a template belongs to, when the templates of a
+    repository are partitioned into shards (for example, across CI jobs).
+
+    Parameters
+    ----------
+    template : `BaseTemplate`
+        The template.
+    shard_count : `int`
+        Number of shards.
+
+    Returns
+    -------
+    shard_index : `int`
+        Zero-based index of the template's shard.
+
+    Notes
+    -----
+    The shard is derived from a SHA-1 hash of the template's directory path
+    relative to the repository root (such as ``file_templates/license``), so
+    that it is the same on any machine and doesn't depend on the other
+    templates in the repository.
+    """
+    key = "/".join(Path(template.path).parts[-2:])
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+    return int(digest, 16) % shard_count
+
+
+def select_shard(
+    templates: Iterable[_T], shard_index: int, shard_count: int
+) -> List[_T]:
+    """Select the templates that belong to a shard.
+
+    Parameters
+    ----------
+    templates : iterable of `BaseTemplate`
+        The templates to partition.
+    shard_index : `int`
+        Zero-based index of the shard to select.
+    shard_count : `int`
+        Number of shards.
+
+    Returns
+    -------
+    templates : `list` of `BaseTemplate`
+        The templates in the shard, in their original order.
+
+    Raises
+    ------
+    ValueError
+        Raised if ``shard_index`` isn't in the range of shards.
+    """
+    if shard_count < 1 or not 0 <= shard_index < shard_count:
+        raise ValueError(
+            "Shard index {0:d} is out of range for {1:d} shards".format(
+                shard_index, shard_count
+            )
+        )
+    return [
+        template
+        for template in templates
+        if get_template_shard(template, shard_count) == shard_index
+    ]
+
+
+def _load_template(
+    template_class: Type[_T],
+    path: str,
+    cache: Optional[MetadataCache] = None,
+    preload: bool = False,
+) -> Union[_T, OSError, ValueError]:
+    """Load a template, returning rather than raising the exception if the
+    directory isn't a recognizable template.
+
+    If ``preload`` is `True`, the template's configuration is also loaded.
+    Configuration errors are not raised here; they are raised when the
+    configuration is accessed, as for lazily-loaded templates.
+    """
+    try:
+        template = template_class(path, cache=cache)
+    except (OSError, ValueError) as err:
+        return err
+    if preload:
+        template.load()
+    return template
+
+
+class TemplateDirContents(NamedTuple):
+    """The contents of a candidate template directory that are relevant to
+    discovering templates.
+    """
+
+    is_dir: bool
+    """`True` if the path is a directory."""
+
+    has_cookiecutter_json: bool
+    """`True` if the directory contains a ``cookiecutter.json`` file."""
+
+    has_templatekit_yaml: bool
+    """`True` if the directory contains a ``templatekit.yaml`` file."""
+
+    jinja_filenames: Tuple[str, ...]
+    """Names of files in the directory with a ``.jinja`` extension."""
+
+
+def scan_template_dir(path: str) -> TemplateDirContents:
+    """Collect the contents of a candidate template directory in a single
+    `os.scandir` pass.
+
+    Parameters
+    ----------
+    path : `str`
+        Path of the directory.
+
+    Returns
+    -------
+    contents : `TemplateDirContents`
+        The directory's contents. If ``path`` isn't a directory,
+        ``is_dir`` is `False`.
+    """
+    has_cookiecutter_json = False
+    has_templatekit_yaml = False
+    jinja_filenames: List[str] = []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                if entry.name == "cookiecutter.json":
+                    has_cookiecutter_json = True
+                elif entry.name == "templatekit.yaml":
+                    has_templatekit_yaml = True
+                elif os.path.splitext(entry.name)[1] == ".jinja":
+                    jinja_filenames.append(entry.name)
+    except (FileNotFoundError, NotADirectoryError):
+        return TemplateDirContents(
+            is_dir=False,
+            has_cookiecutter_json=False,
+            has_templatekit_yaml=False,
+            jinja_filenames=(),
+        )
+    return TemplateDirContents(
+        is_dir=True,
+        has_cookiecutter_json=has_cookiecutter_json,
+        has_templatekit_yaml=has_templatekit_yaml,
+        jinja_filenames=tuple(jinja_filenames),
+    )
+
+
 @functools.lru_cache()
 def get_config_validator() -> cerberus.Validator:
     """Get a validator for ``templatekit.yaml`` configuration files.
@@ -390,12 +1251,62 @@ def get_config_validator() -> cerberus.Validator:
     validator : `cerberus.Validator`
         A Cerberus validator based on the ``configschema.yaml`` schema.
     """
-    configpath = Path(__file__).parent / "configschema.yaml"
-    schema = yaml.safe_load(configpath.read_text())
-    validator = cerberus.Validator(schema, purge_unknown=True)
+    import cerberus
+
+    validator = cerberus.Validator(_load_config_schema(), purge_unknown=True)
     return validator
 
 
+@functools.lru_cache()
+def get_compiled_config_validator() -> Optional[CompiledValidator]:
+    """Get a compiled validator for ``templatekit.yaml`` configuration
+    files.
+
+    This function is cached.
+
+    Returns
+    -------
+    validator : `templatekit.configvalidator.CompiledValidator` or `None`
+        A validator compiled from the ``configschema.yaml`` schema, which
+        freezes configurations, or `None` if the schema uses rules that the
+        compiled validator doesn't support (in which case only Cerberus can
+        validate configurations).
+    """
+    try:
+        return CompiledValidator(_load_config_schema(), freeze=True)
+    except ValueError as err:
+        logging.getLogger(__name__).debug(
+            "Can't compile the configuration schema: %s", err
+        )
+        return None
+
+
+@functools.lru_cache()
+def _get_normalized_values_validator() -> Optional[CompiledValidator]:
+    """Get a compiled validator for the values that `TemplateConfig.normalize`
+    adds to a configuration: ``name``, ``group``, and ``dialog_fields``.
+
+    This function is cached.
+    """
+    schema = _load_config_schema()
+    try:
+        return CompiledValidator(
+            {key: schema[key] for key in ("name", "group", "dialog_fields")},
+            freeze=True,
+        )
+    except ValueError:
+        return None
+
+
+@functools.lru_cache()
+def _load_config_schema() -> Dict[str, Any]:
+    """Load the ``configschema.yaml`` schema."""
+    import yaml
+
+    configpath = Path(__file__).parent / "configschema.yaml"
+    return yaml.safe_load(configpath.read_text())
+
+
 class TemplateConfig(collections.abc.Mapping):
     """Represents the configuration for a template, derived from a
     templatekit.yaml file.
@@ -409,31 +1320,86 @@ class TemplateConfig(collections.abc.Mapping):
     -----
     Access individual configurations on a ``TemplateConfig`` instance like
     keys in a dictionary.
+
+    Configurations are read-only: nested mappings are
+    `types.MappingProxyType` objects and lists are tuples. Use `to_dict` to
+    get a mutable, JSON-serializable copy.
     """
 
-    def __init__(self, data: Dict[str, Any]):
-        self.data = data
-        self._validator = get_config_validator()
+    __slots__ = ("_data",)
+
+    def __init__(self, data: Mapping[str, Any]):
+        # Valid configurations are validated and normalized by the compiled
+        # validator, which is much faster than Cerberus. Cerberus validates
+        # invalid configurations to report its errors.
+        compiled_validator = get_compiled_config_validator()
+        if compiled_validator is not None:
+            normalized_data = compiled_validator.normalized(data)
+            if normalized_data is not None:
+                self._data: Mapping[str, Any] = normalized_data
+                return
 
-        if self._validator.validate(data) is False:
+        data = thaw(data)
+        validator = get_config_validator()
+
+        if validator.validate(data) is False:
             print("Validation errors:")
-            print(json.dumps(self._validator.errors, sort_keys=True, indent=2))
+            print(json.dumps(validator.errors, sort_keys=True, indent=2))
             print("Data:")
             print(json.dumps(data, sort_keys=True, indent=2))
             raise RuntimeError("Configuration syntax error")
 
         # Apply Cereberus's schema-based normalization
-        self.data = self._validator.normalized(self.data)
+        self._data = freeze(validator.normalized(data))
+
+    @classmethod
+    def from_normalized(cls, data: Mapping[str, Any]) -> TemplateConfig:
+        """Create a template configuration from data that is already
+        validated and normalized, such as the ``data`` of another
+        `TemplateConfig`.
+
+        Parameters
+        ----------
+        data : `dict`
+            Validated and normalized configuration data.
+
+        Returns
+        -------
+        template_config : `TemplateConfig`
+            The template configuration. The data is not validated again.
+        """
+        config = cls.__new__(cls)
+        config._data = freeze(data)
+        return config
+
+    @property
+    def data(self) -> Mapping[str, Any]:
+        """The validated and normalized configuration, as a read-only
+        mapping (`types.MappingProxyType`).
+        """
+        return self._data
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get a mutable, JSON-serializable copy of the configuration.
+
+        Returns
+        -------
+        data : `dict`
+            The configuration, with nested dictionaries and lists.
+        """
+        return thaw(self._data)
+
+    def __repr__(self) -> str:
+        return "TemplateConfig({0!r})".format(self.to_dict())
 
     def __getitem__(self, key: str) -> Any:
-        return self.data[key]
+        return self._data[key]
 
     def __len__(self) -> int:
-        return len(self.data)
+        return len(self._data)
 
     def __iter__(self) -> Iterator[str]:
-        for k in self.data:
-            yield k
+        return iter(self._data)
 
     def normalize(self, template: BaseTemplate) -> TemplateConfig:
         """Normalize the template configuration by adding defaults for any
@@ -448,50 +1414,98 @@ class TemplateConfig(collections.abc.Mapping):
         -------
         template_config : `TemplateConfig`
             A new template configuration instance where all defaults are set.
+
+        Notes
+        -----
+        The normalized configuration is built in a single pass, without
+        copying this configuration: values that normalization doesn't change,
+        such as ``examples`` and fully-specified dialog fields, are shared
+        with this configuration. Only the values that normalization adds are
+        validated, since this configuration is already valid.
         """
-        data = deepcopy(self.data)
+        data = dict(self._data)
+        new_values: Dict[str, Any] = {}
 
         if "name" not in data:
-            data["name"] = template.name
+            new_values["name"] = template.name
 
         if "group" not in data:
-            data["group"] = "General"
+            new_values["group"] = "General"
 
-        if "dialog_fields" not in data:
+        if "dialog_fields" in data:
+            fields = data["dialog_fields"]
+        else:
             # Need to get the dialog fields from the cookiecutter.json file
-            data["dialog_fields"] = []
-            for key in template.cookiecutter:
-                if key.startswith("_"):
-                    # skip things like "_extensions"
-                    continue
-                elif isinstance(template.cookiecutter[key], str):
-                    data["dialog_fields"].append(
-                        {
-                            "key": key,
-                            "label": self._truncate(key, 75),
-                            "component": "text",
-                        }
-                    )
-                elif isinstance(template.cookiecutter[key], list):
-                    data["dialog_fields"].append(
-                        {
-                            "key": key,
-                            "label": self._truncate(key, 75),
-                            "component": "select",
-                        }
-                    )
+            fields = self._get_cookiecutter_fields(template)
 
-        for field in data["dialog_fields"]:
+        normalized_fields = []
+        new_field_indices = []
+        for i, field in enumerate(fields):
             if field["component"] == "select":
-                self._normalize_select_field(field, template)
+                normalized_field = self._normalize_select_field(
+                    field, template
+                )
             elif field["component"] == "text":
-                self._normalize_text_field(field, template)
-
-        return TemplateConfig(data)
+                normalized_field = self._normalize_text_field(field, template)
+            else:
+                normalized_field = field
+            if normalized_field is not field or "dialog_fields" not in data:
+                new_field_indices.append(i)
+            normalized_fields.append(normalized_field)
+        new_values["dialog_fields"] = [
+            normalized_fields[i] for i in new_field_indices
+        ]
+
+        validator = _get_normalized_values_validator()
+        validated_values = (
+            validator.normalized(new_values) if validator is not None else None
+        )
+        if validated_values is None:
+            # Cerberus validates the full configuration to report its errors
+            data.update(new_values)
+            data["dialog_fields"] = normalized_fields
+            return TemplateConfig(data)
+
+        data.update(validated_values)
+        for i, validated_field in zip(
+            new_field_indices, validated_values["dialog_fields"]
+        ):
+            normalized_fields[i] = validated_field
+        data["dialog_fields"] = tuple(normalized_fields)
+        return TemplateConfig.from_normalized(data)
+
+    def _get_cookiecutter_fields(
+        self, template: BaseTemplate
+    ) -> List[Mapping[str, Any]]:
+        """Get dialog fields for the variables in the cookiecutter.json
+        file.
+        """
+        fields: List[Mapping[str, Any]] = []
+        for key in template.cookiecutter:
+            if key.startswith("_"):
+                # skip things like "_extensions"
+                continue
+            elif isinstance(template.cookiecutter[key], str):
+                fields.append(
+                    {
+                        "key": key,
+                        "label": self._truncate(key, 75),
+                        "component": "text",
+                    }
+                )
+            elif isinstance(template.cookiecutter[key], list):
+                fields.append(
+                    {
+                        "key": key,
+                        "label": self._truncate(key, 75),
+                        "component": "select",
+                    }
+                )
+        return fields
 
     def _normalize_select_field(
-        self, field: Dict[str, Any], template: BaseTemplate
-    ) -> None:
+        self, field: Mapping[str, Any], template: BaseTemplate
+    ) -> Mapping[str, Any]:
         """Normalize a "select" component field.
 
         - Add options that exist in the cookiecutter.json file if the options
@@ -499,31 +1513,36 @@ class TemplateConfig(collections.abc.Mapping):
         """
         if "preset_options" in field or "preset_groups" in field:
             # The schemas force these to be fully specified in templatekit.yaml
-            return
+            return field
         elif "options" not in field:
             # Add options from cookiecutter.json
-            field["options"] = []
+            options = []
             for option_value in template.cookiecutter[field["key"]]:
                 # Enforce Slack length limit on the label
                 option_label = self._truncate(option_value, 75)
-                field["options"].append(
+                options.append(
                     {
                         "label": option_label,
                         "value": option_label,  # also needs truncation
                         "template_value": option_value,
                     }
                 )
+            return {**field, "options": options}
+        return field
 
     def _normalize_text_field(
-        self, field: Dict[str, Any], template: BaseTemplate
-    ) -> Dict[str, Any]:
+        self, field: Mapping[str, Any], template: BaseTemplate
+    ) -> Mapping[str, Any]:
         """Normalize text field components.
 
         - Add placeholder information found in the cookiecutter.json file
           if an explicit placeholder isn't set.
         """
         if "placeholder" not in field or len(field["placeholder"]) == 0:
-            field["placeholder"] = template.cookiecutter[field["key"]]
+            return {
+                **field,
+                "placeholder": template.cookiecutter[field["key"]],
+            }
         return field
 
     def _truncate(self, text: str, length: int) -> str:
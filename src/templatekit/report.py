@@ -0,0 +1,357 @@
+"""Machine-readable reports of ``templatekit check`` runs, in JSON or JUnit
+XML formats.
+
+A report contains one or more test suites. Each ``templatekit check`` run
+writes a report with a single suite, and the reports of the shards of a
+sharded check can be merged into a single report with `CheckReport.merge`
+(or the ``templatekit report merge`` command).
+"""
+
+from __future__ import annotations
+
+__all__ = (
+    "REPORT_FORMATS",
+    "ReportCase",
+    "ReportSuite",
+    "CheckReport",
+)
+
+import json
+import os
+import xml.etree.ElementTree as ElementTree
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+REPORT_FORMATS = ("json", "junit")
+"""Names of the supported report formats."""
+
+
+class ReportCase(NamedTuple):
+    """A single check, such as building an example."""
+
+    classname: str
+    """Group of the check, such as ``build.<template name>``."""
+
+    name: str
+    """Name of the check."""
+
+    time: float = 0.0
+    """Duration of the check, in seconds."""
+
+    failure: Optional[str] = None
+    """Failure message, or `None` if the check passed."""
+
+    skipped: bool = False
+    """`True` if the check was skipped."""
+
+    @property
+    def ok(self) -> bool:
+        """`True` if the check didn't fail (`bool`)."""
+        return self.failure is None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the case to a JSON-serializable dictionary."""
+        return self._asdict()
+
+
+class ReportSuite(object):
+    """A suite of checks, such as one ``templatekit check`` run.
+
+    Parameters
+    ----------
+    name : `str`
+        Name of the suite.
+    properties : `dict` of `str`, optional
+        Properties of the suite, such as the shard (``"2/4"``) that was
+        checked.
+    cases : iterable of `ReportCase`, optional
+        Initial checks of the suite.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        properties: Optional[Dict[str, str]] = None,
+        cases: Optional[Iterable[ReportCase]] = None,
+    ):
+        super().__init__()
+        self.name = name
+        self.properties: Dict[str, str] = dict(properties or {})
+        self.cases: List[ReportCase] = list(cases or [])
+
+    def __repr__(self) -> str:
+        return "ReportSuite({0!r}, cases={1:d})".format(
+            self.name, len(self.cases)
+        )
+
+    def add(
+        self,
+        classname: str,
+        name: str,
+        time: float = 0.0,
+        failure: Optional[str] = None,
+        skipped: bool = False,
+    ) -> ReportCase:
+        """Add a check to the suite.
+
+        Parameters
+        ----------
+        classname : `str`
+            Group of the check.
+        name : `str`
+            Name of the check.
+        time : `float`, optional
+            Duration of the check, in seconds.
+        failure : `str`, optional
+            Failure message, if the check failed.
+        skipped : `bool`, optional
+            `True` if the check was skipped.
+
+        Returns
+        -------
+        case : `ReportCase`
+            The added check.
+        """
+        case = ReportCase(
+            classname=classname,
+            name=name,
+            time=time,
+            failure=failure,
+            skipped=skipped,
+        )
+        self.cases.append(case)
+        return case
+
+    @property
+    def failures(self) -> List[ReportCase]:
+        """The failed checks (`list` of `ReportCase`)."""
+        return [case for case in self.cases if not case.ok]
+
+    @property
+    def time(self) -> float:
+        """Total duration of the checks, in seconds (`float`)."""
+        return sum(case.time for case in self.cases)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the suite to a JSON-serializable dictionary."""
+        return {
+            "name": self.name,
+            "properties": self.properties,
+            "cases": [case.to_dict() for case in self.cases],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> ReportSuite:
+        """Create a suite from a dictionary created by `to_dict`."""
+        return cls(
+            data["name"],
+            properties=data.get("properties"),
+            cases=[ReportCase(**case) for case in data["cases"]],
+        )
+
+    def to_junit_element(self) -> ElementTree.Element:
+        """Convert the suite to a JUnit ``testsuite`` XML element."""
+        element = ElementTree.Element(
+            "testsuite",
+            name=self.name,
+            tests=str(len(self.cases)),
+            failures=str(len(self.failures)),
+            errors="0",
+            skipped=str(len([case for case in self.cases if case.skipped])),
+            time="{0:.3f}".format(self.time),
+        )
+        if self.properties:
+            properties = ElementTree.SubElement(element, "properties")
+            for key, value in self.properties.items():
+                ElementTree.SubElement(
+                    properties, "property", name=key, value=value
+                )
+        for case in self.cases:
+            case_element = ElementTree.SubElement(
+                element,
+                "testcase",
+                classname=case.classname,
+                name=case.name,
+                time="{0:.3f}".format(case.time),
+            )
+            if case.failure is not None:
+                failure = ElementTree.SubElement(
+                    case_element,
+                    "failure",
+                    message=(
+                        case.failure.splitlines()[0] if case.failure else ""
+                    ),
+                )
+                failure.text = case.failure
+            elif case.skipped:
+                ElementTree.SubElement(case_element, "skipped")
+        return element
+
+    @classmethod
+    def from_junit_element(cls, element: ElementTree.Element) -> ReportSuite:
+        """Create a suite from a JUnit ``testsuite`` XML element."""
+        properties = {
+            prop.get("name", ""): prop.get("value", "")
+            for prop in element.findall("properties/property")
+        }
+        cases = []
+        for case_element in element.findall("testcase"):
+            failure_element = case_element.find("failure")
+            if failure_element is None:
+                failure_element = case_element.find("error")
+            failure = None
+            if failure_element is not None:
+                failure = failure_element.text or failure_element.get(
+                    "message", ""
+                )
+            cases.append(
+                ReportCase(
+                    classname=case_element.get("classname", ""),
+                    name=case_element.get("name", ""),
+                    time=float(case_element.get("time", "0")),
+                    failure=failure,
+                    skipped=case_element.find("skipped") is not None,
+                )
+            )
+        return cls(element.get("name", ""), properties=properties, cases=cases)
+
+
+class CheckReport(object):
+    """A report of one or more suites of checks.
+
+    Parameters
+    ----------
+    suites : iterable of `ReportSuite`, optional
+        The suites of the report.
+    """
+
+    format_version = 1
+    """Version of the JSON report format."""
+
+    def __init__(self, suites: Optional[Iterable[ReportSuite]] = None):
+        super().__init__()
+        self.suites: List[ReportSuite] = list(suites or [])
+
+    def __repr__(self) -> str:
+        return "CheckReport(suites={0!r})".format(self.suites)
+
+    @property
+    def cases(self) -> List[ReportCase]:
+        """The checks of all suites (`list` of `ReportCase`)."""
+        return [case for suite in self.suites for case in suite.cases]
+
+    @property
+    def failures(self) -> List[ReportCase]:
+        """The failed checks of all suites (`list` of `ReportCase`)."""
+        return [case for suite in self.suites for case in suite.failures]
+
+    @classmethod
+    def merge(cls, reports: Iterable[CheckReport]) -> CheckReport:
+        """Merge reports, such as the reports of each shard of a sharded
+        check, into a single report.
+
+        Parameters
+        ----------
+        reports : iterable of `CheckReport`
+            The reports to merge.
+
+        Returns
+        -------
+        report : `CheckReport`
+            A report with the suites of all reports, in order.
+        """
+        return cls(suite for report in reports for suite in report.suites)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the report to a JSON-serializable dictionary."""
+        return {
+            "version": self.format_version,
+            "tests": len(self.cases),
+            "failures": len(self.failures),
+            "suites": [suite.to_dict() for suite in self.suites],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> CheckReport:
+        """Create a report from a dictionary created by `to_dict`.
+
+        Raises
+        ------
+        ValueError
+            Raised if the report has an unsupported format version.
+        """
+        if data.get("version") != cls.format_version:
+            raise ValueError(
+                "Unsupported report version: {0!r}".format(data.get("version"))
+            )
+        return cls(ReportSuite.from_dict(suite) for suite in data["suites"])
+
+    def to_junit_xml(self) -> str:
+        """Convert the report to a JUnit XML document."""
+        root = ElementTree.Element(
+            "testsuites",
+            tests=str(len(self.cases)),
+            failures=str(len(self.failures)),
+            errors="0",
+            time="{0:.3f}".format(sum(suite.time for suite in self.suites)),
+        )
+        for suite in self.suites:
+            root.append(suite.to_junit_element())
+        return '<?xml version="1.0" encoding="utf-8"?>\n{0}\n'.format(
+            ElementTree.tostring(root, encoding="unicode")
+        )
+
+    @classmethod
+    def from_junit_xml(cls, text: str) -> CheckReport:
+        """Create a report from a JUnit XML document.
+
+        The root element can be either ``testsuites`` or a single
+        ``testsuite``.
+        """
+        root = ElementTree.fromstring(text)
+        if root.tag == "testsuite":
+            elements = [root]
+        else:
+            elements = root.findall("testsuite")
+        return cls(ReportSuite.from_junit_element(e) for e in elements)
+
+    def write(self, path: str, format: str = "json") -> None:
+        """Write the report to a file.
+
+        Parameters
+        ----------
+        path : `str`
+            Path of the report file.
+        format : `str`, optional
+            Report format: ``"json"`` (default) or ``"junit"``.
+        """
+        if format == "json":
+            text = json.dumps(self.to_dict(), indent=2) + "\n"
+        elif format == "junit":
+            text = self.to_junit_xml()
+        else:
+            raise ValueError("Unknown report format: {0!r}".format(format))
+        dirname = os.path.dirname(path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    @classmethod
+    def read(cls, path: str) -> CheckReport:
+        """Read a report file, in either the JSON or JUnit XML format.
+
+        Parameters
+        ----------
+        path : `str`
+            Path of the report file.
+
+        Returns
+        -------
+        report : `CheckReport`
+            The report.
+        """
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        if text.lstrip().startswith("<"):
+            return cls.from_junit_xml(text)
+        return cls.from_dict(json.loads(text))
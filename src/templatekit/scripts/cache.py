@@ -0,0 +1,47 @@
+"""Subcommands for managing the persistent template metadata cache.
+"""
+
+__all__ = ("cache",)
+
+from typing import Dict
+
+import click
+
+from ..cache import MetadataCache
+from ..repo import Repo
+
+
+@click.group(short_help="Manage the template metadata cache")
+def cache() -> None:
+    """Manage the template metadata cache.
+
+    The cache is enabled with the --cache option of the templatekit command
+    and is stored in the .templatekit-cache directory of the template
+    repository.
+    """
+
+
+@cache.command()
+@click.pass_obj
+def clear(state: Dict[str, Repo]) -> None:
+    """Delete all entries in the metadata cache."""
+    metadata_cache = _get_cache(state["repo"])
+    metadata_cache.clear()
+    click.echo("Cleared {0}".format(metadata_cache.path))
+
+
+@cache.command()
+@click.pass_obj
+def stats(state: Dict[str, Repo]) -> None:
+    """Show statistics about the metadata cache."""
+    cache_stats = _get_cache(state["repo"]).stats()
+    click.echo("Cache file:    {0}".format(cache_stats["path"]))
+    click.echo("Entries:       {0:d}".format(cache_stats["entries"]))
+    click.echo("Stale entries: {0:d}".format(cache_stats["stale_entries"]))
+    click.echo("Size (bytes):  {0:d}".format(cache_stats["size"]))
+
+
+def _get_cache(repo: Repo) -> MetadataCache:
+    if repo.cache is not None:
+        return repo.cache
+    return MetadataCache.for_repo_root(repo.root)
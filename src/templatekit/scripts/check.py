@@ -4,12 +4,49 @@ operation.
 
 __all__ = ("check",)
 
+import fnmatch
+import os
+import subprocess
 import sys
-from typing import Dict, List
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 import click
 
-from ..repo import Repo
+from ..examples import build_repo_examples
+from ..gitstatus import GitStatus
+from ..repo import BaseTemplate, Repo, select_shard
+from ..report import REPORT_FORMATS, CheckReport, ReportSuite
+from ..verify import verify_repo_examples
+
+
+class ShardParamType(click.ParamType):
+    """Click parameter type for a shard, written as ``I/N`` (shard ``I`` of
+    ``N``, counting from 1), and converted to an ``(I, N)`` tuple.
+    """
+
+    name = "shard"
+
+    def convert(
+        self,
+        value: Any,
+        param: Optional[click.Parameter],
+        ctx: Optional[click.Context],
+    ) -> Tuple[int, int]:
+        if isinstance(value, tuple):
+            return value
+        try:
+            index, count = (int(part) for part in value.split("/"))
+        except ValueError:
+            self.fail(
+                "{0!r} is not a shard like 1/4".format(value), param, ctx
+            )
+        if count < 1 or not 1 <= index <= count:
+            message = "Shard {0!r} is out of range for {1:d} shard(s)".format(
+                value, count
+            )
+            self.fail(message, param, ctx)
+        return index, count
 
 
 @click.command(short_help="Check the template repository")
@@ -18,11 +55,87 @@ from ..repo import Repo
     "--ignore",
     "ignored_files",
     multiple=True,
-    type=click.Path(exists=True, dir_okay=False),
-    help="Ignore a file when checking consistency of examples.",
+    metavar="PATTERN",
+    help="Ignore a file when checking consistency of examples. The path is "
+    "relative to the repository root, and can be a glob pattern, like "
+    "'*/example/CHANGELOG.md'. Can be used multiple times.",
+)
+@click.option(
+    "--builder",
+    type=click.Choice(["scons", "native"]),
+    default="scons",
+    help="How to regenerate the examples: run the repository's scons build "
+    "(default), or use Templatekit's native, parallel example builder.",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Number of parallel jobs: worker processes for the native builder "
+    "(default is the number of CPUs), or the -j option of scons.",
+)
+@click.option(
+    "--incremental",
+    is_flag=True,
+    default=False,
+    help="With the native builder, only rebuild examples whose inputs "
+    "changed since the last build.",
+)
+@click.option(
+    "--since",
+    "since_ref",
+    metavar="REF",
+    default=None,
+    help="Only check templates with files that changed since a Git ref, such "
+    "as a branch, tag, or commit. Changes in the working tree are included.",
+)
+@click.option(
+    "--shard",
+    type=ShardParamType(),
+    metavar="I/N",
+    default=None,
+    help="Only check shard I of N, such as 2/4, to split the check across CI "
+    "jobs. Templates are assigned to shards by a hash of their directory "
+    "path, so the shards are the same on every machine.",
+)
+@click.option(
+    "--report",
+    "report_path",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Write a machine-readable report of the checks to this file. "
+    "Reports of each shard can be merged with 'templatekit report merge'.",
+)
+@click.option(
+    "--report-format",
+    type=click.Choice(REPORT_FORMATS),
+    default=None,
+    help="Format of the --report file. Default is junit if the file name "
+    "ends with .xml, and json otherwise.",
+)
+@click.option(
+    "--verify-in-memory",
+    is_flag=True,
+    default=False,
+    help="Instead of rebuilding the examples in the working tree, render "
+    "them in memory (or in a temporary directory for project templates) and "
+    "compare them with the files committed at HEAD. The working tree isn't "
+    "modified.",
 )
 @click.pass_obj
-def check(state: Dict[str, Repo], ignored_files: List[str]) -> None:
+def check(
+    state: Dict[str, Repo],
+    ignored_files: List[str],
+    builder: str,
+    jobs: Optional[int],
+    incremental: bool,
+    since_ref: Optional[str],
+    shard: Optional[Tuple[int, int]],
+    report_path: Optional[str],
+    report_format: Optional[str],
+    verify_in_memory: bool,
+) -> None:
     """Check the template repository for valid structure and operation.
 
     The following checks are performed:
@@ -34,23 +147,77 @@ def check(state: Dict[str, Repo], ignored_files: List[str]) -> None:
 
     - A non-zero status code is returned if the checks fail.
     - This command always recompiles the examples by running the scons
-      command.
+      command, or with the native builder if --builder native is set.
+    - With --since, only the templates with files that changed since the
+      Git ref are rebuilt, and only their directories are checked.
+    - With --shard, only the templates in the shard are rebuilt and checked.
+    - With --verify-in-memory, the examples are rendered without writing to
+      the working tree and are compared with the files committed at HEAD,
+      instead of checking the Git state.
     """
     repo = state["repo"]
     print("Testing template repository {0!s}".format(repo.root))
-    scons_result = repo.build()
-    if scons_result.returncode > 0:
-        message = (
-            '"scons" failed with status {0:d}\n\nThis means that the examples '
-            "could not be successfully generated because of an issue with the "
-            "Cookiecutter templates. Check the scons output, above, for "
-            "debugging hints."
+
+    properties = {"builder": "memory" if verify_in_memory else builder}
+    templates: Optional[List[BaseTemplate]] = None
+    if since_ref is not None:
+        properties["since"] = since_ref
+        templates = _get_changed_templates(repo, since_ref)
+        print(
+            "{0:d} template(s) changed since {1}".format(
+                len(templates), since_ref
+            )
+        )
+    if shard is not None:
+        properties["shard"] = "{0:d}/{1:d}".format(*shard)
+        if templates is None:
+            templates = list(repo.iter_templates())
+        templates = select_shard(templates, shard[0] - 1, shard[1])
+        print(
+            "{0:d} template(s) in shard {1}".format(
+                len(templates), properties["shard"]
+            )
+        )
+    if templates is not None:
+        print(
+            "Checking: {0}".format(
+                ", ".join(template.name for template in templates) or "-"
+            )
         )
-        sys.exit(message.format(scons_result.returncode))
+
+    suite = ReportSuite("templatekit check", properties=properties)
+    if templates is not None and not templates:
+        print("No templates to check")
+        _write_report(suite, report_path, report_format)
+        print("✅ Passed!")
+        return
+
+    if verify_in_memory:
+        error_count = _verify_in_memory(
+            repo, jobs, ignored_files, templates, suite
+        )
+        _write_report(suite, report_path, report_format)
+        _exit_with_status(error_count)
+        return
+
+    if builder == "native":
+        build_error = _build_native(repo, jobs, incremental, templates, suite)
+    else:
+        build_error = _build_scons(repo, jobs, templates, suite)
+    if build_error is not None:
+        _write_report(suite, report_path, report_format)
+        sys.exit(build_error)
 
     error_count = 0
-    error_count += _test_git_state(repo, ignored_files)
+    error_count += _test_git_state(repo, ignored_files, templates, suite)
+    _write_report(suite, report_path, report_format)
+    _exit_with_status(error_count)
+
 
+def _exit_with_status(error_count: int) -> None:
+    """Print the outcome of the checks, exiting with a non-zero status if
+    there are errors.
+    """
     if error_count == 1:
         sys.exit(
             "\n❌ The template repository checks failed with "
@@ -65,53 +232,231 @@ def check(state: Dict[str, Repo], ignored_files: List[str]) -> None:
         print("✅ Passed!")
 
 
-def _test_git_state(repo: Repo, ignored_files: List[str]) -> int:
-    """Test if the Git repository of the template repository is clean.
-    (no modified files and no untracked files).
+def _write_report(
+    suite: ReportSuite, path: Optional[str], report_format: Optional[str]
+) -> None:
+    """Write the report of the checks, if a report path is set."""
+    if path is None:
+        return
+    if report_format is None:
+        report_format = "junit" if path.endswith(".xml") else "json"
+    CheckReport([suite]).write(path, format=report_format)
+    print("Wrote {0} report {1}".format(report_format, path))
+
+
+def _get_changed_templates(repo: Repo, since_ref: str) -> List[BaseTemplate]:
+    """Get the templates that changed since a Git ref, exiting if the ref
+    can't be compared.
     """
+    try:
+        return repo.get_changed_templates(since_ref)
+    except subprocess.CalledProcessError as err:
+        sys.exit(
+            "Could not find changes since {0!r} (git exited with status "
+            "{1:d})".format(since_ref, err.returncode)
+        )
+
+
+def _get_template_dirs(
+    repo: Repo, templates: Optional[Sequence[BaseTemplate]]
+) -> Optional[List[str]]:
+    """Get the directories of templates, relative to the repository root."""
+    if templates is None:
+        return None
+    return [
+        os.path.relpath(template.path, repo.root).replace(os.sep, "/")
+        for template in templates
+    ]
+
+
+def _build_scons(
+    repo: Repo,
+    jobs: Optional[int],
+    templates: Optional[Sequence[BaseTemplate]],
+    suite: ReportSuite,
+) -> Optional[str]:
+    """Regenerate examples by running scons, returning an error message if
+    the build fails.
+
+    If templates are set, only the targets in their directories are built.
+    """
+    start_time = time.perf_counter()
+    scons_result = repo.build(
+        targets=_get_template_dirs(repo, templates), jobs=jobs
+    )
+    duration = time.perf_counter() - start_time
+    if scons_result.returncode > 0:
+        message = (
+            '"scons" failed with status {0:d}\n\nThis means that the examples '
+            "could not be successfully generated because of an issue with the "
+            "Cookiecutter templates. Check the scons output, above, for "
+            "debugging hints."
+        ).format(scons_result.returncode)
+        suite.add("build", "scons", time=duration, failure=message)
+        return message
+    suite.add("build", "scons", time=duration)
+    return None
+
+
+def _build_native(
+    repo: Repo,
+    jobs: Optional[int],
+    incremental: bool,
+    templates: Optional[Sequence[BaseTemplate]],
+    suite: ReportSuite,
+) -> Optional[str]:
+    """Regenerate examples with the native builder, returning an error
+    message if any example fails to build.
+    """
+    results = build_repo_examples(
+        repo, templates=templates, workers=jobs, incremental=incremental
+    )
+    failures = [result for result in results if not result.ok]
+    for result in results:
+        output_path = os.path.relpath(result.example.output_path, repo.root)
+        suite.add(
+            "build.{0}".format(result.example.template_name),
+            output_path,
+            time=result.duration,
+            failure=result.error,
+            skipped=result.skipped,
+        )
+        if result.skipped:
+            print("  - {0} (unchanged)".format(output_path))
+        else:
+            print(
+                "  {0} {1} ({2:.2f} s)".format(
+                    "✔" if result.ok else "✘", output_path, result.duration
+                )
+            )
+    print(
+        "Built {0:d} of {1:d} examples, {2:d} changed "
+        "({3:.2f} s total)".format(
+            len([result for result in results if not result.skipped]),
+            len(results),
+            len([result for result in results if result.changed]),
+            sum(result.duration for result in results),
+        )
+    )
+    if failures:
+        print("\n🔴 Example build failures:")
+        for result in failures:
+            print(
+                "  {0}: {1}".format(result.example.template_name, result.error)
+            )
+        return (
+            "\nThe examples for {0:d} template(s) could not be generated "
+            "because of an issue with the templates.".format(
+                len({result.example.template_name for result in failures})
+            )
+        )
+    return None
+
+
+def _verify_in_memory(
+    repo: Repo,
+    jobs: Optional[int],
+    ignored_files: List[str],
+    templates: Optional[Sequence[BaseTemplate]],
+    suite: ReportSuite,
+) -> int:
+    """Verify that examples rendered in memory match the committed files,
+    printing a unified diff of each mismatch.
+    """
+    results = verify_repo_examples(repo, templates=templates, workers=jobs)
     error_count = 0
+    for result in results:
+        output_path = os.path.relpath(result.example.output_path, repo.root)
+        mismatches = [
+            mismatch
+            for mismatch in result.mismatches
+            if not any(
+                fnmatch.fnmatch(mismatch.path, pattern)
+                for pattern in ignored_files
+            )
+        ]
+        failure = result.error
+        if failure is None and mismatches:
+            failure = "".join(
+                mismatch.diff or "Mode changed: {0}\n".format(mismatch.path)
+                for mismatch in mismatches
+            )
+        suite.add(
+            "verify.{0}".format(result.example.template_name),
+            output_path,
+            time=result.duration,
+            failure=failure,
+        )
+        print(
+            "  {0} {1} ({2:.2f} s)".format(
+                "✔" if failure is None else "✘", output_path, result.duration
+            )
+        )
+        if result.error is not None:
+            print("\n🔴 Example could not be rendered:")
+            print("  {0}".format(result.error))
+            error_count += 1
+        for mismatch in mismatches:
+            print(
+                "\n🔴 Example differs from HEAD ({0}): {1}".format(
+                    mismatch.change, mismatch.path
+                )
+            )
+            if mismatch.diff:
+                print(mismatch.diff, end="")
+            error_count += 1
+    return error_count
+
 
-    if repo.is_git_dirty():
-        error_count += _test_untracked_files(repo)
-        error_count += _test_uncommitted_changes(repo, ignored_files)
+def _test_git_state(
+    repo: Repo,
+    ignored_files: List[str],
+    templates: Optional[Sequence[BaseTemplate]],
+    suite: ReportSuite,
+) -> int:
+    """Test if the Git repository of the template repository is clean.
+    (no modified files and no untracked files).
 
+    The untracked files and uncommitted changes are found with a single
+    ``git status`` command. If templates are set, only their directories are
+    tested.
+    """
+    template_dirs = _get_template_dirs(repo, templates)
+    status = repo.get_git_status(
+        ignore=ignored_files,
+        paths=template_dirs if template_dirs is not None else (),
+    )
+    error_count = 0
+    error_count += _test_untracked_files(status, suite)
+    error_count += _test_uncommitted_changes(status, suite)
     return error_count
 
 
-def _test_untracked_files(repo: Repo) -> int:
-    untracked_paths = repo.untracked_files
+def _test_untracked_files(status: GitStatus, suite: ReportSuite) -> int:
     error_count = 0
-    if len(untracked_paths) > 0:
+    if len(status.untracked) > 0:
         print("\n🔴 Untracked files:")
-        for p in untracked_paths:
+        for p in status.untracked:
             print("  {}".format(p))
+            suite.add("git.untracked", p, failure="Untracked file")
             error_count += 1
+    else:
+        suite.add("git.untracked", "no untracked files")
     return error_count
 
 
-def _test_uncommitted_changes(repo: Repo, ignored_files: List[str]) -> int:
+def _test_uncommitted_changes(status: GitStatus, suite: ReportSuite) -> int:
     error_count = 0
-    # Get all uncommitted changes because we don't have a count of them
-    # otherwise
-    uncommitted_changes = []
-    diffindex = repo.get_uncommitted_files()
-    for changetype in diffindex.change_type:
-        for change in diffindex.iter_change_type(changetype):
-            if change.a_path in ignored_files:
-                continue
-            # For deleted files, we want to use the original ("a") path.
-            # Otherwise, we tend to want to show the user the new ("b") path
-            if changetype in ("D",):
-                uncommitted_changes.append(
-                    "{0} {1}".format(changetype, change.a_path)
-                )
-            else:
-                uncommitted_changes.append(
-                    "{0} {1}".format(changetype, change.b_path)
-                )
-            error_count += 1
-    if error_count > 0:
+    if len(status.changes) > 0:
         print("\n🔴 Uncommitted changes:")
-        for change in uncommitted_changes:
-            print(change)
+        for changetype, path in status.changes:
+            print("{0} {1}".format(changetype, path))
+            suite.add(
+                "git.uncommitted",
+                path,
+                failure="Uncommitted change ({0})".format(changetype),
+            )
+            error_count += 1
+    else:
+        suite.add("git.uncommitted", "no uncommitted changes")
     return error_count
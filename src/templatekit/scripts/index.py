@@ -0,0 +1,83 @@
+"""Subcommands for building and checking a precomputed template index.
+"""
+
+__all__ = ("index",)
+
+import os
+from typing import Dict, Optional
+
+import click
+
+from ..cache import make_cache_dir
+from ..index import DEFAULT_INDEX_PATH, TemplateIndex
+from ..repo import Repo
+
+
+@click.group(short_help="Build and check a precomputed template index")
+def index() -> None:
+    """Build and check a precomputed index of template metadata.
+
+    The index is a single JSON file with the normalized templatekit.yaml
+    configuration, cookiecutter.json data, and a content hash of every
+    template in the repository. Applications load it with
+    templatekit.repo.Repo.from_index, without reading template directories.
+    """
+
+
+@index.command()
+@click.option(
+    "-o",
+    "--output",
+    "output_path",
+    type=click.Path(dir_okay=False, resolve_path=True),
+    help="Path of the index file. Default is {0} in the root of the "
+    "template repository.".format(DEFAULT_INDEX_PATH),
+)
+@click.pass_obj
+def build(state: Dict[str, Repo], output_path: Optional[str]) -> None:
+    """Build the template index."""
+    repo = state["repo"]
+    if output_path is None:
+        output_path = os.path.join(repo.root, DEFAULT_INDEX_PATH)
+        make_cache_dir(os.path.dirname(output_path))
+    try:
+        template_index = TemplateIndex.build(repo)
+    except RuntimeError as err:
+        raise click.ClickException(str(err))
+    template_index.write(output_path)
+    click.echo(
+        "Indexed {0:d} templates in {1}".format(
+            len(template_index), output_path
+        )
+    )
+
+
+@index.command()
+@click.argument(
+    "index_path",
+    metavar="[<index path>]",
+    required=False,
+    type=click.Path(exists=True, dir_okay=False, resolve_path=True),
+)
+@click.pass_obj
+def check(state: Dict[str, Repo], index_path: Optional[str]) -> None:
+    """Check that the template index is current.
+
+    Exits with a non-zero status, and lists the templates that were added,
+    removed, or changed, if the index needs to be rebuilt.
+    """
+    repo = state["repo"]
+    if index_path is None:
+        index_path = os.path.join(repo.root, DEFAULT_INDEX_PATH)
+    try:
+        template_index = TemplateIndex.read(index_path, root=repo.root)
+    except (OSError, ValueError) as err:
+        raise click.ClickException(str(err))
+    stale_templates = template_index.get_stale_templates()
+    if not stale_templates:
+        click.echo("{0} is current".format(index_path))
+        return
+    click.echo("{0} is stale. Changed templates:".format(index_path))
+    for name in stale_templates:
+        click.echo("- {0}".format(name))
+    raise click.exceptions.Exit(1)
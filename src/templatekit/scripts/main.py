@@ -1,22 +1,134 @@
-"""Main command-line interface for templatekit.
-"""
+"""Main command-line interface for templatekit."""
 
-__all__ = ("main",)
+__all__ = ("main", "LazyGroup", "LazyCommand")
 
-from typing import Optional
+import importlib
+import os
+import sys
+import tempfile
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
 
 import click
 
+from ..cache import MetadataCache
+from ..instrumentation import TRACE_FILE_ENV, Profiler, add_sink, remove_sink
 from ..repo import Repo
-from .check import check
-from .listtemplates import list_templates
-from .make import make
 
 # Add -h as a help shortcut option
 CONTEXT_SETTINGS = dict(help_option_names=["-h", "--help"])
 
 
-@click.group(context_settings=CONTEXT_SETTINGS)
+class LazyCommand(NamedTuple):
+    """A subcommand of a `LazyGroup` that is imported on demand."""
+
+    import_path: str
+    """Import path of the command, as ``module:attribute``. A module path
+    that starts with ``.`` is relative to this package.
+    """
+
+    short_help: str
+    """Short help for the command, shown in the group's help without
+    importing the command.
+    """
+
+
+class LazyGroup(click.Group):
+    """A click command group whose subcommands are imported only when they
+    are invoked (or when their full help is shown).
+
+    Subcommand modules import heavy dependencies, such as Cookiecutter and
+    GitPython, so importing them lazily keeps the startup of other commands
+    fast.
+
+    Parameters
+    ----------
+    lazy_subcommands : `dict` of `LazyCommand`, optional
+        The lazily-imported subcommands, keyed by command name.
+    **kwargs
+        Keyword arguments for `click.Group`.
+    """
+
+    def __init__(
+        self,
+        *args: Any,
+        lazy_subcommands: Optional[Dict[str, LazyCommand]] = None,
+        **kwargs: Any,
+    ):
+        super().__init__(*args, **kwargs)
+        self.lazy_subcommands: Dict[str, LazyCommand] = dict(
+            lazy_subcommands or {}
+        )
+
+    def list_commands(self, ctx: click.Context) -> List[str]:
+        return sorted(
+            set(super().list_commands(ctx)) | set(self.lazy_subcommands)
+        )
+
+    def get_command(
+        self, ctx: click.Context, cmd_name: str
+    ) -> Optional[click.Command]:
+        if cmd_name not in self.commands and cmd_name in self.lazy_subcommands:
+            self.add_command(self._import_command(cmd_name), name=cmd_name)
+        return super().get_command(ctx, cmd_name)
+
+    def format_commands(
+        self, ctx: click.Context, formatter: click.HelpFormatter
+    ) -> None:
+        # Same as click.Group.format_commands, but using the short help of
+        # lazy subcommands that aren't imported yet.
+        rows: List[Tuple[str, str]] = []
+        for name in self.list_commands(ctx):
+            command = self.commands.get(name)
+            if command is not None:
+                if command.hidden:
+                    continue
+                short_help = command.get_short_help_str(
+                    limit=formatter.width - 6 - len(name)
+                )
+            else:
+                short_help = self.lazy_subcommands[name].short_help
+            rows.append((name, short_help))
+        if rows:
+            with formatter.section("Commands"):
+                formatter.write_dl(rows)
+
+    def _import_command(self, cmd_name: str) -> click.Command:
+        module_name, attribute = self.lazy_subcommands[
+            cmd_name
+        ].import_path.split(":")
+        module = importlib.import_module(module_name, package=__package__)
+        command = getattr(module, attribute)
+        if not isinstance(command, click.Command):
+            raise TypeError(
+                "Lazy subcommand {0!r} is not a click command: {1!r}".format(
+                    cmd_name, command
+                )
+            )
+        return command
+
+
+@click.group(
+    cls=LazyGroup,
+    context_settings=CONTEXT_SETTINGS,
+    lazy_subcommands={
+        "list": LazyCommand(
+            ".listtemplates:list_templates",
+            "List available templates in the repository.",
+        ),
+        "make": LazyCommand(
+            ".make:make", "Make a file or project from a template."
+        ),
+        "check": LazyCommand(".check:check", "Check the template repository"),
+        "cache": LazyCommand(
+            ".cache:cache", "Manage the template metadata cache"
+        ),
+        "report": LazyCommand(".report:report", "Work with check reports"),
+        "index": LazyCommand(
+            ".index:index", "Build and check a precomputed template index"
+        ),
+        "serve": LazyCommand(".serve:serve", "Serve templates over HTTP/JSON"),
+    },
+)
 @click.option(
     "-r",
     "--template-repo",
@@ -29,18 +141,76 @@ CONTEXT_SETTINGS = dict(help_option_names=["-h", "--help"])
     "within the clone templates repository. Default is '.', the "
     "current working directory.",
 )
+@click.option(
+    "--cache/--no-cache",
+    "use_cache",
+    default=False,
+    envvar="TEMPLATEKIT_CACHE",
+    help="Cache parsed template metadata in the template repository's "
+    ".templatekit-cache directory to speed up later runs. Default is "
+    "--no-cache. Also set with the TEMPLATEKIT_CACHE environment variable.",
+)
+@click.option(
+    "--profile",
+    is_flag=True,
+    default=False,
+    help="Time each phase of work, such as YAML parsing, validation, and "
+    "Jinja compilation and rendering, and print a per-phase and "
+    "per-template breakdown when the command exits. Work in scons builds and "
+    "worker processes is included.",
+)
 @click.pass_context
-def main(ctx: click.Context, template_repo: str) -> None:
+def main(
+    ctx: click.Context, template_repo: str, use_cache: bool, profile: bool
+) -> None:
     """templatekit is a CLI for lsst/templates, LSST's project template
     repository.
 
     Use templatekit to learn about available templates, and to create a new
     project or file snippet based on a template.
     """
+    if profile:
+        _start_profiler(ctx)
+
     # Subcommands should use the click.pass_obj decorator to get this
     # ctx.obj object as the first argument. Subcommands shouldn't create their
     # own Repo instance.
-    ctx.obj = {"repo": Repo.discover_repo(dirname=template_repo)}
+    repo = Repo.discover_repo(dirname=template_repo)
+    if use_cache:
+        repo.cache = MetadataCache.for_repo_root(repo.root)
+        ctx.call_on_close(repo.cache.save)
+    ctx.obj = {"repo": repo}
+
+
+def _start_profiler(ctx: click.Context) -> None:
+    """Start profiling, and print the profile when the command exits.
+
+    Spans from subprocesses (such as scons and the native builder's workers)
+    are collected through a temporary trace file that the subprocesses
+    inherit through the ``TEMPLATEKIT_TRACE_FILE`` environment variable.
+    """
+    profiler = Profiler()
+    add_sink(profiler)
+    trace_fd, trace_path = tempfile.mkstemp(
+        prefix="templatekit-trace-", suffix=".jsonl"
+    )
+    os.close(trace_fd)
+    previous_trace_path = os.environ.get(TRACE_FILE_ENV)
+    os.environ[TRACE_FILE_ENV] = trace_path
+
+    def report() -> None:
+        remove_sink(profiler)
+        if previous_trace_path is None:
+            del os.environ[TRACE_FILE_ENV]
+        else:
+            os.environ[TRACE_FILE_ENV] = previous_trace_path
+        try:
+            profiler.load_json_lines(trace_path, skip_pid=os.getpid())
+        finally:
+            os.remove(trace_path)
+        click.echo(profiler.format_report(), file=sys.stderr)
+
+    ctx.call_on_close(report)
 
 
 # The help command implementation is taken from
@@ -55,16 +225,11 @@ def help(ctx: click.Context, topic: Optional[str]) -> None:
     # The help command implementation is taken from
     # https://www.burgundywall.com/post/having-click-help-subcommand
     if topic:
-        if topic in main.commands:
-            click.echo(main.commands[topic].get_help(ctx))
+        command = main.get_command(ctx, topic)
+        if command is not None:
+            click.echo(command.get_help(ctx))
         else:
             raise click.UsageError(f"Unknown help topic {topic}", ctx)
     else:
         assert ctx.parent
         click.echo(ctx.parent.get_help())
-
-
-# Add subcommands from other modules
-main.add_command(list_templates, name="list")
-main.add_command(make)
-main.add_command(check)
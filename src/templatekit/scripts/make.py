@@ -3,14 +3,22 @@
 
 __all__ = ("make",)
 
+import json
 import os
-from typing import Dict, Optional
+import sys
+from typing import IO, Any, Dict, List, Optional
 
 import click
 import pyperclip
 from cookiecutter.main import cookiecutter
 
-from ..filerender import render_file_template
+from ..filerender import (
+    FileTemplateRenderer,
+    iter_render_file_template_batch,
+    render_file_template,
+    stream_and_write_file_template,
+)
+from ..fileutils import open_atomic
 from ..repo import FileTemplate, ProjectTemplate, Repo
 
 
@@ -31,12 +39,20 @@ from ..repo import FileTemplate, ProjectTemplate, Repo
     default=False,
     help="Copy a rendered file/snippet to the clipboard.",
 )
+@click.option(
+    "--batch",
+    "batch_file",
+    type=click.File("r"),
+    help="Render a file template once for each line of a JSON Lines file "
+    "(use '-' for stdin), without prompting.",
+)
 @click.pass_obj
 def make(
     state: Dict[str, Repo],
     name: str,
     output_path: Optional[str],
     copy_to_clipboard: bool,
+    batch_file: Optional[IO[str]],
 ) -> None:
     """Make a file or project from a template called <template name>.
 
@@ -57,6 +73,16 @@ def make(
     the content is printed to stdout.
 
     Set -c/--copy to also copy the rendered content to the clipboard.
+
+    \b
+    Batch options (file templates only)
+    -----------------------------------
+
+    Set --batch to a JSON Lines file to render the template many times with
+    the template defaults overridden by each line. Each line is a JSON
+    object with an optional "context" object of cookiecutter.json values,
+    and an optional "output" path. Without an "output" path, the content is
+    printed to stdout. --output and --copy can't be used with --batch.
     """
     repo = state["repo"]
     try:
@@ -68,7 +94,17 @@ def make(
         )
         raise click.UsageError(message)
 
-    if isinstance(template, FileTemplate):
+    if batch_file is not None:
+        if not isinstance(template, FileTemplate):
+            raise click.UsageError(
+                "--batch can only be used with file templates."
+            )
+        if output_path is not None or copy_to_clipboard:
+            raise click.UsageError(
+                "--output and --copy can't be used with --batch."
+            )
+        _handle_file_template_batch(template, batch_file)
+    elif isinstance(template, FileTemplate):
         _handle_file_template(template, output_path, copy_to_clipboard)
     else:
         assert isinstance(template, ProjectTemplate)
@@ -79,27 +115,99 @@ def _handle_file_template(
     template: FileTemplate, output_path: Optional[str], copy_to_clipboard: bool
 ) -> None:
     """Handle rendering and output for a file template."""
-    rendered_text = render_file_template(
-        template.source_path, use_defaults=False
-    )
-
-    if output_path is None:
-        # Just output to the console
-        print()
-        print(rendered_text)
-
-    else:
-        # Write to a file
+    if output_path is not None:
         base_dir = os.path.dirname(output_path)
         if not os.path.exists(base_dir):
             os.makedirs(base_dir)
-        with open(output_path, "w") as fh:
-            fh.write(rendered_text)
 
     if copy_to_clipboard:
+        # The clipboard needs the whole rendered text
+        rendered_text = render_file_template(
+            template.source_path, use_defaults=False
+        )
+        if output_path is None:
+            # Just output to the console
+            print()
+            print(rendered_text)
+        else:
+            with open(output_path, "w") as fh:
+                fh.write(rendered_text)
         pyperclip.copy(rendered_text)
         click.echo("Copied to clipboard")
 
+    elif output_path is None:
+        # Stream the rendered content to the console, so that large files
+        # aren't held in memory. Prompting happens before anything is
+        # printed.
+        chunks = FileTemplateRenderer(cache_size=1).generate(
+            template.source_path, use_defaults=False
+        )
+        print()
+        sys.stdout.writelines(chunks)
+        print()
+
+    else:
+        # Stream the rendered content to a temporary file that replaces the
+        # output file once rendering succeeds, so that a rendering error
+        # doesn't leave a partially written file. Like other outputs, the
+        # file doesn't get the template's permissions.
+        stream_and_write_file_template(
+            template.source_path,
+            output_path,
+            use_defaults=False,
+            copy_mode=False,
+        )
+
+
+def _handle_file_template_batch(
+    template: FileTemplate, batch_file: IO[str]
+) -> None:
+    """Handle rendering and output for a batch of file template contexts."""
+    jobs: List[Dict[str, Any]] = []
+    for line_number, line in enumerate(batch_file, start=1):
+        if not line.strip():
+            continue
+        try:
+            job = json.loads(line)
+        except ValueError as err:
+            raise click.BadParameter(
+                "Line {0:d} isn't valid JSON: {1!s}".format(line_number, err),
+                param_hint="--batch",
+            )
+        if not isinstance(job, dict) or not isinstance(
+            job.get("context", {}), dict
+        ):
+            raise click.BadParameter(
+                'Line {0:d} must be a JSON object with an optional "context" '
+                "object.".format(line_number),
+                param_hint="--batch",
+            )
+        if "output" in job and not (
+            isinstance(job["output"], str) and job["output"]
+        ):
+            raise click.BadParameter(
+                'The "output" of line {0:d} must be a file path '
+                "string.".format(line_number),
+                param_hint="--batch",
+            )
+        jobs.append(job)
+
+    rendered_texts = iter_render_file_template_batch(
+        template.source_path, (job.get("context") for job in jobs)
+    )
+    for job, rendered_text in zip(jobs, rendered_texts):
+        if "output" in job:
+            output_path = os.path.abspath(job["output"])
+            base_dir = os.path.dirname(output_path)
+            if not os.path.exists(base_dir):
+                os.makedirs(base_dir)
+            # Replace the output file only once it's fully written
+            with open_atomic(output_path) as fh:
+                fh.write(rendered_text)
+            click.echo("Wrote {0}".format(output_path), err=True)
+        else:
+            print(rendered_text)
+
 
 def _handle_project_template(
     template: ProjectTemplate, output_path: Optional[str]
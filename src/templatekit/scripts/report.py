@@ -0,0 +1,63 @@
+"""Subcommands for working with reports of templatekit check.
+"""
+
+__all__ = ("report",)
+
+from typing import List, Optional
+
+import click
+
+from ..report import REPORT_FORMATS, CheckReport
+
+
+@click.group(short_help="Work with check reports")
+def report() -> None:
+    """Work with the reports written by templatekit check --report."""
+
+
+@report.command()
+@click.argument(
+    "inputs",
+    nargs=-1,
+    required=True,
+    type=click.Path(exists=True, dir_okay=False),
+)
+@click.option(
+    "-o",
+    "--output",
+    "output_path",
+    required=True,
+    type=click.Path(dir_okay=False, writable=True),
+    help="Path of the merged report.",
+)
+@click.option(
+    "--format",
+    "report_format",
+    type=click.Choice(REPORT_FORMATS),
+    default=None,
+    help="Format of the merged report. Default is junit if the file name "
+    "ends with .xml, and json otherwise.",
+)
+def merge(
+    inputs: List[str], output_path: str, report_format: Optional[str]
+) -> None:
+    """Merge the reports of the shards of a sharded check.
+
+    Input reports can be in either the JSON or JUnit XML format. A non-zero
+    status code is returned if any check in the merged report failed.
+    """
+    merged = CheckReport.merge(CheckReport.read(path) for path in inputs)
+    if report_format is None:
+        report_format = "junit" if output_path.endswith(".xml") else "json"
+    merged.write(output_path, format=report_format)
+    click.echo(
+        "Merged {0:d} report(s) with {1:d} check(s) and {2:d} failure(s) "
+        "into {3}".format(
+            len(inputs),
+            len(merged.cases),
+            len(merged.failures),
+            output_path,
+        )
+    )
+    if merged.failures:
+        raise SystemExit(1)
@@ -0,0 +1,121 @@
+"""Implements the ``serve`` command for serving templates over HTTP.
+"""
+
+__all__ = ("serve",)
+
+import asyncio
+import os
+import signal
+import socket
+import stat
+from typing import Any, Dict, Optional
+
+import click
+
+
+@click.command(short_help="Serve templates over HTTP/JSON")
+@click.option(
+    "--host",
+    default="127.0.0.1",
+    show_default=True,
+    help="Host name or address to listen on.",
+)
+@click.option(
+    "--port",
+    type=int,
+    default=8000,
+    show_default=True,
+    help="TCP port to listen on.",
+)
+@click.option(
+    "--unix-socket",
+    "unix_socket",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Listen on a Unix socket at this path, instead of a TCP port.",
+)
+@click.option(
+    "--poll-interval",
+    "poll_interval",
+    type=float,
+    default=2.0,
+    show_default=True,
+    help="Seconds between checks for changed templates, which are "
+    "reloaded. Changes are detected from file system events instead if "
+    "watchdog is installed. Use 0 to disable reloading.",
+)
+@click.pass_obj
+def serve(
+    state: Dict[str, Any],
+    host: str,
+    port: int,
+    unix_socket: Optional[str],
+    poll_interval: float,
+) -> None:
+    """Serve the templates of the repository over HTTP/JSON.
+
+    The repository is loaded once, and compiled templates are kept in
+    memory, so that clients can list and render templates without starting
+    templatekit for each request. Endpoints:
+
+    \b
+    GET  /templates                  List templates.
+    GET  /templates/<name>           Get a template's configuration.
+    POST /templates/<name>/render    Render a file template. The optional
+                                     JSON body is {"context": {...}}.
+    GET  /health                     Check that the server is running.
+    """
+    from ..server import TemplateServer
+
+    server = TemplateServer(state["repo"], poll_interval=poll_interval)
+    if unix_socket is not None and _is_socket(unix_socket):
+        if _is_socket_listening(unix_socket):
+            raise click.ClickException(
+                "Another server is listening on {0}".format(unix_socket)
+            )
+        # Left over from a server that didn't exit cleanly
+        os.remove(unix_socket)
+    try:
+        asyncio.run(_serve(server, host, port, unix_socket))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if unix_socket is not None and os.path.exists(unix_socket):
+            os.remove(unix_socket)
+
+
+async def _serve(
+    server: Any, host: str, port: int, unix_socket: Optional[str]
+) -> None:
+    await server.start(host=host, port=port, unix_socket=unix_socket)
+    for address in server.addresses:
+        if isinstance(address, tuple):
+            address = "http://{0}:{1}".format(address[0], address[1])
+        click.echo("Serving templates on {0}".format(address))
+    serve_task = asyncio.ensure_future(server.serve_forever())
+    # Exit cleanly, closing the server and removing its socket, on SIGTERM
+    asyncio.get_running_loop().add_signal_handler(
+        signal.SIGTERM, serve_task.cancel
+    )
+    try:
+        await serve_task
+    except asyncio.CancelledError:
+        pass
+    finally:
+        await server.close()
+
+
+def _is_socket(path: str) -> bool:
+    try:
+        return stat.S_ISSOCK(os.stat(path).st_mode)
+    except OSError:
+        return False
+
+
+def _is_socket_listening(path: str) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+        except OSError:
+            return False
+    return True
@@ -0,0 +1,431 @@
+"""A long-running HTTP/JSON server for listing and rendering templates.
+
+The server loads a template repository once and keeps its templates, parsed
+configurations, and compiled Jinja templates in memory, so clients such as
+chat bots don't pay the cost of starting templatekit for each request. It
+listens on a TCP port or a Unix socket.
+
+Endpoints
+---------
+``GET /templates``
+    List the templates: ``{"templates": [{"name": ..., "type": ...,
+    "group": ...}, ...]}``.
+``GET /templates/<name>``
+    Get a template's normalized ``templatekit.yaml`` configuration:
+    ``{"name": ..., "type": ..., "config": {...}}``.
+``POST /templates/<name>/render``
+    Render a file template. The optional JSON request body is
+    ``{"context": {...}}``, with values that override the defaults in the
+    template's ``cookiecutter.json`` file. The response is
+    ``{"name": ..., "text": ...}``.
+``GET /health``
+    ``{"status": "ok"}``.
+
+Errors are returned as ``{"error": message}`` with a 4xx or 5xx status.
+"""
+
+from __future__ import annotations
+
+__all__ = ("TemplateServer", "HttpError")
+
+import asyncio
+import functools
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+from .filerender import FileTemplateRenderer
+from .repo import BaseTemplate, FileTemplate, Repo
+from .watch import RepoWatcher, TemplateChange
+
+_STATUS_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+    501: "Not Implemented",
+}
+
+
+class HttpError(Exception):
+    """An error that is returned to the client with an HTTP status code.
+
+    Parameters
+    ----------
+    status : `int`
+        The HTTP status code.
+    message : `str`
+        Description of the error.
+    """
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class TemplateServer(object):
+    """Server that lists, describes, and renders the templates of a
+    repository over HTTP/JSON.
+
+    Parameters
+    ----------
+    repo : `templatekit.repo.Repo`
+        The template repository.
+    poll_interval : `float`, optional
+        Interval, in seconds, between checks for changed templates, if
+        watchdog isn't installed (see `templatekit.watch.RepoWatcher`). If
+        ``0``, the repository isn't watched.
+    renderer : `templatekit.filerender.FileTemplateRenderer`, optional
+        Renderer for file templates. By default, a new renderer is used.
+    max_body_size : `int`, optional
+        Maximum size of request bodies, in bytes.
+    max_header_count : `int`, optional
+        Maximum number of header fields in a request.
+
+    Notes
+    -----
+    Templates are rendered on the event loop's default thread pool, so
+    renders don't block other requests. The repository is watched by a
+    `templatekit.watch.RepoWatcher` (the `watcher` attribute): when a
+    template's ``templatekit.yaml``, ``cookiecutter.json``, or ``.jinja``
+    file changes, or a template is added or removed, only that template is
+    reloaded, and its compiled templates are dropped from the renderer and
+    recompiled.
+
+    Request bodies must have a ``Content-Length`` header: requests with a
+    ``Transfer-Encoding`` (such as ``chunked``) are rejected with a 501
+    status.
+    """
+
+    def __init__(
+        self,
+        repo: Repo,
+        poll_interval: float = 2.0,
+        renderer: Optional[FileTemplateRenderer] = None,
+        max_body_size: int = 1024 * 1024,
+        max_header_count: int = 100,
+    ):
+        super().__init__()
+        self._log = logging.getLogger(__name__)
+        self.repo = repo
+        self.poll_interval = poll_interval
+        self.renderer = renderer or FileTemplateRenderer()
+        self.max_body_size = max_body_size
+        self.max_header_count = max_header_count
+        self._server: Optional[asyncio.Server] = None
+        self.watcher = RepoWatcher(
+            repo,
+            callbacks=[self._handle_template_change],
+            poll_interval=poll_interval,
+        )
+
+    async def start(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        unix_socket: Optional[str] = None,
+    ) -> None:
+        """Start listening for requests, and start watching for changes.
+
+        Parameters
+        ----------
+        host : `str`, optional
+            Host name or address to listen on.
+        port : `int`, optional
+            TCP port to listen on. Use ``0`` for any free port.
+        unix_socket : `str`, optional
+            If set, listen on a Unix socket at this path instead of a TCP
+            port.
+        """
+        loop = asyncio.get_running_loop()
+        # Load all templates and their configurations up front, so that the
+        # first requests are as fast as later ones.
+        await loop.run_in_executor(None, self._preload)
+        if unix_socket is not None:
+            self._server = await asyncio.start_unix_server(
+                self._handle_connection, path=unix_socket
+            )
+        else:
+            self._server = await asyncio.start_server(
+                self._handle_connection, host=host, port=port
+            )
+        if self.poll_interval > 0:
+            self.watcher.start()
+
+    @property
+    def addresses(self) -> List[Any]:
+        """The addresses that the server listens on (`list`)."""
+        if self._server is None:
+            return []
+        return [sock.getsockname() for sock in self._server.sockets]
+
+    async def serve_forever(self) -> None:
+        """Serve requests until the server is closed."""
+        assert self._server is not None, "Call start() first"
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        """Stop listening for requests, and stop watching for changes."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.watcher.stop)
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def _preload(self) -> None:
+        self.watcher.take_snapshot()
+        for _, template in self.repo.items():
+            template.load()
+            self._precompile(template)
+
+    def _precompile(self, template: BaseTemplate) -> None:
+        if isinstance(template, FileTemplate):
+            try:
+                self.renderer.get_template(template.source_path)
+            except Exception:
+                # Errors are reported when the template is rendered
+                self._log.debug("Couldn't compile %s", template.path)
+
+    async def handle_request(
+        self, method: str, path: str, body: bytes = b""
+    ) -> Tuple[int, Dict[str, Any]]:
+        """Handle a request.
+
+        Parameters
+        ----------
+        method : `str`
+            HTTP method, such as ``GET``.
+        path : `str`
+            Request path, such as ``/templates``.
+        body : `bytes`, optional
+            Request body.
+
+        Returns
+        -------
+        status : `int`
+            HTTP status code.
+        data : `dict`
+            JSON-serializable response.
+        """
+        try:
+            return 200, await self._route(method, path, body)
+        except HttpError as err:
+            return err.status, {"error": err.message}
+        except Exception as err:
+            self._log.exception("Error handling %s %s", method, path)
+            return 500, {
+                "error": "{0}: {1!s}".format(err.__class__.__name__, err)
+            }
+
+    async def _route(
+        self, method: str, path: str, body: bytes
+    ) -> Dict[str, Any]:
+        parts = [unquote(p) for p in urlsplit(path).path.split("/") if p]
+        if parts == ["health"]:
+            _check_method(method, "GET")
+            return {"status": "ok"}
+        if parts == ["templates"]:
+            _check_method(method, "GET")
+            return await self._run(self._list_templates)
+        if len(parts) == 2 and parts[0] == "templates":
+            _check_method(method, "GET")
+            return await self._run(self._get_template_config, parts[1])
+        if len(parts) == 3 and parts[0] == "templates":
+            if parts[2] == "render":
+                _check_method(method, "POST")
+                context = _parse_render_body(body)
+                return await self._run(
+                    self._render_template, parts[1], context
+                )
+        raise HttpError(404, "Not found: {0}".format(path))
+
+    async def _run(self, func: Any, *args: Any) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(func, *args))
+
+    def _list_templates(self) -> Dict[str, Any]:
+        templates = []
+        # Get templates from the repository's index, rather than
+        # iter_templates, so that loaded templates are reused. The index
+        # is read in one step, because the watcher can reload templates
+        # while the request is handled.
+        for _, template in self.repo.items():
+            entry = {"name": template.name, "type": _get_type(template)}
+            try:
+                entry["group"] = template.config["group"]
+            except Exception as err:
+                entry["error"] = "{0}: {1!s}".format(
+                    err.__class__.__name__, err
+                )
+            templates.append(entry)
+        return {"templates": templates}
+
+    def _get_template(self, name: str) -> BaseTemplate:
+        try:
+            return self.repo[name]
+        except KeyError:
+            raise HttpError(404, "Template not found: {0}".format(name))
+
+    def _get_template_config(self, name: str) -> Dict[str, Any]:
+        template = self._get_template(name)
+        return {
+            "name": template.name,
+            "type": _get_type(template),
+            "config": template.config.to_dict(),
+        }
+
+    def _render_template(
+        self, name: str, context: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        template = self._get_template(name)
+        if not isinstance(template, FileTemplate):
+            raise HttpError(
+                400,
+                "Template {0} is a project template; only file templates "
+                "can be rendered".format(name),
+            )
+        text = self.renderer.render(
+            template.source_path, use_defaults=True, extra_context=context
+        )
+        return {"name": template.name, "text": text}
+
+    def check_for_changes(self) -> bool:
+        """Check if templates changed, and reload them if so.
+
+        This check polls the template directories, even if the `watcher`
+        isn't running.
+
+        Returns
+        -------
+        changed : `bool`
+            `True` if templates changed and were reloaded.
+        """
+        return bool(self.watcher.check_for_changes())
+
+    def _handle_template_change(self, change: TemplateChange) -> None:
+        """Drop the compiled templates of a changed template, and compile
+        its new version.
+        """
+        for path in change.paths:
+            self.renderer.invalidate(path)
+        if change.template is not None:
+            self._precompile(change.template)
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                status, data = await self.handle_request(method, path, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                _write_response(writer, status, data, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except HttpError as err:
+            _write_response(writer, err.status, {"error": err.message}, False)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(
+        self, reader: asyncio.StreamReader
+    ) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+        request_line = await reader.readline()
+        if not request_line.strip():
+            return None
+        try:
+            method, path, _ = request_line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise HttpError(400, "Malformed request line")
+
+        headers: Dict[str, str] = {}
+        header_count = 0
+        while True:
+            try:
+                line = await reader.readline()
+            except ValueError:
+                # The line is longer than the stream reader's limit
+                raise HttpError(431, "Request header field is too large")
+            if line in (b"\r\n", b"\n", b""):
+                break
+            header_count += 1
+            if header_count > self.max_header_count:
+                raise HttpError(431, "Too many request header fields")
+            key, _, value = line.decode("latin-1").partition(":")
+            headers[key.strip().lower()] = value.strip()
+
+        if "transfer-encoding" in headers:
+            raise HttpError(
+                501,
+                "Transfer-Encoding isn't supported; send the body with a "
+                "Content-Length",
+            )
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise HttpError(400, "Invalid Content-Length")
+        if length > self.max_body_size:
+            raise HttpError(413, "Request body is too large")
+        body = await reader.readexactly(length) if length > 0 else b""
+        return method.upper(), path, headers, body
+
+
+def _check_method(method: str, allowed: str) -> None:
+    if method != allowed:
+        raise HttpError(
+            405, "Method {0} not allowed; use {1}".format(method, allowed)
+        )
+
+
+def _parse_render_body(body: bytes) -> Optional[Dict[str, Any]]:
+    if not body.strip():
+        return None
+    try:
+        data = json.loads(body)
+    except ValueError as err:
+        raise HttpError(400, "Invalid JSON: {0!s}".format(err))
+    if not isinstance(data, dict):
+        raise HttpError(400, "The request body must be a JSON object")
+    context = data.get("context")
+    if context is not None and not isinstance(context, dict):
+        raise HttpError(400, "context must be a JSON object")
+    return context
+
+
+def _get_type(template: BaseTemplate) -> str:
+    return "file" if isinstance(template, FileTemplate) else "project"
+
+
+def _write_response(
+    writer: asyncio.StreamWriter,
+    status: int,
+    data: Dict[str, Any],
+    keep_alive: bool,
+) -> None:
+    body = json.dumps(data).encode("utf-8")
+    head = (
+        "HTTP/1.1 {0:d} {1}\r\n"
+        "Content-Type: application/json\r\n"
+        "Content-Length: {2:d}\r\n"
+        "Connection: {3}\r\n"
+        "\r\n"
+    ).format(
+        status,
+        _STATUS_REASONS.get(status, "Error"),
+        len(body),
+        "keep-alive" if keep_alive else "close",
+    )
+    writer.write(head.encode("latin-1") + body)
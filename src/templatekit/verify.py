@@ -0,0 +1,436 @@
+"""Verify template examples against the committed files in Git, without
+writing to the working tree.
+
+File template examples are rendered in memory, and project template
+examples are generated in a temporary staging directory (on a tmpfs, such as
+``/dev/shm``, if one is available) by the same renderer that the examples
+builders use, `templatekit.projectrender`. The rendered files are compared
+with the files committed in the repository's ``HEAD`` tree, which are read
+directly from the Git object database. Because neither the examples nor the
+Git index are written, verifications can run concurrently against a
+read-only checkout.
+"""
+
+from __future__ import annotations
+
+__all__ = (
+    "RenderedFile",
+    "ExampleMismatch",
+    "ExampleVerification",
+    "get_staging_dir",
+    "render_example",
+    "verify_examples",
+    "verify_repo_examples",
+)
+
+import difflib
+import logging
+import os
+import stat
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .examples import Example, get_examples_or_error
+from .filerender import render_file_template
+from .gitstatus import GitTree
+from .instrumentation import span
+from .projectrender import render_project_template
+from .repo import BaseTemplate, Repo
+
+
+class RenderedFile(NamedTuple):
+    """A file rendered from a template, held in memory."""
+
+    path: str
+    """Path of the file, relative to the repository root, with ``/``
+    separators.
+    """
+
+    content: bytes
+    """Content of the file."""
+
+    executable: bool
+    """`True` if the file is executable."""
+
+
+class ExampleMismatch(NamedTuple):
+    """A difference between a rendered example file and the committed
+    file.
+    """
+
+    path: str
+    """Path of the file, relative to the repository root."""
+
+    change: str
+    """Kind of difference: ``"modified"`` (content differs), ``"mode"``
+    (executable bit differs), ``"added"`` (rendered, but not committed), or
+    ``"deleted"`` (committed, but not rendered).
+    """
+
+    diff: str
+    """Unified diff from the committed to the rendered file, or an empty
+    string for mode changes.
+    """
+
+
+class ExampleVerification(NamedTuple):
+    """The result of verifying an example."""
+
+    example: Example
+    """The example that was verified."""
+
+    duration: float
+    """Time taken to render the example, in seconds."""
+
+    error: Optional[str]
+    """Description of the error that prevented the example from rendering,
+    or `None` if the example was rendered.
+    """
+
+    mismatches: List[ExampleMismatch]
+    """Differences between the rendered and committed files."""
+
+    @property
+    def ok(self) -> bool:
+        """`True` if the example rendered and matches the committed files
+        (`bool`).
+        """
+        return self.error is None and not self.mismatches
+
+
+def get_staging_dir() -> Optional[str]:
+    """Get a directory on a memory-backed file system for staging project
+    examples.
+
+    Returns
+    -------
+    dirname : `str` or `None`
+        ``/dev/shm`` if it exists and is writable, or `None` to use the
+        default temporary directory.
+    """
+    dirname = "/dev/shm"
+    if os.path.isdir(dirname) and os.access(dirname, os.W_OK):
+        return dirname
+    return None
+
+
+def render_example(example: Example, root: str) -> List[RenderedFile]:
+    """Render an example without writing to its output path.
+
+    Parameters
+    ----------
+    example : `templatekit.examples.Example`
+        The example to render.
+    root : `str`
+        Path of the template repository's root directory, which the paths of
+        the rendered files are relative to.
+
+    Returns
+    -------
+    files : `list` of `RenderedFile`
+        The rendered files.
+    """
+    if example.template_type == "file":
+        assert example.source_path is not None
+        text = render_file_template(
+            example.source_path,
+            use_defaults=True,
+            extra_context=example.context,
+        )
+        return [
+            RenderedFile(
+                path=_relpath(example.output_path, root),
+                content=text.encode("utf-8"),
+                executable=_is_executable(example.source_path),
+            )
+        ]
+
+    files = []
+    with tempfile.TemporaryDirectory(dir=get_staging_dir()) as staging_dir:
+        with span("cookiecutter.generate", template=example.template_name):
+            render_project_template(
+                example.template_path,
+                output_dir=staging_dir,
+                use_defaults=True,
+                extra_context=example.context,
+            )
+        for dirpath, dirnames, filenames in os.walk(staging_dir):
+            dirnames.sort()
+            relpath = os.path.relpath(dirpath, staging_dir)
+            for filename in sorted(filenames):
+                staged_path = os.path.join(dirpath, filename)
+                with open(staged_path, "rb") as f:
+                    content = f.read()
+                output_path = os.path.normpath(
+                    os.path.join(example.output_path, relpath, filename)
+                )
+                files.append(
+                    RenderedFile(
+                        path=_relpath(output_path, root),
+                        content=content,
+                        executable=_is_executable(staged_path),
+                    )
+                )
+    return files
+
+
+def _render_example_or_error(
+    example: Example, root: str
+) -> Tuple[float, Optional[str], List[RenderedFile]]:
+    """Render an example, returning the duration, an error message, and the
+    rendered files.
+    """
+    logger = logging.getLogger(__name__)
+    logger.debug("Rendering example %s", example.output_path)
+    start = time.perf_counter()
+    try:
+        files = render_example(example, root)
+    except Exception as err:
+        # Any error from Cookiecutter or Jinja means the example failed
+        error = "{0}: {1!s}".format(err.__class__.__name__, err)
+        return time.perf_counter() - start, error, []
+    return time.perf_counter() - start, None, files
+
+
+def _relpath(path: str, root: str) -> str:
+    return os.path.relpath(path, root).replace(os.sep, "/")
+
+
+def _is_executable(path: str) -> bool:
+    return bool(os.stat(path).st_mode & stat.S_IXUSR)
+
+
+def verify_examples(
+    examples: Iterable[Example],
+    root: str,
+    tree: Optional[GitTree] = None,
+    workers: Optional[int] = None,
+) -> List[ExampleVerification]:
+    """Verify that examples match the files committed in Git.
+
+    Parameters
+    ----------
+    examples : iterable of `templatekit.examples.Example`
+        The examples to verify.
+    root : `str`
+        Path of the template repository's root directory.
+    tree : `templatekit.gitstatus.GitTree`, optional
+        The committed tree to compare with. Default is the ``HEAD`` tree of
+        the repository.
+    workers : `int`, optional
+        Number of worker processes that render examples. The default is the
+        number of CPUs. If ``1``, the examples are rendered in the current
+        process.
+
+    Returns
+    -------
+    results : `list` of `ExampleVerification`
+        The results, in the same order as ``examples``.
+    """
+    examples = list(examples)
+    if tree is None:
+        tree = GitTree(root)
+    roots = [root] * len(examples)
+    if workers == 1 or len(examples) <= 1:
+        rendered = list(map(_render_example_or_error, examples, roots))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            rendered = list(
+                executor.map(_render_example_or_error, examples, roots)
+            )
+
+    committed_paths: List[List[str]] = []
+    for example, (_, error, files) in zip(examples, rendered):
+        if error is not None:
+            committed_paths.append([])
+        else:
+            committed_paths.append(_get_committed_paths(example, files, tree))
+    committed = tree.read_files(
+        path
+        for paths, (_, _, files) in zip(committed_paths, rendered)
+        for path in paths + [f.path for f in files]
+    )
+
+    results = []
+    for example, paths, (duration, error, files) in zip(
+        examples, committed_paths, rendered
+    ):
+        mismatches = []
+        if error is None:
+            mismatches = _compare_files(files, paths, committed, tree)
+        results.append(
+            ExampleVerification(
+                example=example,
+                duration=duration,
+                error=error,
+                mismatches=mismatches,
+            )
+        )
+    return results
+
+
+def _get_committed_paths(
+    example: Example, files: List[RenderedFile], tree: GitTree
+) -> List[str]:
+    """Get the paths of committed files that belong to an example's output.
+
+    For a project example, these are the committed files in the top-level
+    directories that the project generates.
+    """
+    if example.template_type == "file":
+        return [f.path for f in files]
+    output_dir = _relpath(example.output_path, tree.root)
+    top_dirs = set()
+    for rendered_file in files:
+        relpath = rendered_file.path
+        if output_dir != ".":
+            relpath = relpath[len(output_dir) + 1 :]
+        if "/" in relpath:
+            top_dirs.add(relpath.split("/", 1)[0])
+    paths = []
+    for top_dir in sorted(top_dirs):
+        if output_dir != ".":
+            top_dir = output_dir + "/" + top_dir
+        paths.extend(tree.list_files(top_dir))
+    return paths
+
+
+def _compare_files(
+    files: List[RenderedFile],
+    committed_paths: List[str],
+    committed: Dict[str, bytes],
+    tree: GitTree,
+) -> List[ExampleMismatch]:
+    mismatches = []
+    rendered_paths = set()
+    for rendered_file in files:
+        rendered_paths.add(rendered_file.path)
+        if rendered_file.path not in committed:
+            mismatches.append(
+                ExampleMismatch(
+                    path=rendered_file.path,
+                    change="added",
+                    diff=_diff(
+                        rendered_file.path, None, rendered_file.content
+                    ),
+                )
+            )
+            continue
+        committed_content = committed[rendered_file.path]
+        if committed_content != rendered_file.content:
+            mismatches.append(
+                ExampleMismatch(
+                    path=rendered_file.path,
+                    change="modified",
+                    diff=_diff(
+                        rendered_file.path,
+                        committed_content,
+                        rendered_file.content,
+                    ),
+                )
+            )
+            continue
+        committed_mode = tree.entries[rendered_file.path][0]
+        if (committed_mode == "100755") != rendered_file.executable:
+            mismatches.append(
+                ExampleMismatch(
+                    path=rendered_file.path, change="mode", diff=""
+                )
+            )
+    for path in committed_paths:
+        if path not in rendered_paths:
+            mismatches.append(
+                ExampleMismatch(
+                    path=path,
+                    change="deleted",
+                    diff=_diff(path, committed[path], None),
+                )
+            )
+    return mismatches
+
+
+def _diff(path: str, before: Optional[bytes], after: Optional[bytes]) -> str:
+    """Make a unified diff between the committed (``before``) and rendered
+    (``after``) content of a file.
+    """
+    try:
+        before_lines = (
+            before.decode("utf-8").splitlines(keepends=True)
+            if before is not None
+            else []
+        )
+        after_lines = (
+            after.decode("utf-8").splitlines(keepends=True)
+            if after is not None
+            else []
+        )
+    except UnicodeDecodeError:
+        return "Binary files a/{0} and b/{0} differ\n".format(path)
+    lines = []
+    for line in difflib.unified_diff(
+        before_lines,
+        after_lines,
+        fromfile="a/" + path if before is not None else "/dev/null",
+        tofile="b/" + path if after is not None else "/dev/null",
+    ):
+        if not line.endswith("\n"):
+            line += "\n\\ No newline at end of file\n"
+        lines.append(line)
+    return "".join(lines)
+
+
+def verify_repo_examples(
+    repo: Repo,
+    templates: Optional[Iterable[BaseTemplate]] = None,
+    workers: Optional[int] = None,
+    ref: str = "HEAD",
+) -> List[ExampleVerification]:
+    """Verify that the examples of the templates in a template repository
+    match the files committed in Git.
+
+    Parameters
+    ----------
+    repo : `templatekit.repo.Repo`
+        The template repository.
+    templates : iterable of `templatekit.repo.BaseTemplate`, optional
+        The templates to verify examples for. The default is all templates in
+        the repository.
+    workers : `int`, optional
+        Number of worker processes. The default is the number of CPUs. If
+        ``1``, the examples are rendered in the current process.
+    ref : `str`, optional
+        The commit to compare with. Default is ``HEAD``.
+
+    Returns
+    -------
+    results : `list` of `ExampleVerification`
+        The results, in the order of templates in the repository. If a
+        template's examples couldn't be determined (for example, because of a
+        configuration error), the template has a single failed result with
+        the template's directory as the ``output_path``.
+    """
+    if templates is None:
+        templates = repo.iter_templates()
+
+    results: List[Optional[ExampleVerification]] = []
+    examples: List[Example] = []
+    for template in templates:
+        template_examples, error = get_examples_or_error(template)
+        if error is not None:
+            results.append(
+                ExampleVerification(template_examples[0], 0.0, error, [])
+            )
+            continue
+        examples.extend(template_examples)
+        results.extend(None for _ in template_examples)
+
+    verified = iter(
+        verify_examples(
+            examples, repo.root, tree=GitTree(repo.root, ref), workers=workers
+        )
+    )
+    return [
+        result if result is not None else next(verified) for result in results
+    ]
@@ -0,0 +1,407 @@
+"""Watch a template repository for changes, and reload changed templates.
+
+A `RepoWatcher` lets a long-lived `templatekit.repo.Repo`, such as the one in
+`templatekit.server.TemplateServer`, stay current without rescanning the
+whole repository: only the templates whose ``templatekit.yaml``,
+``cookiecutter.json``, or ``.jinja`` source files changed are reloaded, and
+callbacks are told which templates changed so that they can drop their own
+caches for just those templates.
+
+Changes are detected with file system events (inotify, on Linux) if the
+optional watchdog_ package is installed (``pip install templatekit[watch]``),
+and by polling modification times otherwise.
+
+.. _watchdog: https://github.com/gorakhargosh/watchdog
+"""
+
+from __future__ import annotations
+
+__all__ = ("RepoWatcher", "TemplateChange", "ChangeCallback")
+
+import logging
+import os
+import threading
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
+
+if TYPE_CHECKING:
+    from .repo import BaseTemplate, Repo
+
+_METADATA_FILENAMES = ("templatekit.yaml", "cookiecutter.json")
+"""Names of the files that a template's metadata is loaded from."""
+
+_Snapshot = Dict[str, Tuple[Tuple[str, int, int], ...]]
+"""The watched files of each template directory, keyed by directory path,
+as sorted ``(filename, mtime_ns, size)`` tuples.
+"""
+
+
+class TemplateChange(NamedTuple):
+    """A change to a template, reported to `RepoWatcher` callbacks."""
+
+    name: str
+    """Name of the template."""
+
+    paths: Tuple[str, ...]
+    """Paths of the changed template directories (there can be both a
+    project and a file template with the same name).
+    """
+
+    template: Optional[BaseTemplate]
+    """The reloaded template, or `None` if the template was removed or is no
+    longer recognizable.
+    """
+
+
+ChangeCallback = Callable[[TemplateChange], None]
+"""Type of `RepoWatcher` callbacks."""
+
+
+class RepoWatcher(object):
+    """Watches the templates of a repository, reloads templates that change,
+    and calls callbacks for each changed template.
+
+    Parameters
+    ----------
+    repo : `templatekit.repo.Repo`
+        The template repository. Changed templates are reloaded with
+        `templatekit.repo.Repo.reload_template`.
+    callbacks : iterable of callables, optional
+        Functions that are called with a `TemplateChange` after each changed
+        template is reloaded. See also `add_callback`.
+    poll_interval : `float`, optional
+        Interval, in seconds, between checks for changes when polling.
+    use_watchdog : `bool`, optional
+        If `True`, use watchdog file system events, which raises
+        `ImportError` in `start` if watchdog isn't installed. If `False`,
+        poll. By default, watchdog is used if it is installed.
+    debounce : `float`, optional
+        Time, in seconds, that file system events are collected for before
+        templates are reloaded, so that a burst of writes (such as a
+        ``git checkout``) reloads each template once.
+
+    Notes
+    -----
+    Only the files directly in template directories are watched: the
+    ``templatekit.yaml`` and ``cookiecutter.json`` files, and ``.jinja``
+    sources of file templates. Template directories that are added or
+    removed are also detected.
+
+    Templates are reloaded and callbacks are called on the watcher's thread.
+    Reloading is safe while other threads look up the repository's
+    templates. Callbacks should be quick and thread-safe; exceptions that
+    they raise are logged.
+    """
+
+    def __init__(
+        self,
+        repo: Repo,
+        callbacks: Iterable[ChangeCallback] = (),
+        poll_interval: float = 1.0,
+        use_watchdog: Optional[bool] = None,
+        debounce: float = 0.1,
+    ):
+        super().__init__()
+        self._log = logging.getLogger(__name__)
+        self.repo = repo
+        self.poll_interval = poll_interval
+        self.use_watchdog = use_watchdog
+        self.debounce = debounce
+        self._callbacks: List[ChangeCallback] = list(callbacks)
+        self._snapshot: Optional[_Snapshot] = None
+        self._lock = threading.RLock()
+        self._stop_event = threading.Event()
+        self._pending_event = threading.Event()
+        self._pending_paths: Set[str] = set()
+        self._thread: Optional[threading.Thread] = None
+        self._observer: Any = None
+
+    def __enter__(self) -> RepoWatcher:
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    @property
+    def backend(self) -> Optional[str]:
+        """The backend that detects changes while the watcher is running:
+        ``"watchdog"``, ``"polling"``, or `None` if the watcher isn't
+        running.
+        """
+        if self._thread is None:
+            return None
+        return "watchdog" if self._observer is not None else "polling"
+
+    def add_callback(self, callback: ChangeCallback) -> None:
+        """Add a function that is called with a `TemplateChange` after each
+        changed template is reloaded.
+
+        Parameters
+        ----------
+        callback : callable
+            The function.
+        """
+        with self._lock:
+            self._callbacks.append(callback)
+
+    def remove_callback(self, callback: ChangeCallback) -> None:
+        """Remove a callback.
+
+        Parameters
+        ----------
+        callback : callable
+            A function added with `add_callback`.
+        """
+        with self._lock:
+            self._callbacks.remove(callback)
+
+    def start(self) -> None:
+        """Start watching the repository on a background thread."""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._snapshot is None:
+                self.take_snapshot()
+        self._stop_event.clear()
+        self._pending_event.clear()
+        observer_class = self._get_observer_class()
+        if observer_class is not None:
+            self._observer = observer_class()
+            handler = _make_event_handler(self._handle_event)
+            for dirname in (
+                self.repo.project_templates_dirname,
+                self.repo.file_templates_dirname,
+            ):
+                self._observer.schedule(handler, dirname, recursive=True)
+            self._observer.start()
+            target = self._process_events
+        else:
+            target = self._poll
+        self._thread = threading.Thread(
+            target=target, name="templatekit-watch", daemon=True
+        )
+        self._thread.start()
+        self._log.debug("Watching %s with %s", self.repo.root, self.backend)
+
+    def stop(self) -> None:
+        """Stop watching the repository.
+
+        A reload that is in progress is finished first.
+        """
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._pending_event.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+        self._thread.join()
+        self._thread = None
+
+    def take_snapshot(self) -> None:
+        """Record the current state of the template directories, as the
+        baseline for `check_for_changes`.
+        """
+        with self._lock:
+            self._snapshot = self._get_snapshot()
+
+    def check_for_changes(self) -> List[TemplateChange]:
+        """Check for changed templates by comparing modification times with
+        the last check, and reload changed templates.
+
+        Returns
+        -------
+        changes : `list` of `TemplateChange`
+            The changed templates. Callbacks have been called for each
+            change.
+
+        Notes
+        -----
+        This method polls, whichever backend is used while the watcher is
+        running, so it can be used without starting the watcher. The first
+        check only records the baseline state, if `take_snapshot` wasn't
+        called.
+        """
+        with self._lock:
+            snapshot = self._get_snapshot()
+            previous_snapshot = self._snapshot
+            self._snapshot = snapshot
+            if previous_snapshot is None:
+                return []
+            changed_paths = [
+                path
+                for path in set(snapshot) | set(previous_snapshot)
+                if snapshot.get(path) != previous_snapshot.get(path)
+            ]
+            return self._reload(changed_paths)
+
+    def _get_snapshot(self) -> _Snapshot:
+        snapshot: _Snapshot = {}
+        for dirname in (
+            self.repo.project_templates_dirname,
+            self.repo.file_templates_dirname,
+        ):
+            for path in self.repo.list_template_dirs(dirname):
+                snapshot[path] = _get_watched_files(path)
+        return snapshot
+
+    def _update_snapshot(self, paths: Iterable[str]) -> None:
+        """Update the polling baseline for changed template directories."""
+        if self._snapshot is None:
+            return
+        for path in paths:
+            if os.path.isdir(path):
+                self._snapshot[path] = _get_watched_files(path)
+            else:
+                self._snapshot.pop(path, None)
+
+    def _reload(self, paths: Iterable[str]) -> List[TemplateChange]:
+        """Reload the templates of changed template directories, and call
+        the callbacks.
+        """
+        paths_by_name: Dict[str, List[str]] = {}
+        for path in sorted(paths):
+            paths_by_name.setdefault(os.path.basename(path), []).append(path)
+
+        changes: List[TemplateChange] = []
+        with self._lock:
+            for name, template_paths in sorted(paths_by_name.items()):
+                self._log.info("Template %s changed; reloading", name)
+                try:
+                    template = self.repo.reload_template(name)
+                except Exception:
+                    self._log.exception("Error reloading template %s", name)
+                    continue
+                change = TemplateChange(
+                    name=name, paths=tuple(template_paths), template=template
+                )
+                changes.append(change)
+                for callback in list(self._callbacks):
+                    try:
+                        callback(change)
+                    except Exception:
+                        self._log.exception(
+                            "Error in template change callback %r", callback
+                        )
+        return changes
+
+    def _poll(self) -> None:
+        while not self._stop_event.wait(self.poll_interval):
+            try:
+                self.check_for_changes()
+            except Exception:
+                self._log.exception("Error checking for template changes")
+
+    def _handle_event(self, path: str) -> None:
+        """Record a file system event, from the observer's thread."""
+        template_path = self._get_template_path(path)
+        if template_path is None:
+            return
+        with self._lock:
+            self._pending_paths.add(template_path)
+        self._pending_event.set()
+
+    def _get_template_path(self, path: str) -> Optional[str]:
+        """Get the template directory that a file system event affects, or
+        `None` if the event doesn't affect a template's watched files.
+        """
+        for dirname in (
+            self.repo.project_templates_dirname,
+            self.repo.file_templates_dirname,
+        ):
+            relative_path = os.path.relpath(path, dirname)
+            if relative_path.startswith(os.pardir) or relative_path == ".":
+                continue
+            parts = relative_path.split(os.sep)
+            if len(parts) == 1:
+                # A template directory was added or removed
+                return os.path.join(dirname, parts[0])
+            if len(parts) == 2 and _is_watched_filename(parts[1]):
+                return os.path.join(dirname, parts[0])
+            return None
+        return None
+
+    def _process_events(self) -> None:
+        while not self._stop_event.is_set():
+            self._pending_event.wait()
+            # Collect a burst of events before reloading
+            if self._stop_event.wait(self.debounce):
+                return
+            with self._lock:
+                self._pending_event.clear()
+                paths = self._pending_paths
+                self._pending_paths = set()
+                self._update_snapshot(paths)
+                self._reload(paths)
+
+    def _get_observer_class(self) -> Any:
+        """Get the watchdog observer class, or `None` to poll."""
+        if self.use_watchdog is False:
+            return None
+        try:
+            from watchdog.observers import Observer
+        except ImportError:
+            if self.use_watchdog:
+                raise
+            return None
+        return Observer
+
+
+def _make_event_handler(handle_path: Callable[[str], None]) -> Any:
+    """Make a watchdog event handler that calls a function with the paths
+    of events.
+    """
+    from watchdog.events import FileSystemEventHandler
+
+    class _EventHandler(FileSystemEventHandler):
+        def on_any_event(self, event: Any) -> None:
+            if event.event_type in ("opened", "closed_no_write"):
+                return
+            handle_path(os.fsdecode(event.src_path))
+            dest_path = getattr(event, "dest_path", None)
+            if dest_path:
+                handle_path(os.fsdecode(dest_path))
+
+    return _EventHandler()
+
+
+def _is_watched_filename(filename: str) -> bool:
+    return (
+        filename in _METADATA_FILENAMES
+        or os.path.splitext(filename)[1] == ".jinja"
+    )
+
+
+def _get_watched_files(path: str) -> Tuple[Tuple[str, int, int], ...]:
+    """Get the modification times and sizes of the watched files in a
+    template directory.
+    """
+    files: List[Tuple[str, int, int]] = []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if not _is_watched_filename(entry.name):
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                files.append((entry.name, stat.st_mtime_ns, stat.st_size))
+    except OSError:
+        return ()
+    files.sort()
+    return tuple(files)
@@ -0,0 +1,73 @@
+"""Benchmarks of rendering file templates and building examples.
+
+Run with ``tox -e benchmark``; these benchmarks aren't collected by a plain
+``pytest`` run.
+"""
+
+import shutil
+from pathlib import Path
+from typing import Callable
+
+import pytest
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from templatekit.examples import build_repo_examples
+from templatekit.filerender import FileTemplateRenderer, render_file_template
+from templatekit.repo import FileTemplate, Repo
+
+
+@pytest.fixture
+def file_template(
+    synthetic_repo_factory: Callable[[int], str],
+) -> FileTemplate:
+    """A file template from a generated repository."""
+    template = Repo(synthetic_repo_factory(10))["template0000"]
+    assert isinstance(template, FileTemplate)
+    return template
+
+
+def test_render_file_template(
+    benchmark: BenchmarkFixture, file_template: FileTemplate
+) -> None:
+    """Benchmark a one-off render of a file template."""
+    text = benchmark(
+        render_file_template, file_template.source_path, use_defaults=True
+    )
+    assert text == "template0000 (c) 2023\n"
+
+
+def test_render_file_template_renderer(
+    benchmark: BenchmarkFixture, file_template: FileTemplate
+) -> None:
+    """Benchmark repeated renders of a file template with a
+    FileTemplateRenderer.
+    """
+    renderer = FileTemplateRenderer()
+    text = benchmark(
+        renderer.render,
+        file_template.source_path,
+        use_defaults=True,
+        extra_context={"year": "2030"},
+    )
+    assert text == "template0000 (c) 2030\n"
+
+
+@pytest.mark.parametrize("size", [10, 100])
+def test_build_examples(
+    benchmark: BenchmarkFixture,
+    synthetic_repo_factory: Callable[[int], str],
+    tmp_path: Path,
+    size: int,
+) -> None:
+    """Benchmark building the examples of all templates in a repository, in
+    the current process.
+    """
+    root = tmp_path / "repo"
+    shutil.copytree(synthetic_repo_factory(size), root)
+    repo = Repo(str(root))
+
+    results = benchmark.pedantic(
+        build_repo_examples, args=(repo,), kwargs={"workers": 1}, rounds=3
+    )
+    assert len(results) == size
+    assert all(result.ok for result in results)
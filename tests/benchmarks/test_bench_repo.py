@@ -0,0 +1,109 @@
+"""Benchmarks of template discovery and configuration loading.
+
+Run with ``tox -e benchmark``; these benchmarks aren't collected by a plain
+``pytest`` run.
+"""
+
+import os
+from typing import Callable
+
+import pytest
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from templatekit.repo import Repo, TemplateConfig
+
+SIZES = [10, 100, 1000]
+"""Numbers of templates in the benchmarked repositories."""
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_discover_repo(
+    benchmark: BenchmarkFixture,
+    synthetic_repo_factory: Callable[[int], str],
+    size: int,
+) -> None:
+    """Benchmark discovering a repository from a template directory."""
+    root = synthetic_repo_factory(size)
+    dirname = os.path.join(root, "file_templates", "template0000")
+    repo = benchmark(Repo.discover_repo, dirname=dirname)
+    assert repo.root == root
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_iter_templates(
+    benchmark: BenchmarkFixture,
+    synthetic_repo_factory: Callable[[int], str],
+    size: int,
+) -> None:
+    """Benchmark listing the templates of a repository, without loading
+    their configurations.
+    """
+    root = synthetic_repo_factory(size)
+    templates = benchmark(lambda: list(Repo(root).iter_templates()))
+    assert len(templates) == size
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_iter_templates_config(
+    benchmark: BenchmarkFixture,
+    synthetic_repo_factory: Callable[[int], str],
+    size: int,
+) -> None:
+    """Benchmark loading the configurations of all templates in a
+    repository.
+    """
+    root = synthetic_repo_factory(size)
+
+    def load() -> int:
+        return len([t.config for t in Repo(root).iter_templates()])
+
+    assert benchmark(load) == size
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_getitem_cold(
+    benchmark: BenchmarkFixture,
+    synthetic_repo_factory: Callable[[int], str],
+    size: int,
+) -> None:
+    """Benchmark getting a template by name from a new repository object,
+    which builds the template index.
+    """
+    root = synthetic_repo_factory(size)
+    name = "template{0:04d}".format(size - 1)
+    template = benchmark(lambda: Repo(root)[name])
+    assert template.name == name
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_getitem_warm(
+    benchmark: BenchmarkFixture,
+    synthetic_repo_factory: Callable[[int], str],
+    size: int,
+) -> None:
+    """Benchmark getting a template by name once the template index is
+    built.
+    """
+    repo = Repo(synthetic_repo_factory(size))
+    name = "template{0:04d}".format(size - 1)
+    repo[name]
+    template = benchmark(repo.__getitem__, name)
+    assert template.name == name
+
+
+@pytest.mark.parametrize("template_type", ["file", "project"])
+def test_normalize_config(
+    benchmark: BenchmarkFixture,
+    synthetic_repo_factory: Callable[[int], str],
+    template_type: str,
+) -> None:
+    """Benchmark validating and normalizing a template's configuration."""
+    repo = Repo(synthetic_repo_factory(10))
+    template = repo[
+        "template0000" if template_type == "file" else "template0001"
+    ]
+    data = {"name": template.name}
+    template.cookiecutter
+
+    config = benchmark(lambda: TemplateConfig(data).normalize(template))
+    assert config["name"] == template.name
@@ -2,8 +2,15 @@
 """
 
 import os
+from pathlib import Path
+from typing import Any, Callable, Dict, List
 
 import pytest
+from support import (
+    write_file_template,
+    write_project_template,
+    write_synthetic_repo,
+)
 
 
 @pytest.fixture(scope="session")
@@ -13,3 +20,48 @@ def templates_repo() -> str:
         os.path.join(os.path.dirname(__file__), "data/templates")
     )
     return repo_path
+
+
+@pytest.fixture
+def synthetic_repo(tmp_path: Path) -> str:
+    """Directory path of a small, generated templates repository.
+
+    The repository contains the ``alpha`` and ``beta`` file templates, the
+    ``gamma`` project template, and a ``not_a_template`` directory in
+    ``file_templates``.
+    """
+    write_file_template(tmp_path, "alpha")
+    write_file_template(tmp_path, "beta")
+    write_project_template(tmp_path, "gamma")
+    (tmp_path / "file_templates" / "not_a_template").mkdir()
+    return str(tmp_path)
+
+
+@pytest.fixture(scope="session")
+def synthetic_repo_factory(
+    tmp_path_factory: pytest.TempPathFactory,
+) -> Callable[[int], str]:
+    """Factory of generated templates repositories, by number of templates.
+
+    Repositories are shared for the session, so tests mustn't modify them.
+    """
+    repos: Dict[int, str] = {}
+
+    def factory(size: int) -> str:
+        if size not in repos:
+            root = tmp_path_factory.mktemp("repo{0:d}".format(size))
+            repos[size] = str(write_synthetic_repo(root, size))
+        return repos[size]
+
+    return factory
+
+
+def pytest_benchmark_update_json(
+    config: pytest.Config, benchmarks: List[Any], output_json: Dict[str, Any]
+) -> None:
+    """Drop the timings of each round from benchmark JSON reports, keeping
+    only the statistics, so that the committed benchmark baseline
+    (``tests/benchmarks/baseline.json``) stays small.
+    """
+    for benchmark in output_json["benchmarks"]:
+        benchmark["stats"].pop("data", None)
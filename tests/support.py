@@ -0,0 +1,75 @@
+"""Helpers for writing template repositories in tests.
+
+Import these helpers explicitly (``from support import ...``); the
+fixtures in ``conftest.py`` are built on them.
+"""
+
+import json
+import subprocess
+from pathlib import Path
+
+
+def write_file_template(root: Path, name: str) -> Path:
+    """Write a minimal file template into a repository's ``file_templates``
+    directory.
+    """
+    template_dir = root / "file_templates" / name
+    template_dir.mkdir(parents=True)
+    (template_dir / "cookiecutter.json").write_text(
+        json.dumps({"name": name, "year": "2023"})
+    )
+    (template_dir / "templatekit.yaml").write_text(
+        'name: "{0}"\ngroup: "Synthetic"\n'.format(name)
+    )
+    (template_dir / "template.txt.jinja").write_text(
+        "{{ cookiecutter.name }} (c) {{ cookiecutter.year }}\n"
+    )
+    return template_dir
+
+
+def write_project_template(root: Path, name: str) -> Path:
+    """Write a minimal project template into a repository's
+    ``project_templates`` directory.
+    """
+    template_dir = root / "project_templates" / name
+    project_dir = template_dir / "{{cookiecutter.package_name}}"
+    project_dir.mkdir(parents=True)
+    (template_dir / "cookiecutter.json").write_text(
+        json.dumps({"package_name": "example", "license": ["MIT", "GPLv3"]})
+    )
+    (template_dir / "templatekit.yaml").write_text(
+        'name: "{0}"\n'.format(name)
+    )
+    (project_dir / "README.md").write_text(
+        "# {{ cookiecutter.package_name }}\n\n"
+        "License: {{ cookiecutter.license }}\n"
+    )
+    return template_dir
+
+
+def write_synthetic_repo(root: Path, size: int) -> Path:
+    """Write a templates repository with ``size`` templates, half of them
+    file templates and half project templates.
+    """
+    (root / "file_templates").mkdir(parents=True)
+    (root / "project_templates").mkdir(parents=True)
+    for i in range(size):
+        name = "template{0:04d}".format(i)
+        if i % 2 == 0:
+            write_file_template(root, name)
+        else:
+            write_project_template(root, name)
+    return root
+
+
+def run_git(root: str, *args: str) -> None:
+    """Run a Git command in a repository, with a test identity for
+    commits.
+    """
+    subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@test"]
+        + list(args),
+        cwd=root,
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
@@ -0,0 +1,96 @@
+"""Tests for the templatekit.aio module and Repo.aiter_templates.
+"""
+
+import asyncio
+import os
+from pathlib import Path
+from typing import List
+
+from templatekit.aio import (
+    AsyncFileTemplateRenderer,
+    render_and_write_file_template,
+    render_file_template,
+)
+from templatekit.filerender import render_file_template as render_sync
+from templatekit.repo import BaseTemplate, Repo
+
+
+def test_render_file_template(synthetic_repo: str) -> None:
+    """Test that async rendering matches synchronous rendering."""
+    template_path = os.path.join(
+        synthetic_repo, "file_templates/alpha/template.txt.jinja"
+    )
+    text = asyncio.run(
+        render_file_template(template_path, extra_context={"year": "2030"})
+    )
+    assert text == "alpha (c) 2030\n"
+    assert text == render_sync(
+        template_path, use_defaults=True, extra_context={"year": "2030"}
+    )
+
+
+def test_render_and_write_file_template(
+    synthetic_repo: str, tmp_path: Path
+) -> None:
+    """Test rendering and writing files, skipping unchanged files."""
+    template_path = os.path.join(
+        synthetic_repo, "file_templates/alpha/template.txt.jinja"
+    )
+    output_path = str(tmp_path / "output.txt")
+
+    async def run() -> List[bool]:
+        first = await render_and_write_file_template(
+            template_path, output_path, skip_unchanged=True
+        )
+        second = await render_and_write_file_template(
+            template_path, output_path, skip_unchanged=True
+        )
+        return [first, second]
+
+    assert asyncio.run(run()) == [True, False]
+    assert Path(output_path).read_text() == "alpha (c) 2023\n"
+
+
+def test_concurrent_renders(synthetic_repo: str) -> None:
+    """Test many concurrent renders with a bounded number of loads."""
+    template_paths = [
+        os.path.join(
+            synthetic_repo, "file_templates", name, "template.txt.jinja"
+        )
+        for name in ("alpha", "beta")
+    ]
+
+    async def run() -> List[str]:
+        async with AsyncFileTemplateRenderer(
+            max_workers=2, max_concurrent_loads=1
+        ) as renderer:
+            return await asyncio.gather(
+                *(
+                    renderer.render(
+                        template_paths[i % 2], extra_context={"year": str(i)}
+                    )
+                    for i in range(20)
+                )
+            )
+
+    texts = asyncio.run(run())
+    assert texts == [
+        "{0} (c) {1:d}\n".format(("alpha", "beta")[i % 2], i)
+        for i in range(20)
+    ]
+
+
+def test_aiter_templates(synthetic_repo: str) -> None:
+    """Test that aiter_templates yields the same templates as
+    iter_templates, with their configurations loaded.
+    """
+    repo = Repo(synthetic_repo)
+
+    async def run() -> List[BaseTemplate]:
+        return [t async for t in repo.aiter_templates(max_concurrent_loads=2)]
+
+    templates = asyncio.run(run())
+    assert [t.name for t in templates] == [
+        t.name for t in repo.iter_templates()
+    ]
+    assert all(t._config is not None for t in templates)
@@ -58,3 +58,18 @@ def test_cookiecutter_json_path(templates_repo: str, path: str) -> None:
     full_path = os.path.join(templates_repo, path)
     template = BaseTemplate(full_path)
     assert os.path.isfile(template.cookiecutter_json_path)
+
+
+def test_lazy_config(synthetic_repo: str) -> None:
+    """Test that configuration errors are deferred until the config is
+    accessed.
+    """
+    template_path = os.path.join(synthetic_repo, "file_templates", "alpha")
+    with open(os.path.join(template_path, "templatekit.yaml"), "w") as f:
+        f.write('name: ""\n')
+
+    template = BaseTemplate(template_path)
+    assert template.name == "alpha"
+    assert template.cookiecutter["name"] == "alpha"
+    with pytest.raises(RuntimeError):
+        template.config
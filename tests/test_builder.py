@@ -0,0 +1,38 @@
+"""Tests for the templatekit.builder module (Scons builders)."""
+
+import os
+from pathlib import Path
+
+from SCons.Script import Environment
+
+from templatekit.builder import build_project_template
+from templatekit.examples import ExampleManifest
+
+
+def test_build_project_template_incremental(synthetic_repo: str) -> None:
+    """Test that the project builder action only rewrites changed files, and
+    records the example in the repository's example manifest.
+    """
+    template_dir = Path(synthetic_repo) / "project_templates" / "gamma"
+    source = [str(template_dir / "cookiecutter.json")]
+    readme_path = template_dir / "example" / "README.md"
+
+    build_project_template([], source, Environment())
+    assert readme_path.read_text() == "# example\n\nLicense: MIT\n"
+    manifest = ExampleManifest.for_repo_root(synthetic_repo)
+    assert os.path.isfile(manifest.path)
+
+    # An unchanged example isn't rewritten
+    os.utime(readme_path, ns=(0, 0))
+    build_project_template([], source, Environment())
+    assert readme_path.stat().st_mtime_ns == 0
+
+    # A changed output is rewritten
+    readme_path.write_text("edited\n")
+    build_project_template([], source, Environment())
+    assert readme_path.read_text() == "# example\n\nLicense: MIT\n"
+
+    build_project_template(
+        [], source, Environment(cookiecutter_context={"license": "GPLv3"})
+    )
+    assert readme_path.read_text() == "# example\n\nLicense: GPLv3\n"
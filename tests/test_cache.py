@@ -0,0 +1,90 @@
+"""Tests for the templatekit.cache module.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import List
+from unittest.mock import patch
+
+from templatekit.cache import MetadataCache, write_cache_file
+from templatekit.repo import Repo
+
+
+def test_cached_repo(synthetic_repo: str) -> None:
+    """Test that a warm cache serves template metadata without parsing
+    templatekit.yaml files.
+    """
+    cache = MetadataCache.for_repo_root(synthetic_repo)
+    repo = Repo(synthetic_repo, cache=cache)
+    configs = {t.name: t.config.data for t in repo.iter_templates()}
+    assert cache.misses == 3
+    cache.save()
+    assert os.path.isfile(cache.path)
+    assert os.path.isfile(os.path.join(cache.dirname, ".gitignore"))
+
+    warm_cache = MetadataCache.for_repo_root(synthetic_repo)
+    warm_repo = Repo(synthetic_repo, cache=warm_cache)
+    with patch("yaml.safe_load") as safe_load:
+        warm_configs = {
+            t.name: t.config.data for t in warm_repo.iter_templates()
+        }
+        assert not safe_load.called
+    assert warm_configs == configs
+    assert warm_cache.hits == 3
+    assert warm_repo["alpha"].cookiecutter["name"] == "alpha"
+
+
+def test_cache_invalidation(synthetic_repo: str) -> None:
+    """Test that cache entries are invalidated by content changes, but not
+    by modification time changes alone.
+    """
+    template_dir = os.path.join(synthetic_repo, "file_templates", "alpha")
+    source_paths = [
+        os.path.join(template_dir, "templatekit.yaml"),
+        os.path.join(template_dir, "cookiecutter.json"),
+    ]
+    cache = MetadataCache.for_repo_root(synthetic_repo)
+    cache.set(template_dir, source_paths, {"config": {}})
+    assert cache.get(template_dir, source_paths) == {"config": {}}
+
+    # Touching the file keeps the entry, after comparing content hashes
+    os.utime(source_paths[0], ns=(0, 0))
+    assert cache.get(template_dir, source_paths) == {"config": {}}
+
+    with open(source_paths[0], "a") as f:
+        f.write('dialog_title: "Changed"\n')
+    assert cache.get(template_dir, source_paths) is None
+    assert cache.stats()["stale_entries"] == 1
+
+    cache.clear()
+    assert cache.stats()["entries"] == 0
+
+
+def test_write_cache_file_concurrently(tmp_path: Path) -> None:
+    """Test that concurrent writes of a cache file don't interfere with
+    each other.
+    """
+    path = str(tmp_path / "cache" / "data.json")
+    errors: List[Exception] = []
+
+    def write(i: int) -> None:
+        try:
+            for _ in range(50):
+                write_cache_file(path, {"writer": i})
+        except Exception as err:
+            errors.append(err)
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    with open(path) as f:
+        assert json.load(f)["writer"] in range(4)
+    assert sorted(os.listdir(tmp_path / "cache")) == [
+        ".gitignore",
+        "data.json",
+    ]
@@ -0,0 +1,248 @@
+"""Tests for the templatekit.configvalidator module, comparing the compiled
+validator with Cerberus.
+"""
+
+import copy
+import json
+import random
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, List
+
+import pytest
+import yaml
+
+import templatekit
+from templatekit.configvalidator import CompiledValidator, freeze, thaw
+from templatekit.repo import (
+    TemplateConfig,
+    get_compiled_config_validator,
+    get_config_validator,
+)
+
+RICH_CONFIG: Dict[str, Any] = {
+    "name": "Rich template",
+    "group": "Examples",
+    "unknown": {"purged": True},
+    "dialog_fields": [
+        {
+            "label": "Name",
+            "key": "name",
+            "component": "text",
+            "placeholder": None,
+            "hint": "Your name",
+            "extra": 1,
+        },
+        {
+            "label": "License",
+            "key": "license",
+            "component": "select",
+            "optional": True,
+            "options": [
+                {"label": "MIT", "value": "mit", "template_value": "MIT"},
+                {"value": "gpl", "template_value": "GPLv3", "x": None},
+            ],
+        },
+        {
+            "label": "Preset",
+            "component": "select",
+            "preset_options": [
+                {"label": "A", "value": "a", "presets": {"k": "v"}},
+            ],
+        },
+        {
+            "label": "Groups",
+            "component": "select",
+            "preset_groups": [
+                {
+                    "group_label": "G",
+                    "options": [{"label": "B", "presets": {"k": "w"}}],
+                },
+            ],
+        },
+    ],
+    "examples": [
+        {"output": "example.txt", "context": {"name": "Example"}},
+    ],
+}
+
+
+def _seed_configs() -> List[Dict[str, Any]]:
+    configs = [{}, {"dialog_title": None}, RICH_CONFIG]
+    data_dir = Path(__file__).parent / "data" / "config"
+    for path in sorted(data_dir.glob("*/templatekit.yaml")):
+        configs.append(yaml.safe_load(path.read_text()))
+    return configs
+
+
+_REPLACEMENTS: List[Any] = [
+    None,
+    "",
+    "x" * 80,
+    "text",
+    1,
+    True,
+    [],
+    {},
+    [{}],
+    {"a": 1},
+]
+
+
+def _mutate(data: Any, rng: random.Random) -> Any:
+    """Randomly change, add, or delete one value, somewhere in the data."""
+    if isinstance(data, dict) and data and rng.random() < 0.7:
+        key = rng.choice(list(data))
+        action = rng.random()
+        if action < 0.2:
+            del data[key]
+        elif action < 0.4:
+            data[key] = rng.choice(_REPLACEMENTS)
+        elif action < 0.5:
+            data["unknown_{0:d}".format(rng.randrange(3))] = "x"
+        else:
+            data[key] = _mutate(data[key], rng)
+        return data
+    if isinstance(data, list) and data and rng.random() < 0.7:
+        index = rng.randrange(len(data))
+        action = rng.random()
+        if action < 0.2:
+            del data[index]
+        elif action < 0.4:
+            data[index] = rng.choice(_REPLACEMENTS)
+        elif action < 0.5:
+            data.append(copy.deepcopy(data[index]))
+        else:
+            data[index] = _mutate(data[index], rng)
+        return data
+    return rng.choice(_REPLACEMENTS)
+
+
+def _get_validators() -> List[CompiledValidator]:
+    """Get compiled validators for configschema.yaml, with and without
+    freezing.
+    """
+    schema_path = Path(templatekit.__file__).parent / "configschema.yaml"
+    schema = yaml.safe_load(schema_path.read_text())
+    return [
+        CompiledValidator(schema),
+        CompiledValidator(schema, freeze=True),
+    ]
+
+
+VALIDATORS = _get_validators()
+
+
+def _assert_same_as_cerberus(data: Any) -> None:
+    validator = get_config_validator()
+    results = [
+        compiled.normalized(copy.deepcopy(data)) for compiled in VALIDATORS
+    ]
+    if not isinstance(data, dict):
+        # Cerberus raises DocumentError, which TemplateConfig also raises
+        assert results == [None, None]
+        return
+    if validator.validate(copy.deepcopy(data)):
+        expected = validator.normalized(copy.deepcopy(data))
+        for result in results:
+            assert result is not None, data
+            # Compare the key order too, as in serialized configurations
+            assert json.dumps(thaw(result)) == json.dumps(expected)
+    else:
+        assert results == [None, None], data
+
+
+@pytest.mark.parametrize("data", _seed_configs())
+def test_compiled_validator_seeds(data: Dict[str, Any]) -> None:
+    """Test that valid configurations are normalized as Cerberus normalizes
+    them.
+    """
+    assert all(compiled.validate(data) for compiled in VALIDATORS)
+    _assert_same_as_cerberus(data)
+
+
+def test_compiled_validator_fuzz() -> None:
+    """Test the compiled validator against Cerberus with randomly mutated
+    configurations.
+    """
+    rng = random.Random(20231013)
+    seeds = _seed_configs()
+    valid_count = 0
+    for _ in range(2000):
+        data = copy.deepcopy(rng.choice(seeds))
+        for _ in range(rng.randint(1, 3)):
+            data = _mutate(data, rng)
+        _assert_same_as_cerberus(data)
+        valid_count += VALIDATORS[0].validate(data)
+    # Both valid and invalid configurations are exercised
+    assert 100 < valid_count < 1900
+
+
+@pytest.mark.parametrize("compiled", VALIDATORS)
+def test_compiled_validator_does_not_modify_document(
+    compiled: CompiledValidator,
+) -> None:
+    """Test that documents aren't modified, or shared with the result."""
+    data = copy.deepcopy(RICH_CONFIG)
+    result = compiled.normalized(data)
+    assert data == RICH_CONFIG
+    assert result is not None
+    assert result["dialog_fields"] is not data["dialog_fields"]
+
+
+def test_compiled_validator_structural_sharing() -> None:
+    """Test that frozen values are reused when they don't change."""
+    compiled = get_compiled_config_validator()
+    assert compiled is not None and compiled.freeze
+    result = compiled.normalized(RICH_CONFIG)
+    assert isinstance(result, MappingProxyType)
+    assert isinstance(result["dialog_fields"], tuple)
+    with pytest.raises(TypeError):
+        result["name"] = "Changed"  # type: ignore[index]
+
+    # Normalizing a normalized, frozen document returns the same object
+    assert compiled.normalized(result) is result
+
+    # Only the changed parts of a document are copied
+    changed = dict(result)
+    changed["name"] = "Changed"
+    changed_result = compiled.normalized(changed)
+    assert changed_result is not None
+    assert changed_result["name"] == "Changed"
+    assert changed_result["dialog_fields"] is result["dialog_fields"]
+    assert changed_result["examples"] is result["examples"]
+
+
+def test_freeze_thaw() -> None:
+    """Test freezing and thawing nested values."""
+    data = {"a": [1, {"b": [2, 3]}], "c": "d"}
+    frozen = freeze(data)
+    assert frozen == MappingProxyType(
+        {"a": (1, MappingProxyType({"b": (2, 3)})), "c": "d"}
+    )
+    assert freeze(frozen) is frozen
+    assert thaw(frozen) == data
+    json.dumps(thaw(frozen))
+
+
+def test_compiled_validator_unsupported_rules() -> None:
+    """Test that schemas with unsupported rules aren't compiled."""
+    with pytest.raises(ValueError):
+        CompiledValidator({"name": {"type": "string", "regex": "a.*"}})
+    with pytest.raises(ValueError):
+        CompiledValidator({"count": {"type": "integer"}})
+
+
+def test_templateconfig_error_messages(
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    """Test that invalid configurations are reported with Cerberus's error
+    messages.
+    """
+    data = {"name": "", "dialog_fields": [{"label": 1}]}
+    with pytest.raises(RuntimeError):
+        TemplateConfig(data)
+    validator = get_config_validator()
+    validator.validate(data)
+    output = capsys.readouterr().out
+    assert json.dumps(validator.errors, sort_keys=True, indent=2) in output
@@ -0,0 +1,94 @@
+"""Tests for the templatekit.examples module.
+"""
+
+import os
+from pathlib import Path
+
+from templatekit.examples import build_repo_examples, get_examples
+from templatekit.repo import Repo
+
+
+def test_get_examples_defaults(synthetic_repo: str) -> None:
+    """Test the default examples of file and project templates."""
+    repo = Repo(synthetic_repo)
+
+    (file_example,) = get_examples(repo["alpha"])
+    assert file_example.template_type == "file"
+    assert file_example.output_path == os.path.join(
+        synthetic_repo, "file_templates", "alpha", "example.txt"
+    )
+    assert file_example.context is None
+
+    (project_example,) = get_examples(repo["gamma"])
+    assert project_example.template_type == "project"
+    assert project_example.output_path == os.path.join(
+        synthetic_repo, "project_templates", "gamma"
+    )
+
+
+def test_build_repo_examples(synthetic_repo: str) -> None:
+    """Test building examples, including examples configured in
+    templatekit.yaml and a template with a broken configuration.
+    """
+    root = Path(synthetic_repo)
+    (root / "file_templates" / "alpha" / "templatekit.yaml").write_text(
+        "examples:\n"
+        '  - output: "example-2030.txt"\n'
+        "    context:\n"
+        '      year: "2030"\n'
+    )
+    (root / "file_templates" / "beta" / "templatekit.yaml").write_text(
+        'name: ""\n'
+    )
+
+    results = build_repo_examples(Repo(synthetic_repo), workers=2)
+    assert [r.example.template_name for r in results] == [
+        "gamma",
+        "alpha",
+        "beta",
+    ]
+    assert [r.ok for r in results] == [True, True, False]
+    assert results[2].error is not None
+    assert results[2].error.startswith("RuntimeError")
+
+    assert (
+        root / "file_templates" / "alpha" / "example-2030.txt"
+    ).read_text() == "alpha (c) 2030\n"
+    assert (
+        root / "project_templates" / "gamma" / "example" / "README.md"
+    ).read_text() == "# example\n\nLicense: MIT\n"
+
+
+def test_build_repo_examples_incremental(synthetic_repo: str) -> None:
+    """Test that incremental builds skip unchanged examples, and only
+    rewrite changed project files.
+    """
+    root = Path(synthetic_repo)
+    project_dir = root / "project_templates" / "gamma"
+    (project_dir / "{{cookiecutter.package_name}}" / "LICENSE").write_text(
+        "{{ cookiecutter.license }}\n"
+    )
+    repo = Repo(synthetic_repo)
+    results = build_repo_examples(repo, workers=1, incremental=True)
+    assert [r.skipped for r in results] == [False, False, False]
+
+    results = build_repo_examples(repo, workers=1, incremental=True)
+    assert [r.skipped for r in results] == [True, True, True]
+
+    # Change one file of the project template
+    license_path = project_dir / "example" / "LICENSE"
+    os.utime(license_path, ns=(0, 0))
+    (project_dir / "{{cookiecutter.package_name}}" / "README.md").write_text(
+        "# {{ cookiecutter.package_name }}\n"
+    )
+    results = build_repo_examples(repo, workers=1, incremental=True)
+    assert [r.skipped for r in results] == [False, True, True]
+    assert (project_dir / "example" / "README.md").read_text() == (
+        "# example\n"
+    )
+    assert license_path.stat().st_mtime_ns == 0
+
+    # A modified output is rebuilt, even though the inputs are unchanged
+    (root / "file_templates" / "alpha" / "example.txt").write_text("")
+    results = build_repo_examples(repo, workers=1, incremental=True)
+    assert [r.skipped for r in results] == [True, False, True]
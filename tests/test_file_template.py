@@ -4,6 +4,7 @@ See also: test_base_template.py for testing the base class.
 """
 
 import os
+from unittest.mock import patch
 
 from templatekit.repo import FileTemplate
 
@@ -21,3 +22,16 @@ def test_source_path(templates_repo: str) -> None:
     source_path = template.source_path
 
     assert os.path.basename(source_path) == "COPYRIGHT.jinja"
+
+
+def test_source_path_cached(synthetic_repo: str) -> None:
+    """Test that source_path is found when the template is created, without
+    listing the template directory again.
+    """
+    template_path = os.path.join(synthetic_repo, "file_templates/alpha")
+    template = FileTemplate(template_path)
+    with patch("os.listdir") as listdir, patch("os.scandir") as scandir:
+        source_path = template.source_path
+        assert not listdir.called
+        assert not scandir.called
+    assert source_path == os.path.join(template_path, "template.txt.jinja")
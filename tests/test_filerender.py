@@ -1,9 +1,23 @@
 """Tests for the templatekit.filerender module.
 """
 
+import io
 import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
 
-from templatekit.filerender import render_file_template
+import pytest
+from jinja2 import FileSystemBytecodeCache
+
+from templatekit.filerender import (
+    FileTemplateRenderer,
+    render_and_write_file_template,
+    render_and_write_file_template_batch,
+    render_file_template,
+    render_file_template_batch,
+    stream_and_write_file_template,
+    stream_file_template,
+)
 
 
 def test_render_file_template(templates_repo: str) -> None:
@@ -25,3 +39,150 @@ def test_render_file_template(templates_repo: str) -> None:
 
     content = render_file_template(template_path, use_defaults=True)
     assert expected_content == content
+
+
+def test_file_template_renderer(synthetic_repo: str) -> None:
+    """Test that FileTemplateRenderer reuses compiled templates until the
+    template source changes.
+    """
+    template_path = os.path.join(
+        synthetic_repo, "file_templates/alpha/template.txt.jinja"
+    )
+    renderer = FileTemplateRenderer()
+    content = renderer.render(template_path, use_defaults=True)
+    assert content == render_file_template(template_path, use_defaults=True)
+    assert content == "alpha (c) 2023\n"
+
+    tmpl, _ = renderer.get_template(template_path)
+    assert renderer.get_template(template_path)[0] is tmpl
+    assert (
+        renderer.render(
+            template_path, use_defaults=True, extra_context={"year": "2024"}
+        )
+        == "alpha (c) 2024\n"
+    )
+
+    with open(template_path, "w") as f:
+        f.write("Copyright {{ cookiecutter.year }}\n")
+    os.utime(template_path, ns=(0, 0))
+    assert renderer.get_template(template_path)[0] is not tmpl
+    assert renderer.render(template_path, use_defaults=True) == (
+        "Copyright 2023\n"
+    )
+
+
+def test_file_template_renderer_bytecode_cache(
+    synthetic_repo: str, tmp_path: Path
+) -> None:
+    """Test FileTemplateRenderer with a Jinja bytecode cache."""
+    template_path = os.path.join(
+        synthetic_repo, "file_templates/alpha/template.txt.jinja"
+    )
+    cache_dir = tmp_path / "bytecode"
+    cache_dir.mkdir()
+    renderer = FileTemplateRenderer(
+        bytecode_cache=FileSystemBytecodeCache(str(cache_dir))
+    )
+    renderer.render(template_path, use_defaults=True)
+    assert len(list(cache_dir.iterdir())) == 1
+
+
+def test_render_file_template_batch(
+    synthetic_repo: str, tmp_path: Path
+) -> None:
+    """Test rendering a file template with many contexts."""
+    template_path = os.path.join(
+        synthetic_repo, "file_templates/alpha/template.txt.jinja"
+    )
+    contexts: List[Optional[Dict[str, Any]]] = [
+        None,
+        {"name": "beta"},
+        {"year": "2024"},
+    ]
+    expected = ["alpha (c) 2023\n", "beta (c) 2023\n", "alpha (c) 2024\n"]
+    assert render_file_template_batch(template_path, contexts) == expected
+    assert [
+        render_file_template(template_path, True, extra_context=c)
+        for c in contexts
+    ] == expected
+
+    output_paths = [str(tmp_path / "{0:d}.txt".format(i)) for i in range(3)]
+    render_and_write_file_template_batch(template_path, output_paths, contexts)
+    assert [Path(p).read_text() for p in output_paths] == expected
+
+    with pytest.raises(ValueError):
+        render_and_write_file_template_batch(
+            template_path, output_paths[:1], contexts
+        )
+
+
+def test_render_and_write_skip_unchanged(
+    synthetic_repo: str, tmp_path: Path
+) -> None:
+    """Test that render_and_write_file_template can skip writing files that
+    are unchanged.
+    """
+    template_path = os.path.join(
+        synthetic_repo, "file_templates/alpha/template.txt.jinja"
+    )
+    output_path = str(tmp_path / "example.txt")
+    assert render_and_write_file_template(
+        template_path, output_path, skip_unchanged=True
+    )
+    os.utime(output_path, ns=(0, 0))
+    assert not render_and_write_file_template(
+        template_path, output_path, skip_unchanged=True
+    )
+    assert os.stat(output_path).st_mtime_ns == 0
+
+    # Without skip_unchanged, the file is always written
+    assert render_and_write_file_template(template_path, output_path)
+    assert os.stat(output_path).st_mtime_ns != 0
+
+    # Permission changes are applied, even if the content is unchanged
+    os.chmod(output_path, 0o600)
+    assert render_and_write_file_template(
+        template_path, output_path, skip_unchanged=True
+    )
+    assert os.stat(output_path).st_mode == os.stat(template_path).st_mode
+
+
+def test_stream_file_template(synthetic_repo: str, tmp_path: Path) -> None:
+    """Test streaming a large rendered file to a file object and to an
+    output file.
+    """
+    template_dir = Path(synthetic_repo) / "file_templates/alpha"
+    template_path = str(template_dir / "table.txt.jinja")
+    Path(template_path).write_text(
+        "{% for i in range(10000) %}{{ cookiecutter.name }} {{ i }}\n"
+        "{% endfor %}"
+    )
+    expected = render_file_template(template_path, use_defaults=True)
+
+    renderer = FileTemplateRenderer()
+    chunks = list(renderer.generate(template_path, use_defaults=True))
+    assert len(chunks) > 1
+    assert "".join(chunks) == expected
+
+    fh = io.StringIO()
+    stream_file_template(template_path, fh, use_defaults=True)
+    assert fh.getvalue() == expected
+
+    output_dir = tmp_path / "output"
+    output_dir.mkdir()
+    output_path = str(output_dir / "table.txt")
+    assert stream_and_write_file_template(
+        template_path, output_path, skip_unchanged=True
+    )
+    assert Path(output_path).read_text() == expected
+    os.utime(output_path, ns=(0, 0))
+    assert not stream_and_write_file_template(
+        template_path, output_path, skip_unchanged=True
+    )
+    assert os.stat(output_path).st_mtime_ns == 0
+    assert stream_and_write_file_template(
+        template_path, output_path, extra_context={"name": "beta"}
+    )
+    assert Path(output_path).read_text().startswith("beta 0\n")
+    # No temporary files are left behind
+    assert os.listdir(output_dir) == ["table.txt"]
@@ -0,0 +1,36 @@
+"""Tests for the templatekit.fileutils module.
+"""
+
+import os
+import stat
+from pathlib import Path
+
+import pytest
+
+from templatekit.fileutils import get_file_mode, open_atomic
+
+
+def test_open_atomic(tmp_path: Path) -> None:
+    """Test that a file is replaced only if writing it succeeds, and keeps
+    its permissions.
+    """
+    path = tmp_path / "file.txt"
+    with open_atomic(str(path)) as f:
+        f.write("first\n")
+    assert path.read_text() == "first\n"
+    umask = os.umask(0)
+    os.umask(umask)
+    assert stat.S_IMODE(path.stat().st_mode) == 0o666 & ~umask
+
+    path.chmod(0o640)
+    with pytest.raises(RuntimeError):
+        with open_atomic(str(path)) as f:
+            f.write("second\n")
+            raise RuntimeError("Failed")
+    assert path.read_text() == "first\n"
+    assert os.listdir(tmp_path) == ["file.txt"]
+
+    with open_atomic(str(path)) as f:
+        f.write("third\n")
+    assert path.read_text() == "third\n"
+    assert get_file_mode(str(path)) == 0o640
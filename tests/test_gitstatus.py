@@ -0,0 +1,78 @@
+"""Tests for the templatekit.gitstatus module.
+"""
+
+from pathlib import Path
+
+from support import run_git
+
+from templatekit.gitstatus import GitTree, get_git_status, parse_porcelain_v2
+
+
+def test_parse_porcelain_v2() -> None:
+    """Test parsing each kind of porcelain v2 record."""
+    output = (
+        "1 .M N... 100644 100644 100644 abc abc README.md\0"
+        "1 D. N... 100644 000000 000000 abc 000 old file.txt\0"
+        "1 AM N... 000000 100644 100644 000 abc new.txt\0"
+        "1 AD N... 000000 100644 000000 000 abc added-then-deleted.txt\0"
+        "2 R. N... 100644 100644 100644 abc abc R100 renamed.txt\0orig.txt\0"
+        "u UU N... 100644 100644 100644 100644 a b c conflict.txt\0"
+        "? untracked/example.txt\0"
+        "? ignored.log\0"
+    )
+    status = parse_porcelain_v2(output.split("\0"), ignore=["*.log"])
+    assert status.untracked == ["untracked/example.txt"]
+    assert status.changes == [
+        ("A", "new.txt"),
+        ("D", "old file.txt"),
+        ("R", "renamed.txt"),
+        ("M", "README.md"),
+        ("M", "conflict.txt"),
+    ]
+    assert status.deleted == ["old file.txt"]
+    assert "README.md" in status.modified
+    assert status.is_dirty
+
+
+def test_get_git_status(tmp_path: Path) -> None:
+    """Test get_git_status against a real Git repository."""
+    root = str(tmp_path)
+    run_git(root, "init", "-q")
+    (tmp_path / "a.txt").write_text("a\n")
+    (tmp_path / "b.txt").write_text("b\n")
+    run_git(root, "add", ".")
+    run_git(root, "commit", "-q", "-m", "Initial commit")
+    assert not get_git_status(root).is_dirty
+
+    (tmp_path / "a.txt").write_text("changed\n")
+    (tmp_path / "b.txt").unlink()
+    (tmp_path / "dir").mkdir()
+    (tmp_path / "dir" / "c.txt").write_text("c\n")
+    status = get_git_status(root)
+    assert status.untracked == ["dir/c.txt"]
+    assert status.changes == [("D", "b.txt"), ("M", "a.txt")]
+
+    status = get_git_status(root, ignore=["dir/*", "a.txt"])
+    assert status.untracked == []
+    assert status.changes == [("D", "b.txt")]
+
+
+def test_git_tree(tmp_path: Path) -> None:
+    """Test reading committed files from the Git object database."""
+    root = str(tmp_path)
+    run_git(root, "init", "-q")
+    (tmp_path / "dir").mkdir()
+    (tmp_path / "dir" / "a.txt").write_text("same\n")
+    (tmp_path / "dir" / "b.txt").write_text("same\n")
+    (tmp_path / "data.bin").write_bytes(b"\x00\n\xff")
+    run_git(root, "add", ".")
+    run_git(root, "commit", "-q", "-m", "Initial commit")
+    (tmp_path / "dir" / "a.txt").write_text("changed\n")
+
+    tree = GitTree(root)
+    assert tree.list_files("dir") == ["dir/a.txt", "dir/b.txt"]
+    assert tree.read_files(["dir/a.txt", "dir/b.txt", "data.bin", "x"]) == {
+        "dir/a.txt": b"same\n",
+        "dir/b.txt": b"same\n",
+        "data.bin": b"\x00\n\xff",
+    }
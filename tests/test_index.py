@@ -0,0 +1,127 @@
+"""Tests for the templatekit.index module and Repo.from_index.
+"""
+
+import json
+import os
+import stat
+from pathlib import Path
+from unittest.mock import patch
+
+from click.testing import CliRunner
+
+from templatekit.index import TemplateIndex
+from templatekit.repo import FileTemplate, ProjectTemplate, Repo
+from templatekit.scripts.main import main
+
+
+def test_index_round_trip(synthetic_repo: str) -> None:
+    """Test that a repository loaded from an index has the same templates
+    and metadata as the original, without reading template directories.
+    """
+    repo = Repo(synthetic_repo)
+    index_path = os.path.join(synthetic_repo, "index.json")
+    TemplateIndex.build(repo).write(index_path)
+
+    indexed_repo = Repo.from_index(index_path)
+    assert indexed_repo.root == repo.root
+    with patch("os.scandir") as scandir, patch("os.stat") as stat:
+        names = [t.name for t in indexed_repo.iter_templates()]
+        indexed_names = list(indexed_repo)
+        assert "alpha" in indexed_repo
+        alpha = indexed_repo["alpha"]
+        gamma = indexed_repo["gamma"]
+        assert not scandir.called
+        assert not stat.called
+    assert names == [t.name for t in repo.iter_templates()]
+    assert indexed_names == list(repo)
+    original_alpha = repo["alpha"]
+    assert isinstance(alpha, FileTemplate)
+    assert isinstance(original_alpha, FileTemplate)
+    assert isinstance(gamma, ProjectTemplate)
+    assert alpha.source_path == original_alpha.source_path
+    assert alpha.cookiecutter == original_alpha.cookiecutter
+    for template in repo.iter_templates():
+        indexed_template = indexed_repo[template.name]
+        assert indexed_template.path == template.path
+        assert indexed_template.config.to_dict() == template.config.to_dict()
+
+    assert indexed_repo.index is not None
+    assert indexed_repo.index.get_stale_templates() == []
+
+
+def test_index_file_mode(synthetic_repo: str) -> None:
+    """Test that an index file is readable by other users, and that
+    rewriting it keeps its permissions.
+    """
+    index = TemplateIndex.build(Repo(synthetic_repo))
+    index_path = os.path.join(synthetic_repo, "index.json")
+    umask = os.umask(0o022)
+    try:
+        index.write(index_path)
+        assert stat.S_IMODE(os.stat(index_path).st_mode) == 0o644
+        os.chmod(index_path, 0o640)
+        index.write(index_path)
+        assert stat.S_IMODE(os.stat(index_path).st_mode) == 0o640
+    finally:
+        os.umask(umask)
+
+
+def test_index_freshness(synthetic_repo: str) -> None:
+    """Test that changed, added, and removed templates make an index
+    stale.
+    """
+    root = Path(synthetic_repo)
+    index = TemplateIndex.build(Repo(synthetic_repo))
+    assert index.is_current()
+
+    # Touching a file doesn't change its content
+    os.utime(root / "file_templates" / "alpha" / "templatekit.yaml")
+    assert index.is_current()
+
+    with open(
+        root / "file_templates" / "alpha" / "templatekit.yaml", "a"
+    ) as f:
+        f.write('dialog_title: "Changed"\n')
+    (root / "file_templates" / "beta" / "template.txt.jinja").rename(
+        root / "file_templates" / "beta" / "renamed.txt.jinja"
+    )
+    (root / "project_templates" / "gamma" / "cookiecutter.json").unlink()
+    (
+        root / "file_templates" / "not_a_template" / "cookiecutter.json"
+    ).write_text("{}")
+    (
+        root / "file_templates" / "not_a_template" / "templatekit.yaml"
+    ).write_text("name: New\n")
+    assert index.get_stale_templates() == [
+        "alpha",
+        "beta",
+        "gamma",
+        "not_a_template",
+    ]
+
+
+def test_index_command(synthetic_repo: str) -> None:
+    """Test the templatekit index build and check commands."""
+    runner = CliRunner()
+    result = runner.invoke(main, ["-r", synthetic_repo, "index", "build"])
+    assert result.exit_code == 0, result.output
+    index_path = os.path.join(
+        synthetic_repo, ".templatekit-cache", "templatekit-index.json"
+    )
+    with open(index_path) as f:
+        data = json.load(f)
+    assert [t["name"] for t in data["templates"]] == ["gamma", "alpha", "beta"]
+    assert os.path.isfile(
+        os.path.join(synthetic_repo, ".templatekit-cache", ".gitignore")
+    )
+    assert Repo.from_index(index_path).root == os.path.abspath(synthetic_repo)
+
+    result = runner.invoke(main, ["-r", synthetic_repo, "index", "check"])
+    assert result.exit_code == 0, result.output
+
+    Path(
+        synthetic_repo, "file_templates", "beta", "cookiecutter.json"
+    ).write_text(json.dumps({"name": "changed"}))
+    result = runner.invoke(main, ["-r", synthetic_repo, "index", "check"])
+    assert result.exit_code == 1
+    assert "- beta" in result.output
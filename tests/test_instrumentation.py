@@ -0,0 +1,131 @@
+"""Tests for the templatekit.instrumentation module."""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+from templatekit.filerender import render_and_write_file_template
+from templatekit.instrumentation import (
+    JsonLinesSink,
+    OpenTelemetrySink,
+    Profiler,
+    Span,
+    add_sink,
+    get_sinks,
+    remove_sink,
+    span,
+)
+from templatekit.repo import FileTemplate, Repo
+
+
+def test_span_without_sinks() -> None:
+    """Test that spans are no-ops without sinks."""
+    assert get_sinks() == []
+    with span("phase", template="alpha") as attributes:
+        attributes["extra"] = True
+    assert attributes == {"template": "alpha", "extra": True}
+
+
+def test_profile_repo(synthetic_repo: str) -> None:
+    """Test profiling template loading and rendering."""
+    profiler = Profiler()
+    spans: List[Span] = []
+    add_sink(profiler)
+    add_sink(spans.append)
+    try:
+        repo = Repo(synthetic_repo)
+        alpha = repo["alpha"]
+        assert isinstance(alpha, FileTemplate)
+        alpha.config
+        render_and_write_file_template(
+            alpha.source_path, os.path.join(alpha.path, "example.txt")
+        )
+        with pytest.raises(ZeroDivisionError):
+            with span("failing", template="alpha"):
+                1 / 0
+    finally:
+        remove_sink(profiler)
+        remove_sink(spans.append)
+    assert get_sinks() == []
+
+    phases = profiler.get_phases()
+    for name in (
+        "template.scan",
+        "config.parse_yaml",
+        "config.validate",
+        "config.normalize",
+        "render.context",
+        "jinja.compile",
+        "jinja.render",
+        "file.write",
+    ):
+        assert phases[name][0] >= 1
+    assert set(profiler.get_templates()["alpha"]) >= {
+        "config.parse_yaml",
+        "jinja.render",
+        "failing",
+    }
+    assert spans[-1].attributes == {
+        "template": "alpha",
+        "error": "ZeroDivisionError",
+    }
+    report = profiler.format_report()
+    assert report.startswith("Profile by phase:")
+    assert "  alpha: " in report
+
+
+def test_json_lines(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test writing spans to a JSON lines file, and loading them into a
+    profiler.
+    """
+    path = str(tmp_path / "trace.jsonl")
+    sink = JsonLinesSink(path)
+    add_sink(sink)
+    try:
+        with span("phase", template="alpha"):
+            pass
+    finally:
+        remove_sink(sink)
+        sink.close()
+    (data,) = [json.loads(line) for line in open(path)]
+    assert data["name"] == "phase"
+    assert data["pid"] == os.getpid()
+
+    profiler = Profiler()
+    profiler.load_json_lines(path, skip_pid=os.getpid())
+    assert profiler.get_phases() == {}
+    profiler.load_json_lines(path)
+    assert profiler.get_phases()["phase"][0] == 1
+
+
+class _FakeTracer(object):
+    """Records calls in the style of an OpenTelemetry tracer."""
+
+    def __init__(self) -> None:
+        self.spans: List[Dict[str, Any]] = []
+
+    def start_span(self, name: str, **kwargs: Any) -> "_FakeTracer":
+        self.spans.append(dict(name=name, **kwargs))
+        return self
+
+    def end(self, end_time: int) -> None:
+        self.spans[-1]["end_time"] = end_time
+
+
+def test_opentelemetry_sink() -> None:
+    """Test forwarding spans to an OpenTelemetry-style tracer."""
+    tracer = _FakeTracer()
+    OpenTelemetrySink(tracer)(
+        Span("phase", 1.0, 0.5, {"template": "alpha"}, os.getpid())
+    )
+    assert tracer.spans == [
+        {
+            "name": "phase",
+            "start_time": 1000000000,
+            "attributes": {"templatekit.template": "alpha"},
+            "end_time": 1500000000,
+        }
+    ]
@@ -0,0 +1,149 @@
+"""Tests for the templatekit.scripts.main module (the templatekit command).
+"""
+
+import json
+import os
+import socket
+import stat
+import subprocess
+import sys
+from pathlib import Path
+from typing import List
+
+import click
+from click.testing import CliRunner
+
+from templatekit.scripts.main import main
+
+HEAVY_MODULES = (
+    "asyncio",
+    "cerberus",
+    "cookiecutter",
+    "git",
+    "jinja2",
+    "pyperclip",
+)
+"""Modules that are slow to import, and aren't needed to list templates or
+show help.
+"""
+
+_IMPORT_CHECK = """
+import json
+import sys
+from typing import List
+
+from templatekit.scripts.main import main
+
+try:
+    main(sys.argv[1:])
+except SystemExit:
+    pass
+print(json.dumps(sorted(m for m in {modules!r} if m in sys.modules)))
+"""
+
+
+def _get_imported_heavy_modules(*args: str) -> List[str]:
+    """Run the templatekit command in a new interpreter, and get the heavy
+    modules that were imported.
+    """
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            _IMPORT_CHECK.format(modules=HEAVY_MODULES),
+            *args,
+        ],
+        check=True,
+        stdout=subprocess.PIPE,
+    )
+    return json.loads(result.stdout.decode().splitlines()[-1])
+
+
+def test_lazy_imports(synthetic_repo: str) -> None:
+    """Test that listing templates and showing help don't import heavy
+    dependencies.
+    """
+    assert _get_imported_heavy_modules("--help") == []
+    assert _get_imported_heavy_modules("-r", synthetic_repo, "help") == []
+    assert _get_imported_heavy_modules("-r", synthetic_repo, "list") == []
+    assert "cookiecutter" in _get_imported_heavy_modules(
+        "-r", synthetic_repo, "help", "make"
+    )
+
+
+def test_lazy_short_help() -> None:
+    """Test that the short help of lazy subcommands matches the commands."""
+    ctx = click.Context(main)
+    for name, lazy_command in main.lazy_subcommands.items():
+        command = main.get_command(ctx, name)
+        assert command is not None
+        assert command.get_short_help_str(limit=80) == lazy_command.short_help
+
+
+def test_make_output(synthetic_repo: str, tmp_path: Path) -> None:
+    """Test that ``templatekit make -o`` writes a rendered file template with
+    the default permissions, and leaves the existing file untouched if
+    rendering fails.
+    """
+    template_path = (
+        Path(synthetic_repo) / "file_templates/alpha/template.txt.jinja"
+    )
+    template_path.chmod(0o755)
+    output_path = tmp_path / "output" / "LICENSE"
+    runner = CliRunner()
+    args = ["-r", synthetic_repo, "make", "alpha", "-o", str(output_path)]
+    result = runner.invoke(main, args, input="\n\n")
+    assert result.exit_code == 0, result.output
+    assert output_path.read_text() == "alpha (c) 2023\n"
+    umask = os.umask(0)
+    os.umask(umask)
+    assert stat.S_IMODE(output_path.stat().st_mode) == 0o666 & ~umask
+
+    template_path.write_text(
+        "{{ cookiecutter.name }}\n{{ cookiecutter.missing.name }}\n"
+    )
+    result = runner.invoke(main, args, input="\n\n")
+    assert result.exit_code != 0
+    assert output_path.read_text() == "alpha (c) 2023\n"
+    assert os.listdir(output_path.parent) == ["LICENSE"]
+
+
+def test_serve_refuses_live_socket(
+    synthetic_repo: str, tmp_path: Path
+) -> None:
+    """Test that ``templatekit serve`` doesn't remove a Unix socket that
+    another server is listening on.
+    """
+    socket_path = str(tmp_path / "templatekit.sock")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.bind(socket_path)
+        sock.listen()
+        result = CliRunner().invoke(
+            main,
+            ["-r", synthetic_repo, "serve", "--unix-socket", socket_path],
+        )
+        assert result.exit_code != 0
+        assert "Another server is listening" in result.output
+        assert os.path.exists(socket_path)
+
+
+def test_make_batch(synthetic_repo: str, tmp_path: Path) -> None:
+    """Test that ``templatekit make --batch`` writes each job's output, and
+    rejects jobs whose output isn't a path.
+    """
+    output_path = tmp_path / "output" / "LICENSE"
+    batch = (
+        json.dumps({"context": {"year": "2030"}, "output": str(output_path)})
+        + "\n"
+    )
+    runner = CliRunner()
+    args = ["-r", synthetic_repo, "make", "alpha", "--batch", "-"]
+    result = runner.invoke(main, args, input=batch)
+    assert result.exit_code == 0, result.output
+    assert output_path.read_text() == "alpha (c) 2030\n"
+    assert os.listdir(output_path.parent) == ["LICENSE"]
+
+    batch += json.dumps({"output": None}) + "\n"
+    result = runner.invoke(main, args, input=batch)
+    assert result.exit_code == 2
+    assert 'The "output" of line 2' in result.output
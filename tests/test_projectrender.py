@@ -0,0 +1,197 @@
+"""Tests for the templatekit.projectrender module.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from unittest.mock import patch
+
+import pytest
+from cookiecutter.exceptions import (
+    OutputDirExistsException,
+    UndefinedVariableInTemplate,
+)
+from cookiecutter.main import cookiecutter
+
+from templatekit import projectrender
+from templatekit.projectrender import ProjectTemplateRenderer, copy_file
+
+
+def _write_rich_project_template(root: Path) -> Path:
+    """Write a project template that uses templated paths, binary files,
+    ``_copy_without_render``, executable files, CRLF newlines, conditional
+    file names, and a hook.
+    """
+    template_dir = root / "rich"
+    project_dir = template_dir / "{{cookiecutter.package_name}}"
+    (project_dir / "src" / "{{cookiecutter.module}}").mkdir(parents=True)
+    (project_dir / "static" / "{{cookiecutter.module}}").mkdir(parents=True)
+    (project_dir / "docs").mkdir()
+    (template_dir / "hooks").mkdir()
+    (template_dir / "cookiecutter.json").write_text(
+        json.dumps(
+            {
+                "package_name": "example",
+                "module": "{{ cookiecutter.package_name|lower }}_mod",
+                "license": ["MIT", "GPLv3"],
+                "with_docs": "yes",
+                "_copy_without_render": ["static", "*.raw.txt"],
+            }
+        )
+    )
+    (project_dir / "README.md").write_text(
+        "# {{ cookiecutter.package_name }}\n\n"
+        "License: {{ cookiecutter.license }}\n"
+    )
+    (project_dir / "crlf.txt").write_bytes(
+        b"{{ cookiecutter.module }}\r\nline\r\n"
+    )
+    (project_dir / "notes.raw.txt").write_text("{{ not rendered }}\n")
+    (project_dir / "static" / "{{cookiecutter.module}}" / "a.txt").write_text(
+        "{{ not rendered }}\n"
+    )
+    (
+        project_dir / "src" / "{{cookiecutter.module}}" / "__init__.py"
+    ).write_text('NAME = "{{ cookiecutter.module }}"\n')
+    script_path = project_dir / "run.sh"
+    script_path.write_text("#!/bin/sh\necho {{ cookiecutter.package_name }}\n")
+    script_path.chmod(0o755)
+    (project_dir / "logo.png").write_bytes(bytes(range(256)) * 4)
+    (
+        project_dir
+        / "docs"
+        / "{% if cookiecutter.with_docs == 'yes' %}index.rst{% endif %}"
+    ).write_text("{{ cookiecutter.package_name }}\n")
+    (project_dir / "docs" / "conf.py").write_text(
+        "project = '{{ cookiecutter.package_name }}'\n"
+    )
+    (template_dir / "hooks" / "post_gen_project.py").write_text(
+        "open('hook.txt', 'w').write('{{ cookiecutter.license }}')\n"
+    )
+    return template_dir
+
+
+def _read_tree(path: Path) -> Dict[str, Tuple[int, Optional[bytes]]]:
+    """Read the modes and file contents of a directory tree, keyed by
+    relative path.
+    """
+    tree: Dict[str, Tuple[int, Optional[bytes]]] = {}
+    for root, dirnames, filenames in os.walk(path):
+        for name in dirnames + filenames:
+            item_path = Path(root, name)
+            tree[str(item_path.relative_to(path))] = (
+                item_path.stat().st_mode,
+                item_path.read_bytes() if item_path.is_file() else None,
+            )
+    return tree
+
+
+@pytest.mark.parametrize(
+    "extra_context",
+    [
+        None,
+        {"package_name": "Other", "license": "GPLv3", "with_docs": "no"},
+    ],
+)
+def test_same_as_cookiecutter(
+    tmp_path: Path, extra_context: Optional[Dict[str, str]]
+) -> None:
+    """Test that projects are generated as cookiecutter generates them."""
+    template_dir = str(_write_rich_project_template(tmp_path))
+    cookiecutter(
+        template_dir,
+        output_dir=str(tmp_path / "expected"),
+        no_input=True,
+        extra_context=extra_context,
+    )
+    with ProjectTemplateRenderer(max_workers=4) as renderer:
+        project_dir = renderer.render(
+            template_dir,
+            output_dir=str(tmp_path / "rendered"),
+            use_defaults=True,
+            extra_context=extra_context,
+        )
+    name = "example" if extra_context is None else "Other"
+    assert project_dir == str(tmp_path / "rendered" / name)
+    expected_tree = _read_tree(tmp_path / "expected")
+    assert "{0}/hook.txt".format(name) in expected_tree
+    assert _read_tree(tmp_path / "rendered") == expected_tree
+
+
+def test_compiled_once(tmp_path: Path) -> None:
+    """Test that a project template is compiled once, and recompiled when
+    it changes.
+    """
+    template_dir = _write_rich_project_template(tmp_path)
+    renderer = ProjectTemplateRenderer(max_workers=1)
+    with patch.object(
+        projectrender,
+        "_compile_project",
+        wraps=projectrender._compile_project,
+    ) as compile_project:
+        for name in ("a", "b"):
+            renderer.render(
+                str(template_dir),
+                output_dir=str(tmp_path / "out"),
+                use_defaults=True,
+                extra_context={"package_name": name},
+                accept_hooks=False,
+            )
+        assert compile_project.call_count == 1
+
+        readme_path = template_dir / "{{cookiecutter.package_name}}/README.md"
+        mtime = readme_path.stat().st_mtime_ns
+        readme_path.write_text("Changed {{ cookiecutter.package_name }}\n")
+        os.utime(readme_path, ns=(mtime + 10**9, mtime + 10**9))
+        renderer.render(
+            str(template_dir),
+            output_dir=str(tmp_path / "out"),
+            use_defaults=True,
+            extra_context={"package_name": "c"},
+            accept_hooks=False,
+        )
+        assert compile_project.call_count == 2
+    assert (tmp_path / "out/c/README.md").read_text() == "Changed c\n"
+    assert (tmp_path / "out/b/README.md").read_text().startswith("# b\n")
+
+
+def test_errors(tmp_path: Path) -> None:
+    """Test errors for existing project directories and undefined
+    variables.
+    """
+    template_dir = _write_rich_project_template(tmp_path)
+    renderer = ProjectTemplateRenderer()
+    output_dir = str(tmp_path / "out")
+    renderer.render(
+        str(template_dir), output_dir=output_dir, use_defaults=True
+    )
+    with pytest.raises(OutputDirExistsException):
+        renderer.render(
+            str(template_dir), output_dir=output_dir, use_defaults=True
+        )
+
+    (template_dir / "{{cookiecutter.package_name}}/bad.txt").write_text(
+        "{{ cookiecutter.undefined }}\n"
+    )
+    with pytest.raises(UndefinedVariableInTemplate):
+        renderer.render(
+            str(template_dir),
+            output_dir=output_dir,
+            use_defaults=True,
+            extra_context={"package_name": "bad"},
+        )
+    # The partially generated project is removed
+    assert not (tmp_path / "out/bad").exists()
+
+
+def test_copy_file(tmp_path: Path) -> None:
+    """Test copying files and their permission bits."""
+    source_path = tmp_path / "source.bin"
+    source_path.write_bytes(os.urandom(100000))
+    source_path.chmod(0o750)
+    output_path = tmp_path / "copy.bin"
+    output_path.write_bytes(b"replaced")
+    copy_file(str(source_path), str(output_path))
+    assert output_path.read_bytes() == source_path.read_bytes()
+    assert output_path.stat().st_mode == source_path.stat().st_mode
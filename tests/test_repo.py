@@ -2,12 +2,23 @@
 """
 
 import contextlib
+import logging
 import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from typing import Iterator
 
 import pytest
+from support import run_git, write_file_template
 
-from templatekit.repo import FileTemplate, ProjectTemplate, Repo
+from templatekit.repo import (
+    FileTemplate,
+    ProjectTemplate,
+    Repo,
+    get_template_shard,
+    select_shard,
+)
 
 
 @contextlib.contextmanager
@@ -102,3 +113,128 @@ def test_contains(templates_repo: str) -> None:
         assert "copyright" in repo
         assert "fastapi_safir_app" in repo
         assert "whatwhat" not in repo
+
+
+def test_getitem_index(synthetic_repo: str) -> None:
+    """Test that key access is served from the template index, and that
+    the index follows changes to the template directories.
+    """
+    repo = Repo(synthetic_repo)
+    alpha = repo["alpha"]
+    assert isinstance(alpha, FileTemplate)
+    assert repo["alpha"] is alpha
+    assert isinstance(repo["gamma"], ProjectTemplate)
+    assert "not_a_template" not in repo
+    assert list(repo) == ["gamma", "alpha", "beta"]
+
+    # Adding a template changes the file_templates directory mtime
+    write_file_template(Path(synthetic_repo), "delta")
+    assert "delta" in repo
+
+    # Removing a template changes the file_templates directory mtime
+    shutil.rmtree(os.path.join(synthetic_repo, "file_templates", "beta"))
+    assert "beta" not in repo
+    with pytest.raises(KeyError):
+        repo["beta"]
+
+
+def test_refresh(synthetic_repo: str) -> None:
+    """Test Repo.refresh() after an in-place configuration edit."""
+    repo = Repo(synthetic_repo)
+    assert repo["alpha"].config["group"] == "Synthetic"
+
+    config_path = os.path.join(
+        synthetic_repo, "file_templates", "alpha", "templatekit.yaml"
+    )
+    with open(config_path, "w") as f:
+        f.write('name: "alpha"\ngroup: "Edited"\n')
+    repo.refresh()
+    assert repo["alpha"].config["group"] == "Edited"
+
+
+def test_parallel_loading(
+    synthetic_repo: str, caplog: pytest.LogCaptureFixture
+) -> None:
+    """Test that loading templates on a thread pool preserves the order of
+    templates and warnings.
+    """
+    with caplog.at_level(logging.WARNING):
+        sequential = [t.name for t in Repo(synthetic_repo).iter_templates()]
+    sequential_warnings = [r.getMessage() for r in caplog.records]
+    assert len(sequential_warnings) == 1
+    caplog.clear()
+
+    with caplog.at_level(logging.WARNING):
+        repo = Repo(synthetic_repo, workers=4)
+        templates = list(repo.iter_templates())
+    assert [t.name for t in templates] == sequential
+    assert [r.getMessage() for r in caplog.records] == sequential_warnings
+    for template in templates:
+        assert template.config["name"] == template.name
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        repo = Repo(synthetic_repo, executor=executor)
+        assert [t.name for t in repo.iter_templates()] == sequential
+
+
+def test_get_changed_templates(synthetic_repo: str) -> None:
+    """Test finding the templates that changed since a Git ref."""
+    (Path(synthetic_repo) / "README.md").write_text("Templates\n")
+    run_git(synthetic_repo, "init", "-q")
+    run_git(synthetic_repo, "add", ".")
+    run_git(synthetic_repo, "commit", "-q", "-m", "Initial commit")
+    repo = Repo(synthetic_repo)
+    assert repo.get_changed_templates("HEAD") == []
+
+    (Path(synthetic_repo) / "README.md").write_text("Changed\n")
+    run_git(synthetic_repo, "rm", "-q", "-r", "file_templates/beta")
+    run_git(synthetic_repo, "commit", "-q", "-m", "Remove beta")
+    with open(
+        os.path.join(synthetic_repo, "file_templates/alpha/templatekit.yaml"),
+        "a",
+    ) as f:
+        f.write("# Edited\n")
+    gamma_readme = (
+        "project_templates/gamma/{{cookiecutter.package_name}}/README.md"
+    )
+    (Path(synthetic_repo) / gamma_readme).write_text("# Edited\n")
+
+    templates = repo.get_changed_templates("HEAD~1")
+    assert [(type(t), t.name) for t in templates] == [
+        (ProjectTemplate, "gamma"),
+        (FileTemplate, "alpha"),
+    ]
+    assert [t.name for t in repo.get_changed_templates("HEAD")] == [
+        "gamma",
+        "alpha",
+    ]
+
+
+def test_select_shard(tmp_path: Path) -> None:
+    """Test that shards partition the templates deterministically."""
+    (tmp_path / "project_templates").mkdir()
+    for i in range(20):
+        write_file_template(tmp_path, "template{0:d}".format(i))
+    templates = list(Repo(str(tmp_path)).iter_templates())
+
+    shards = [select_shard(templates, index, 3) for index in range(3)]
+    assert sorted(t.name for shard in shards for t in shard) == sorted(
+        t.name for t in templates
+    )
+    for index, shard in enumerate(shards):
+        assert [t.name for t in shard] == [
+            t.name for t in templates if get_template_shard(t, 3) == index
+        ]
+    assert select_shard(templates, 0, 1) == templates
+
+    # The shard of a template doesn't depend on the other templates
+    other_root = tmp_path / "other"
+    (other_root / "project_templates").mkdir(parents=True)
+    write_file_template(other_root, "template0")
+    other_template = Repo(str(other_root))["template0"]
+    assert get_template_shard(other_template, 3) == get_template_shard(
+        Repo(str(tmp_path))["template0"], 3
+    )
+
+    with pytest.raises(ValueError):
+        select_shard(templates, 3, 3)
@@ -2,6 +2,7 @@
 """
 
 from pathlib import Path
+from types import MappingProxyType
 from typing import Dict, List
 from unittest.mock import Mock
 
@@ -90,3 +91,84 @@ def test_preset_groups() -> None:
     c = template.config
 
     assert "preset_groups" in c["dialog_fields"][0]
+
+
+def test_templateconfig_read_only() -> None:
+    """Test that configurations are read-only, compact, and convertible to
+    dictionaries.
+    """
+    config = TemplateConfig(
+        {"name": "Python", "examples": [{"output": "example.txt"}]}
+    )
+    assert not hasattr(config, "__dict__")
+    assert isinstance(config.data, MappingProxyType)
+    assert config["examples"] == (MappingProxyType({"output": "example.txt"}),)
+    with pytest.raises(TypeError):
+        config.data["name"] = "Changed"  # type: ignore[index]
+
+    data = config.to_dict()
+    assert data == {
+        "name": "Python",
+        "examples": [{"output": "example.txt"}],
+        "dialog_title": "Configure template",
+    }
+    assert TemplateConfig.from_normalized(data) == config
+
+
+def test_templateconfig_normalize_sharing() -> None:
+    """Test that normalization shares unchanged values rather than copying
+    them.
+    """
+    template_path = (
+        Path(__file__).parent / "data" / "config" / "implicitselect"
+    )
+    template = FileTemplate(str(template_path))
+    config = TemplateConfig(
+        {
+            "dialog_fields": [
+                {
+                    "label": "Holder",
+                    "key": "copyright_holder",
+                    "component": "text",
+                    "placeholder": "Me",
+                },
+            ],
+            "examples": [{"output": "example.txt"}],
+        }
+    )
+    normalized = config.normalize(template)
+    assert normalized["examples"] is config["examples"]
+    assert normalized["dialog_fields"][0] is config["dialog_fields"][0]
+    assert normalized["name"] == "implicitselect"
+
+
+def test_templateconfig_normalize_validation() -> None:
+    """Test that normalization validates the values it adds, with the same
+    result as validating the full configuration.
+    """
+    template_path = (
+        Path(__file__).parent / "data" / "config" / "implicitselect"
+    )
+    template = FileTemplate(str(template_path))
+    config = TemplateConfig({"group": "Licenses"})
+    normalized = config.normalize(template)
+    assert normalized == TemplateConfig(normalized.to_dict())
+    assert isinstance(normalized["dialog_fields"], tuple)
+    assert all(
+        isinstance(field, MappingProxyType)
+        for field in normalized["dialog_fields"]
+    )
+
+    # A placeholder from cookiecutter.json that's too long is invalid
+    mock_template = Mock(spec=FileTemplate)
+    mock_template.name = "my_template"
+    mock_template.cookiecutter = {"holder": "x" * 100}
+    config = TemplateConfig(
+        {
+            "dialog_fields": [
+                {"label": "Holder", "key": "holder", "component": "text"}
+            ]
+        }
+    )
+    with pytest.raises(RuntimeError):
+        config.normalize(mock_template)
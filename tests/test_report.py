@@ -0,0 +1,53 @@
+"""Tests for the templatekit.report module.
+"""
+
+from pathlib import Path
+
+from templatekit.report import CheckReport, ReportSuite
+
+
+def _make_suite(shard: str) -> ReportSuite:
+    suite = ReportSuite("templatekit check", properties={"shard": shard})
+    suite.add("build.alpha", "file_templates/alpha/example.txt", time=0.5)
+    suite.add(
+        "build.beta",
+        "file_templates/beta/example.txt",
+        failure="UndefinedError\nDetails",
+    )
+    suite.add("build.gamma", "project_templates/gamma", skipped=True)
+    return suite
+
+
+def test_roundtrip(tmp_path: Path) -> None:
+    """Test writing and reading reports in the JSON and JUnit formats."""
+    report = CheckReport([_make_suite("1/2")])
+    assert len(report.cases) == 3
+    assert [case.name for case in report.failures] == [
+        "file_templates/beta/example.txt"
+    ]
+
+    for report_format in ("json", "junit"):
+        path = str(tmp_path / "report.{0}".format(report_format))
+        report.write(path, format=report_format)
+        read_report = CheckReport.read(path)
+        assert read_report.to_dict() == report.to_dict()
+
+
+def test_merge(tmp_path: Path) -> None:
+    """Test merging the reports of shards written in different formats."""
+    json_path = str(tmp_path / "shard1.json")
+    junit_path = str(tmp_path / "shard2.xml")
+    CheckReport([_make_suite("1/2")]).write(json_path, format="json")
+    CheckReport([_make_suite("2/2")]).write(junit_path, format="junit")
+
+    merged = CheckReport.merge(
+        CheckReport.read(path) for path in (json_path, junit_path)
+    )
+    assert [suite.properties["shard"] for suite in merged.suites] == [
+        "1/2",
+        "2/2",
+    ]
+    assert len(merged.cases) == 6
+    assert len(merged.failures) == 2
+    assert merged.to_dict()["tests"] == 6
+    assert '<testsuites tests="6" failures="2"' in merged.to_junit_xml()
@@ -0,0 +1,199 @@
+"""Tests for the templatekit.server module.
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+from support import write_file_template
+
+from templatekit.repo import Repo
+from templatekit.server import TemplateServer
+
+
+async def _request(
+    port: int, method: str, path: str, body: bytes = b""
+) -> Tuple[int, Dict[str, Any]]:
+    """Make an HTTP request to a server on localhost."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(
+        "{0} {1} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {2:d}\r\n"
+        "Connection: close\r\n\r\n".format(method, path, len(body)).encode()
+        + body
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, content = response.partition(b"\r\n\r\n")
+    status = int(head.split(b" ")[1])
+    return status, json.loads(content)
+
+
+def test_server(synthetic_repo: str) -> None:
+    """Test the endpoints of the server over HTTP."""
+
+    async def run() -> None:
+        server = TemplateServer(Repo(synthetic_repo), poll_interval=0)
+        await server.start(port=0)
+        port = server.addresses[0][1]
+        try:
+            status, data = await _request(port, "GET", "/templates")
+            assert status == 200
+            assert [t["name"] for t in data["templates"]] == [
+                "gamma",
+                "alpha",
+                "beta",
+            ]
+            assert data["templates"][1] == {
+                "name": "alpha",
+                "type": "file",
+                "group": "Synthetic",
+            }
+
+            status, data = await _request(port, "GET", "/templates/alpha")
+            assert status == 200
+            assert data["config"]["name"] == "alpha"
+
+            body = json.dumps({"context": {"year": "2030"}}).encode()
+            status, data = await _request(
+                port, "POST", "/templates/alpha/render", body
+            )
+            assert status == 200
+            assert data == {"name": "alpha", "text": "alpha (c) 2030\n"}
+
+            status, data = await _request(
+                port, "POST", "/templates/gamma/render"
+            )
+            assert status == 400
+
+            status, data = await _request(port, "GET", "/templates/missing")
+            assert status == 404
+            assert "missing" in data["error"]
+
+            status, data = await _request(
+                port, "GET", "/templates/alpha/render"
+            )
+            assert status == 405
+        finally:
+            await server.close()
+
+    asyncio.run(run())
+
+
+def test_server_request_limits(synthetic_repo: str) -> None:
+    """Test that requests with too many headers or a Transfer-Encoding are
+    rejected.
+    """
+
+    async def send(port: int, head: bytes) -> int:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(head)
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        return int(response.split(b" ")[1])
+
+    async def run() -> None:
+        server = TemplateServer(
+            Repo(synthetic_repo), poll_interval=0, max_header_count=10
+        )
+        await server.start(port=0)
+        port = server.addresses[0][1]
+        try:
+            headers = b"".join(
+                "X-Header-{0:d}: value\r\n".format(i).encode()
+                for i in range(11)
+            )
+            status = await send(
+                port, b"GET /health HTTP/1.1\r\n" + headers + b"\r\n"
+            )
+            assert status == 431
+
+            status = await send(
+                port,
+                b"POST /templates/alpha/render HTTP/1.1\r\n"
+                b"Transfer-Encoding: chunked\r\n\r\n"
+                b"2\r\n{}\r\n0\r\n\r\n",
+            )
+            assert status == 501
+
+            status, _ = await _request(port, "GET", "/health")
+            assert status == 200
+        finally:
+            await server.close()
+
+    asyncio.run(run())
+
+
+def test_server_reload(synthetic_repo: str) -> None:
+    """Test that changed templates are reloaded."""
+    server = TemplateServer(Repo(synthetic_repo), poll_interval=0)
+    server._preload()
+    assert server.check_for_changes() is False
+
+    config_path = (
+        Path(synthetic_repo) / "file_templates/alpha/templatekit.yaml"
+    )
+    mtime = config_path.stat().st_mtime_ns
+    config_path.write_text('name: "Alpha"\ngroup: "Renamed"\n')
+    # Ensure the change is visible on file systems with coarse timestamps
+    os.utime(config_path, ns=(mtime + 10**9, mtime + 10**9))
+    assert server.check_for_changes() is True
+
+    status, data = asyncio.run(server.handle_request("GET", "/templates"))
+    assert status == 200
+    assert data["templates"][1]["group"] == "Renamed"
+
+
+def test_list_templates_while_reloading(synthetic_repo: str) -> None:
+    """Test that listing templates while the watcher adds and removes
+    templates returns a consistent listing.
+    """
+    root = Path(synthetic_repo)
+    stop = threading.Event()
+
+    def change_templates(server: TemplateServer) -> None:
+        i = 0
+        while not stop.is_set():
+            name = "added{0:d}".format(i % 5)
+            path = root / "file_templates" / name
+            if path.exists():
+                shutil.rmtree(path)
+            else:
+                write_file_template(root, name)
+            server.check_for_changes()
+            i += 1
+
+    async def run() -> None:
+        server = TemplateServer(Repo(synthetic_repo), poll_interval=0)
+        await server.start(port=0)
+        port = server.addresses[0][1]
+        thread = threading.Thread(target=change_templates, args=(server,))
+        thread.start()
+        try:
+            for _ in range(50):
+                results = await asyncio.gather(
+                    *(_request(port, "GET", "/templates") for _ in range(4))
+                )
+                for status, data in results:
+                    assert status == 200, data
+                    names = [t["name"] for t in data["templates"]]
+                    assert names[0] == "gamma"
+                    assert names[1:] == sorted(set(names[1:]))
+                    assert {"alpha", "beta"} <= set(names)
+                    # Only the added templates can be removed mid-request
+                    assert all(
+                        "error" not in t
+                        for t in data["templates"]
+                        if not t["name"].startswith("added")
+                    )
+        finally:
+            stop.set()
+            thread.join()
+            await server.close()
+
+    asyncio.run(run())
@@ -0,0 +1,67 @@
+"""Tests for the templatekit.verify module.
+"""
+
+import subprocess
+from pathlib import Path
+
+from support import run_git
+
+from templatekit.examples import build_repo_examples
+from templatekit.repo import Repo
+from templatekit.verify import verify_repo_examples
+
+
+def _status(root: str) -> str:
+    return subprocess.run(
+        ["git", "status", "--porcelain"],
+        cwd=root,
+        check=True,
+        stdout=subprocess.PIPE,
+    ).stdout.decode()
+
+
+def test_verify_repo_examples(synthetic_repo: str) -> None:
+    """Test verifying examples against committed files, without writing to
+    the working tree.
+    """
+    root = Path(synthetic_repo)
+    repo = Repo(synthetic_repo)
+    assert all(result.ok for result in build_repo_examples(repo, workers=1))
+    (root / "project_templates/gamma/example/NOTES.md").write_text("Notes\n")
+    run_git(synthetic_repo, "init", "-q")
+    run_git(synthetic_repo, "add", ".")
+    run_git(synthetic_repo, "commit", "-q", "-m", "Initial commit")
+
+    results = verify_repo_examples(repo, workers=1)
+    assert [result.example.template_name for result in results] == [
+        "gamma",
+        "alpha",
+        "beta",
+    ]
+    (gamma,) = [r for r in results if r.example.template_name == "gamma"]
+    assert [(m.change, m.path) for m in gamma.mismatches] == [
+        ("deleted", "project_templates/gamma/example/NOTES.md")
+    ]
+    assert all(r.ok for r in results if r is not gamma)
+
+    # Edits to the template sources are compared with the committed examples
+    with open(root / "file_templates/alpha/template.txt.jinja", "a") as f:
+        f.write("Edited\n")
+    run_git(synthetic_repo, "rm", "-q", "file_templates/beta/example.txt")
+    run_git(synthetic_repo, "commit", "-q", "-m", "Remove beta example")
+    status = _status(synthetic_repo)
+
+    results = verify_repo_examples(repo, workers=2)
+    alpha, beta = results[1], results[2]
+    (mismatch,) = alpha.mismatches
+    assert mismatch.change == "modified"
+    assert mismatch.diff.endswith(" alpha (c) 2023\n+Edited\n")
+    assert mismatch.diff.startswith(
+        "--- a/file_templates/alpha/example.txt\n"
+        "+++ b/file_templates/alpha/example.txt\n"
+    )
+    assert [m.change for m in beta.mismatches] == ["added"]
+
+    # The working tree and index weren't modified
+    assert _status(synthetic_repo) == status
+    assert not (root / "file_templates/beta/example.txt").exists()
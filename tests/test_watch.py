@@ -0,0 +1,150 @@
+"""Tests for the templatekit.watch module and Repo.reload_template.
+"""
+
+import os
+import queue
+import shutil
+import threading
+from pathlib import Path
+from typing import List
+
+from support import write_file_template
+
+from templatekit.filerender import FileTemplateRenderer
+from templatekit.repo import FileTemplate, Repo
+from templatekit.watch import RepoWatcher, TemplateChange
+
+
+def _write_config(template_dir: Path, content: str) -> None:
+    """Replace a template's templatekit.yaml file in place, with a later
+    modification time.
+    """
+    config_path = template_dir / "templatekit.yaml"
+    mtime = config_path.stat().st_mtime_ns
+    config_path.write_text(content)
+    # Ensure the change is visible on file systems with coarse timestamps
+    os.utime(config_path, ns=(mtime + 10**9, mtime + 10**9))
+
+
+def test_reload_template(synthetic_repo: str) -> None:
+    """Test that reloading a template doesn't reload other templates."""
+    root = Path(synthetic_repo)
+    repo = Repo(synthetic_repo)
+    gamma = repo["gamma"]
+    assert repo["alpha"].config["group"] == "Synthetic"
+
+    _write_config(root / "file_templates/alpha", 'group: "Changed"\n')
+    alpha = repo.reload_template("alpha")
+    assert alpha is not None
+    assert alpha.config["group"] == "Changed"
+    assert repo["alpha"] is alpha
+    assert repo["gamma"] is gamma
+
+    write_file_template(root, "aardvark")
+    shutil.rmtree(root / "file_templates/beta")
+    assert repo.reload_template("aardvark") is not None
+    assert repo.reload_template("beta") is None
+    assert list(repo) == ["gamma", "aardvark", "alpha"]
+    assert repo["gamma"] is gamma
+    assert repo["alpha"] is alpha
+
+
+def test_check_for_changes(synthetic_repo: str) -> None:
+    """Test polling for changes, and change callbacks."""
+    root = Path(synthetic_repo)
+    repo = Repo(synthetic_repo)
+    renderer = FileTemplateRenderer()
+    template = repo["alpha"]
+    assert isinstance(template, FileTemplate)
+    renderer.get_template(template.source_path)
+    changes: List[TemplateChange] = []
+
+    def invalidate(change: TemplateChange) -> None:
+        changes.append(change)
+        for path in change.paths:
+            renderer.invalidate(path)
+
+    watcher = RepoWatcher(repo, callbacks=[invalidate])
+    assert watcher.check_for_changes() == []
+
+    # Changes to other files in template directories are ignored
+    (root / "file_templates/alpha/README.md").write_text("Notes\n")
+    assert watcher.check_for_changes() == []
+
+    _write_config(root / "file_templates/alpha", 'group: "Changed"\n')
+    write_file_template(root, "delta")
+    assert [change.name for change in watcher.check_for_changes()] == [
+        "alpha",
+        "delta",
+    ]
+    assert [change.name for change in changes] == ["alpha", "delta"]
+    assert changes[0].paths == (str(root / "file_templates/alpha"),)
+    assert changes[0].template is repo["alpha"]
+    assert repo["alpha"].config["group"] == "Changed"
+    assert "delta" in repo
+    assert not renderer._templates
+
+
+def test_watcher_thread(synthetic_repo: str) -> None:
+    """Test that a running watcher reloads changed templates."""
+    root = Path(synthetic_repo)
+    repo = Repo(synthetic_repo)
+    assert repo["beta"].config["group"] == "Synthetic"
+    changes: "queue.Queue[TemplateChange]" = queue.Queue()
+    watcher = RepoWatcher(repo, callbacks=[changes.put], poll_interval=0.05)
+    with watcher:
+        running_backend = watcher.backend
+        _write_config(root / "file_templates/beta", 'group: "Changed"\n')
+        change = changes.get(timeout=10)
+    stopped_backend = watcher.backend
+    assert running_backend in ("watchdog", "polling")
+    assert stopped_backend is None
+    assert change.name == "beta"
+    assert change.template is not None
+    assert change.template.config["group"] == "Changed"
+
+
+def test_reload_while_reading(synthetic_repo: str) -> None:
+    """Test that templates can be looked up on other threads while the
+    watcher adds and removes templates.
+    """
+    root = Path(synthetic_repo)
+    repo = Repo(synthetic_repo)
+    watcher = RepoWatcher(repo)
+    watcher.take_snapshot()
+    stop = threading.Event()
+    errors: List[BaseException] = []
+
+    def read() -> None:
+        try:
+            while not stop.is_set():
+                assert [name for name, _ in repo.items()][0] == "gamma"
+                for name in repo:
+                    try:
+                        assert repo[name].name == name
+                    except KeyError:
+                        # Removed since iteration started
+                        pass
+        except BaseException as err:
+            errors.append(err)
+
+    threads = [threading.Thread(target=read) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    try:
+        for i in range(100):
+            path = root / "file_templates" / "added{0:d}".format(i % 5)
+            if path.exists():
+                shutil.rmtree(path)
+            else:
+                write_file_template(root, path.name)
+            watcher.check_for_changes()
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+    assert errors == []
+    assert sorted(repo) == sorted(
+        ["gamma", "alpha", "beta"]
+        + [p.name for p in (root / "file_templates").glob("added*")]
+    )